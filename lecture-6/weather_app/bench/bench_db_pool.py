@@ -0,0 +1,86 @@
+"""コネクションプールと呼び出しごとの接続のベンチマーク
+
+使い方:
+    python bench/bench_db_pool.py [--calls 2000] [--threads 4]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODES = [f"{i:02d}0000" for i in range(1, 48)]
+
+
+def sample_weather_list():
+    """ベンチマーク用の 7 日分の予報データ"""
+    return [
+        {
+            "date": f"2026-01-{day:02d}",
+            "weather": "晴れ　時々　くもり",
+            "weather_code": "101",
+            "temp_min": "1",
+            "temp_max": "12",
+        }
+        for day in range(13, 20)
+    ]
+
+
+def seed(db):
+    """全地域に数件ずつ予報を登録"""
+    weather_list = sample_weather_list()
+    for area_code in AREA_CODES:
+        for _ in range(5):
+            db.save_forecast(area_code, "テスト気象台", weather_list)
+
+
+def run_reads(db, calls, threads):
+    """get_latest_forecast / get_forecast_history を繰り返し呼び出して経過時間を返す"""
+    def work(i):
+        area_code = AREA_CODES[i % len(AREA_CODES)]
+        db.get_latest_forecast(area_code)
+        db.get_forecast_history(area_code)
+
+    start = time.perf_counter()
+    if threads <= 1:
+        for i in range(calls):
+            work(i)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(work, range(calls)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(WeatherDatabase(db_path, pool_size=0, pragmas={}))
+
+        modes = [
+            ("connect-per-call", WeatherDatabase(db_path, pool_size=0, pragmas={}, cache_size=0)),
+            ("pool", WeatherDatabase(db_path, pool_size=args.threads, cache_size=0)),
+        ]
+
+        print(f"calls={args.calls} threads={args.threads}")
+        for name, db in modes:
+            for threads in (1, args.threads):
+                elapsed = run_reads(db, args.calls, threads)
+                per_call = elapsed / args.calls * 1000
+                print(f"{name:>18} threads={threads}: "
+                      f"{elapsed:.3f}s  ({per_call:.3f} ms/call)")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
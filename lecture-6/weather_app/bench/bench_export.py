@@ -0,0 +1,103 @@
+"""予報の履歴の列指向ファイルへの書き出しのベンチマーク
+
+bench_forecast_stats.py と同じ合成データ（既定で 58 地域 × 60 日 × 1 日 3 回の予報）を作成し、
+1. get_forecast_by_id で予報を 1 件ずつ辞書に読み込む（これまでの分析の手順）
+2. export_forecasts で地域・月ごとのファイルに書き出す
+の時間と Python のメモリ使用量のピーク（tracemalloc）を比較する。
+書き出したファイルの行数（.npz は各列のヘッダ、Parquet はメタデータ）が
+予報詳細の件数と一致しなければ終了コード 1。
+
+使い方:
+    python bench/bench_export.py [--days 60] [--format npz] [--rows-per-file 100000]
+"""
+import argparse
+import ast
+import glob
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_forecast_stats import build  # noqa: E402
+from database import WeatherDatabase  # noqa: E402
+from export import DEFAULT_FORMAT, export_forecasts, pyarrow  # noqa: E402
+
+
+def read_npz_header(path, name):
+    """書き出した .npz の列の (dtype, 行数)。numpy のない環境でも読めるようヘッダだけを解析する"""
+    with zipfile.ZipFile(path) as archive, archive.open(f"{name}.npy") as f:
+        f.read(8)
+        (length,) = struct.unpack("<H", f.read(2))
+        header = ast.literal_eval(f.read(length).decode("latin1"))
+    return header["descr"], header["shape"][0]
+
+
+def count_rows(path):
+    """書き出したファイル 1 つの行数"""
+    if path.endswith(".npz"):
+        return read_npz_header(path, "forecast_id")[1]
+    return pyarrow.parquet.read_metadata(path).num_rows
+
+
+def load_dicts(db):
+    """全予報を get_forecast_by_id で辞書のリストに読み込む"""
+    with db.pool.connection() as conn:
+        forecast_ids = [row[0] for row in conn.execute("SELECT forecast_id FROM forecasts")]
+    return [db.get_forecast_by_id(forecast_id) for forecast_id in forecast_ids]
+
+
+def measure(func):
+    """(所要時間（秒）, メモリのピーク（バイト）, 戻り値)。時間は tracemalloc なしで測る"""
+    start = time.perf_counter()
+    result = func(False)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(True)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--format", default=DEFAULT_FORMAT, choices=("npz", "parquet"))
+    parser.add_argument("--rows-per-file", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), cache_size=0)
+        forecasts, details = build(db, args.days)
+        print(f"予報 {forecasts:,}件 / 予報詳細 {details:,}件")
+
+        elapsed, peak, _ = measure(lambda traced: load_dicts(db))
+        print(f"  get_forecast_by_id → 辞書 : {elapsed:6.2f} 秒 "
+              f"({details / elapsed:9,.0f} 行/秒)  ピーク {peak / 2**20:7.1f} MiB")
+
+        def export(traced):
+            out_dir = os.path.join(tmp, "traced" if traced else "export")
+            return export_forecasts(db, out_dir, args.format,
+                                    rows_per_file=args.rows_per_file)
+
+        elapsed, peak, result = measure(export)
+        print(f"  export_forecasts（{result['format']}）: {elapsed:6.2f} 秒 "
+              f"({result['rows'] / elapsed:9,.0f} 行/秒)  ピーク {peak / 2**20:7.1f} MiB")
+
+        files = glob.glob(os.path.join(tmp, "export", "*", "*", "part-*"))
+        size = sum(os.path.getsize(path) for path in files)
+        print(f"  {result['partitions']} 区分 {len(files)} ファイル、合計 {size / 2**20:.1f} MiB")
+        written = sum(count_rows(path) for path in files)
+        db.close()
+
+    if written != details or result["forecasts"] != forecasts:
+        print(f"書き出した行数が一致しません: {written} / {details}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""地域を選択してから予報が表示されるまでの時間（初回表示）を測るベンチマーク
+
+保存済みの予報が古い地域を選択し、次の 2 つを比較する。
+blocking : 気象庁API（スタブ）の応答を待ってから表示
+swr      : 保存済みの予報を即座に表示し、バックグラウンドで更新を確認（stale-while-revalidate）
+
+使い方:
+    python bench/bench_first_paint.py [--delay 0.3] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from headless_page import HeadlessPage  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from jma_stub import JmaStubServer  # noqa: E402
+from prefetch import store_forecast  # noqa: E402
+from weather_app import WeatherApp  # noqa: E402
+
+
+AREA_CODE = "130000"
+
+
+def make_stale(db):
+    """保存済みの予報を古い発表のものにする"""
+    with db.pool.connection() as conn, conn:
+        conn.execute("UPDATE forecasts SET report_datetime = '2020-01-01T05:00:00+09:00'")
+        conn.execute("UPDATE forecast_observations SET observed_at = '2020-01-01T05:00:00'")
+    db.cache.clear()
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("表示されませんでした")
+        time.sleep(0.001)
+
+
+def measure(app, repeat):
+    samples = []
+    for _ in range(repeat):
+        make_stale(app.db)
+        count = len(app.first_paint_ms)
+        app.on_area_clicked(AREA_CODE)
+        wait_until(lambda: len(app.first_paint_ms) > count)
+        samples.append(app.first_paint_ms[-1])
+        # バックグラウンドの更新確認が終わるまで待つ
+        wait_until(lambda: not app.stale_badge.visible)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.3, help="スタブの応答遅延（秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with JmaStubServer(delay=args.delay) as server, tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"))
+        # 毎回フルダウンロードになるよう検証子は保存しない
+        client = JmaClient(None, base_url=server.base_url)
+        store_forecast(db, AREA_CODE, client.fetch_forecast(AREA_CODE))
+
+        results = {}
+        for name, swr in (("blocking", False), ("swr", True)):
+            app = WeatherApp(db=db, client=client)
+            app.STALE_WHILE_REVALIDATE = swr
+            HeadlessPage().add(app)
+            results[name] = measure(app, args.repeat)
+
+        for name, (median, worst) in results.items():
+            print(f"{name:>9}: median {median:.1f} ms  max {worst:.1f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""予報の変化の集計テーブル（forecast_date_stats / forecast_revisions）のベンチマーク
+
+合成データ（既定で 58 地域 × 180 日 × 1 日 3 回の予報、各 7 日分）を作成し、
+1. ある地域・対象日の予報の変化（改訂の一覧）
+2. ある地域の対象日ごとの予想気温の変化（最初と最後の差・範囲・改訂回数）
+を forecasts × forecast_details の走査と集計テーブルの読み取りで比較する。
+結果が一致しなければ終了コード 1。
+最後に save_forecast 1 回あたりの集計テーブル更新の追加時間を表示する。
+
+使い方:
+    python bench/bench_forecast_stats.py [--days 180] [--calls 200]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODES = [f"{i:02d}0000" for i in range(1, 59)]
+CODES = [100, 101, 200, 202, 300]
+
+SCAN_REVISIONS = """
+    SELECT f.fetched_at, f.forecast_id, d.weather_code, d.temp_min, d.temp_max
+    FROM forecasts f
+    JOIN forecast_details d ON d.forecast_id = f.forecast_id
+    WHERE f.area_code = ? AND d.forecast_date = ?
+    ORDER BY f.fetched_at, f.forecast_id
+"""
+
+SCAN_DRIFT = """
+    SELECT d.forecast_date, COUNT(*),
+           MIN(d.temp_max), MAX(d.temp_max)
+    FROM forecasts f
+    JOIN forecast_details d ON d.forecast_id = f.forecast_id
+    WHERE f.area_code = ?
+    GROUP BY d.forecast_date
+    ORDER BY d.forecast_date
+"""
+
+
+def build(db, days):
+    """合成データを一括で投入し、集計テーブルを作り直す"""
+    rng = random.Random(0)
+    start = datetime(2026, 1, 1)
+    forecasts = []
+    details = []
+    forecast_id = 0
+    for day in range(days):
+        for hour in (5, 11, 17):
+            fetched_at = (start + timedelta(days=day, hours=hour)).isoformat()
+            for area_code in AREA_CODES:
+                forecast_id += 1
+                forecasts.append((forecast_id, area_code, fetched_at))
+                for offset in range(7):
+                    target = (start + timedelta(days=day + offset)).date().isoformat()
+                    base = 10 + (day + offset) % 15
+                    details.append((
+                        forecast_id, target, CODES[rng.randrange(len(CODES))],
+                        base - rng.randrange(2), base + 8 + rng.randrange(2),
+                    ))
+
+    with db.pool.connection() as conn, conn:
+        conn.executemany("""
+            INSERT INTO forecasts
+            (forecast_id, area_code, publishing_office, report_datetime, fetched_at)
+            VALUES (?, ?, '合成気象台', ?, ?)
+        """, ((fid, code, at, at) for fid, code, at in forecasts))
+        conn.executemany("""
+            INSERT INTO forecast_details
+            (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+            VALUES (?, ?, '', ?, ?, ?)
+        """, details)
+    db.rebuild_forecast_date_stats()
+    return len(forecasts), len(details)
+
+
+def scan_revisions(db, area_code, forecast_date):
+    """forecasts × forecast_details から改訂（値が変わった取得）を取り出す"""
+    with db.pool.connection() as conn:
+        rows = conn.execute(SCAN_REVISIONS, (area_code, forecast_date)).fetchall()
+    revisions = []
+    previous = None
+    for fetched_at, forecast_id, code, temp_min, temp_max in rows:
+        if previous is None or previous != (code, temp_min, temp_max):
+            revisions.append((forecast_id, code, temp_min, temp_max))
+        previous = (code, temp_min, temp_max)
+    return revisions
+
+
+def scan_drift(db, area_code):
+    with db.pool.connection() as conn:
+        return [(row[0], row[1], row[2], row[3])
+                for row in conn.execute(SCAN_DRIFT, (area_code,))]
+
+
+def per_call(func, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def save_overhead(tmp, calls):
+    """save_forecast 1 回あたりの時間（集計あり / なし）"""
+    results = {}
+    for name, maintain in (("集計あり", True), ("集計なし", False)):
+        db = WeatherDatabase(os.path.join(tmp, f"save_{maintain}.db"), cache_size=0)
+        if not maintain:
+            db._update_forecast_date_stats = lambda *args: None
+        start = time.perf_counter()
+        for i in range(calls):
+            weather_list = [
+                {"date": f"2026-02-{day + 1:02d}", "weather": "晴れ", "weather_code": 100,
+                 "temp_min": i % 7 + day, "temp_max": i % 5 + day + 8}
+                for day in range(7)
+            ]
+            db.save_forecast(AREA_CODES[i % len(AREA_CODES)], "気象台", weather_list)
+        results[name] = (time.perf_counter() - start) / calls * 1000
+        db.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), cache_size=0)
+        start = time.perf_counter()
+        forecasts, details = build(db, args.days)
+        print(f"予報 {forecasts:,}件 / 予報詳細 {details:,}件"
+              f"（集計テーブルの作成を含め {time.perf_counter() - start:.1f} 秒）")
+
+        targets = [
+            (rng.choice(AREA_CODES),
+             (datetime(2026, 1, 1) + timedelta(days=rng.randrange(args.days))).date().isoformat())
+            for _ in range(args.calls)
+        ]
+        for area_code, forecast_date in targets[:20]:
+            expected = scan_revisions(db, area_code, forecast_date)
+            actual = [
+                (row["forecast_id"], row["weather_code"], row["temp_min"], row["temp_max"])
+                for row in db.get_forecast_revisions(area_code, forecast_date)
+            ]
+            stats = db.get_forecast_date_stats(area_code, forecast_date, forecast_date)[0]
+            if actual != expected or stats["revisions"] != len(expected) - 1:
+                print(f"改訂の一覧が一致しません: {area_code} {forecast_date}")
+                failed = True
+
+        scan = per_call(scan_revisions, [(db, *target) for target in targets])
+        table = per_call(db.get_forecast_revisions, targets)
+        print(f"  1 地域・1 対象日の改訂  scan : {scan:7.3f} ms  table : {table:7.3f} ms")
+
+        areas = [(code,) for code, _ in targets]
+        scan = per_call(lambda code: scan_drift(db, code), areas)
+        table = per_call(db.get_forecast_date_stats, areas)
+        print(f"  1 地域の対象日ごとの変化 scan : {scan:7.3f} ms  table : {table:7.3f} ms")
+        db.close()
+
+        for name, elapsed in save_overhead(tmp, args.calls).items():
+            print(f"  save_forecast（{name}）: {elapsed:.3f} ms/回")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
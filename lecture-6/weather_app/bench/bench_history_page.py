@@ -0,0 +1,98 @@
+"""予報履歴のページングのベンチマーク（キーセット / OFFSET）
+
+1 地域に大量の予報を登録し、履歴の深さごとに 1 ページ（10 件）の取得時間を比較する。
+
+使い方:
+    python bench/bench_history_page.py [--forecasts 200000] [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODE = "130000"
+PAGE_SIZE = 10
+
+
+def build(db, forecasts):
+    """1 地域分の予報ヘッダを一括で投入"""
+    start = datetime(2020, 1, 1)
+    with db.pool.connection() as conn, conn:
+        conn.executemany("""
+            INSERT INTO forecasts (area_code, publishing_office, report_datetime, fetched_at)
+            VALUES (?, '気象庁', ?, ?)
+        """, (
+            (AREA_CODE,
+             (start + timedelta(minutes=i)).isoformat(),
+             (start + timedelta(minutes=i)).isoformat())
+            for i in range(forecasts)
+        ))
+
+
+def offset_page(conn, depth):
+    """OFFSET による従来方式のページ取得"""
+    return conn.execute("""
+        SELECT forecast_id, fetched_at, publishing_office
+        FROM forecasts
+        WHERE area_code = ?
+        ORDER BY fetched_at DESC, forecast_id DESC
+        LIMIT ? OFFSET ?
+    """, (AREA_CODE, PAGE_SIZE, depth)).fetchall()
+
+
+def cursor_at(conn, depth):
+    """深さ depth のページを取得するためのカーソル（直前の行）"""
+    forecast_id, fetched_at = conn.execute("""
+        SELECT forecast_id, fetched_at
+        FROM forecasts
+        WHERE area_code = ?
+        ORDER BY fetched_at DESC, forecast_id DESC
+        LIMIT 1 OFFSET ?
+    """, (AREA_CODE, depth - 1)).fetchone()
+    return fetched_at, forecast_id
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forecasts", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), pool_size=1, cache_size=0)
+        build(db, args.forecasts)
+        print(f"履歴 {args.forecasts:,} 件、1 ページ {PAGE_SIZE} 件")
+        print(f"  {'depth':>8}  {'keyset':>10}  {'offset':>10}")
+
+        depths = [0] + [d for d in (1000, 10000, 100000, args.forecasts - PAGE_SIZE)
+                        if 0 < d < args.forecasts]
+        for depth in depths:
+            with db.pool.connection() as conn:
+                before = cursor_at(conn, depth) if depth else None
+                offset_ms, expected = timed(lambda: offset_page(conn, depth), args.repeat)
+
+            keyset_ms, (rows, _) = timed(
+                lambda: db.get_forecast_history_page(AREA_CODE, PAGE_SIZE, before), args.repeat
+            )
+            assert rows == expected, f"depth {depth} の結果が一致しません"
+            print(f"  {depth:>8,}  {keyset_ms:>8.3f}ms  {offset_ms:>8.3f}ms")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
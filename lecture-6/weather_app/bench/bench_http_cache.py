@@ -0,0 +1,46 @@
+"""条件付きリクエスト（ETag / Last-Modified）の効果を測るベンチマーク
+
+area.json と全地域の予報をスタブサーバから 2 回取得し、2 回目に
+304 で省略できたリクエスト数と転送量を表示する。
+
+使い方:
+    python bench/bench_http_cache.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from jma_stub import JmaStubServer, default_area_codes  # noqa: E402
+
+
+def fetch_all(client, area_codes):
+    client.fetch_area_json()
+    for area_code in area_codes:
+        client.fetch_forecast(area_code)
+
+
+def main():
+    area_codes = sorted(default_area_codes())
+
+    with JmaStubServer() as server, tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"))
+
+        for label in ("cold", "revalidate"):
+            # 起動ごとに新しいクライアントを作る（検証子はデータベースに残る）
+            client = JmaClient(db, base_url=server.base_url)
+            start = time.perf_counter()
+            fetch_all(client, area_codes)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>10}: {elapsed:.3f}s {client.stats()}")
+            client.close()
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
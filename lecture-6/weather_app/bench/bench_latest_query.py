@@ -0,0 +1,114 @@
+"""最新予報の取得クエリのベンチマーク
+
+合成データ（既定で 30 万件の予報 = 210 万件の予報詳細）を作成し、
+現在の get_latest_forecast（JOIN 1 回）と旧実装（area_code のみのインデックス + 2 クエリ）を比較する。
+実行計画の確認は小さなデータで行う check_query_plan.py で行う。
+
+使い方:
+    python bench/bench_latest_query.py [--forecasts 300000] [--calls 2000]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODES = [f"{i:02d}0000" for i in range(1, 59)]
+
+def build(db, forecasts):
+    """合成データを一括で投入"""
+    start = datetime(2020, 1, 1)
+    with db.pool.connection() as conn, conn:
+        conn.executemany("""
+            INSERT INTO forecasts
+            (forecast_id, area_code, publishing_office, report_datetime, fetched_at)
+            VALUES (?, ?, '合成気象台', ?, ?)
+        """, (
+            (i, AREA_CODES[i % len(AREA_CODES)],
+             (start + timedelta(minutes=10 * i)).isoformat(),
+             (start + timedelta(minutes=10 * i)).isoformat())
+            for i in range(1, forecasts + 1)
+        ))
+        conn.executemany("""
+            INSERT INTO forecast_observations (forecast_id, observed_at)
+            SELECT forecast_id, fetched_at FROM forecasts WHERE forecast_id = ?
+        """, ((i,) for i in range(1, forecasts + 1, 997)))
+        conn.executemany("""
+            INSERT INTO forecast_details
+            (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+            VALUES (?, ?, '晴れ', 100, ?, ?)
+        """, (
+            (i, f"2026-01-{day:02d}", day % 5, day % 5 + 8)
+            for i in range(1, forecasts + 1)
+            for day in range(1, 8)
+        ))
+
+
+def legacy_get_latest_forecast(conn, area_code):
+    """旧実装（2 クエリ）"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT forecast_id, publishing_office, fetched_at
+        FROM forecasts
+        WHERE area_code = ?
+        ORDER BY fetched_at DESC
+        LIMIT 1
+    """, (area_code,))
+    forecast_id, publishing_office, fetched_at = cursor.fetchone()
+    cursor.execute("""
+        SELECT forecast_date, weather_text, weather_code, temp_min, temp_max
+        FROM forecast_details
+        WHERE forecast_id = ?
+        ORDER BY forecast_date
+    """, (forecast_id,))
+    return forecast_id, cursor.fetchall()
+
+
+def measure(func, calls):
+    samples = []
+    rng = random.Random(0)
+    for _ in range(calls):
+        area_code = rng.choice(AREA_CODES)
+        start = time.perf_counter()
+        func(area_code)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forecasts", type=int, default=300000)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), pool_size=1, cache_size=0)
+
+        start = time.perf_counter()
+        build(db, args.forecasts)
+        print(f"合成データ: 予報 {args.forecasts:,}件 / 詳細 {args.forecasts * 7:,}件"
+              f"（{time.perf_counter() - start:.1f}s）")
+
+        median, p95 = measure(db.get_latest_forecast, args.calls)
+        print(f"  current (JOIN)          : p50 {median:.3f} ms  p95 {p95:.3f} ms")
+
+        with db.pool.connection() as conn:
+            conn.execute("DROP INDEX idx_forecasts_area_fetched")
+            conn.execute("CREATE INDEX idx_area_code ON forecasts(area_code)")
+            median, p95 = measure(lambda code: legacy_get_latest_forecast(conn, code), args.calls)
+        print(f"  legacy (2 queries)      : p50 {median:.3f} ms  p95 {p95:.3f} ms")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""計測（metrics.py）のオーバーヘッドのベンチマーク
+
+timer : 計測なし / 無効な METRICS.timer / 有効な METRICS.timer の 1 回あたりの時間
+query : キャッシュなしの get_latest_forecast（計測の無効 / 有効）
+
+最後に、有効時に記録された内容を Prometheus 形式で表示する。
+
+使い方:
+    python bench/bench_metrics.py [--calls 200000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from metrics import METRICS  # noqa: E402
+
+
+def weather_list():
+    return [
+        {"date": f"2026-01-{day + 13:02d}", "weather": "晴れ", "weather_code": 100,
+         "temp_min": day, "temp_max": day + 10}
+        for day in range(7)
+    ]
+
+
+def per_call(func, calls):
+    """1 回あたりの時間（ナノ秒）"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    context = nullcontext()
+
+    def bare():
+        with context:
+            pass
+
+    def timed():
+        with METRICS.timer("bench_seconds"):
+            pass
+
+    METRICS.enabled = False
+    baseline = per_call(bare, args.calls)
+    disabled = per_call(timed, args.calls)
+    METRICS.enabled = True
+    enabled = per_call(timed, args.calls)
+    print(f"  timer 計測なし : {baseline:7.0f} ns/回")
+    print(f"  timer 無効     : {disabled:7.0f} ns/回")
+    print(f"  timer 有効     : {enabled:7.0f} ns/回")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), cache_size=0)
+        db.save_forecast("130000", "気象庁", weather_list())
+        calls = max(args.calls // 100, 1)
+
+        def query():
+            db.get_latest_forecast("130000")
+
+        for enabled in (False, True):
+            METRICS.enabled = enabled
+            elapsed = per_call(query, calls) / 1000
+            print(f"  query 計測{'有効' if enabled else '無効'} : {elapsed:7.1f} µs/回")
+        db.close()
+
+    print()
+    print(METRICS.to_prometheus(), end="")
+
+
+if __name__ == "__main__":
+    main()
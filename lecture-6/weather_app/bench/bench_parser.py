@@ -0,0 +1,209 @@
+"""予報 JSON パーサのベンチマーク
+
+旧実装（show_weather_forecast 内にあった areas[0] のみを辞書で組み立てる処理）と、
+保存時に実際に使われる prefetch.parse_for_storage（列指向パーサ forecast_parser）を比較する。
+- full=False: 先頭の細分区域だけ（旧実装と同じ範囲）
+- full=True : 全細分区域・全日付・6 時間降水確率（store_forecast の既定）
+full=True は処理する行が多いため、行数あたりの速度（rows/s）も表示する。
+表示用の日別予報が旧実装と同じになることも確認する
+（旧実装の文字列の気温・天気コードは数値に変換して比較）。
+
+使い方:
+    python bench/bench_parser.py [--fixtures DIR] [--repeat 50]
+
+--fixtures を省略した場合は jma_stub の固定データを全地域分使用する。
+"""
+import argparse
+import gc
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from forecast_parser import to_number  # noqa: E402
+from jma_stub import canned_forecast, default_area_codes  # noqa: E402
+from prefetch import parse_for_storage  # noqa: E402
+from weather_codes import weather_label  # noqa: E402
+
+
+def legacy_parse_forecast(data):
+    """旧実装（比較用にそのまま残したもの）"""
+    short_term = data[0]
+    publishing_office = short_term.get("publishingOffice", "")
+    weekly = data[1]
+
+    weather_dict = {}
+    if short_term.get("timeSeries"):
+        series = short_term["timeSeries"][0]
+        dates = series.get("timeDefines", [])
+        if series.get("areas"):
+            weathers = series["areas"][0].get("weathers", [])
+            weather_codes = series["areas"][0].get("weatherCodes", [])
+
+            for i, date_str in enumerate(dates[:3]):
+                date_only = date_str[:10]
+                weather = weathers[i] if i < len(weathers) else ""
+                w_code = weather_codes[i] if i < len(weather_codes) else ""
+
+                weather_dict[date_only] = {
+                    "weather": weather,
+                    "weather_code": w_code
+                }
+
+    if short_term.get("timeSeries") and len(short_term["timeSeries"]) > 2:
+        temp_series = short_term["timeSeries"][2]
+        dates = temp_series.get("timeDefines", [])
+        if temp_series.get("areas"):
+            area = temp_series["areas"][0]
+            temps = area.get("temps", [])
+
+            for i, date_str in enumerate(dates):
+                date_only = date_str[:10]
+                if date_only not in weather_dict:
+                    weather_dict[date_only] = {}
+
+                if i < len(temps) and temps[i] and temps[i].strip():
+                    if i % 2 == 0:
+                        weather_dict[date_only]["temp_min"] = temps[i]
+                    else:
+                        weather_dict[date_only]["temp_max"] = temps[i]
+
+    if weekly.get("timeSeries"):
+        w_series = weekly["timeSeries"][0]
+        w_dates = w_series.get("timeDefines", [])
+        if w_series.get("areas"):
+            w_area = w_series["areas"][0]
+            weather_codes = w_area.get("weatherCodes", [])
+
+            for i, date_str in enumerate(w_dates):
+                date_only = date_str[:10]
+                if date_only not in weather_dict:
+                    weather_dict[date_only] = {}
+
+                if i < len(weather_codes) and weather_codes[i]:
+                    weather_dict[date_only]["weather_code"] = weather_codes[i]
+
+    if weekly.get("timeSeries") and len(weekly["timeSeries"]) > 1:
+        temp_series = weekly["timeSeries"][1]
+        dates = temp_series.get("timeDefines", [])
+        if temp_series.get("areas"):
+            area = temp_series["areas"][0]
+            temps_min = area.get("tempsMin", [])
+            temps_max = area.get("tempsMax", [])
+
+            for i, date_str in enumerate(dates):
+                date_only = date_str[:10]
+                if date_only not in weather_dict:
+                    weather_dict[date_only] = {}
+
+                if i < len(temps_min) and temps_min[i] and temps_min[i].strip():
+                    if "temp_min" not in weather_dict[date_only]:
+                        weather_dict[date_only]["temp_min"] = temps_min[i]
+
+                if i < len(temps_max) and temps_max[i] and temps_max[i].strip():
+                    if "temp_max" not in weather_dict[date_only]:
+                        weather_dict[date_only]["temp_max"] = temps_max[i]
+
+    weather_list = []
+    for date_str in sorted(weather_dict.keys())[:7]:
+        item = weather_dict[date_str]
+
+        weather_text = item.get("weather", "")
+        if not weather_text:
+            # 天気文がない日は天気コードの略称（現在の実装と同じ表）を使う
+            weather_text = weather_label(item.get("weather_code", ""))
+
+        weather_list.append({
+            "date": date_str,
+            "weather": weather_text,
+            "weather_code": item.get("weather_code", ""),
+            "temp_min": item.get("temp_min", ""),
+            "temp_max": item.get("temp_max", "")
+        })
+
+    return publishing_office, weather_list
+
+
+def load_payloads(fixtures):
+    """{office_code: data} を返す"""
+    if not fixtures:
+        return {code: canned_forecast(code) for code in sorted(default_area_codes())}
+
+    payloads = {}
+    for path in sorted(glob.glob(os.path.join(fixtures, "*.json"))):
+        office_code = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, list) and len(data) >= 2:
+            payloads[office_code] = data
+    return payloads
+
+
+def timeit(funcs, repeat, rounds=10):
+    """各関数の 1 回あたりの時間（秒）のリスト
+
+    他のプロセスや GC の影響を揃えるため、GC を止めて関数を交互に repeat 回ずつ
+    rounds 周実行し、それぞれの最小値を返す。
+    """
+    best = [float("inf")] * len(funcs)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for i, func in enumerate(funcs):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    func()
+                best[i] = min(best[i], (time.perf_counter() - start) / repeat)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="予報 JSON（{office_code}.json）のディレクトリ")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.fixtures)
+    if not payloads:
+        sys.exit("予報 JSON が見つかりませんでした")
+
+    for office_code, data in payloads.items():
+        publishing_office, weather_list = legacy_parse_forecast(data)
+        for item in weather_list:
+            for key in ("weather_code", "temp_min", "temp_max"):
+                item[key] = to_number(item[key])
+        for full in (False, True):
+            if parse_for_storage(data, office_code, full)[0] != weather_list:
+                sys.exit(f"旧実装と結果が一致しません: {office_code}（full={full}）")
+
+    offices = len(payloads)
+    legacy_rows = sum(len(legacy_parse_forecast(data)[1]) for data in payloads.values())
+    rows = 0
+    for office_code, data in payloads.items():
+        _, columns, pop_steps = parse_for_storage(data, office_code)
+        rows += len(columns) + len(pop_steps)
+
+    legacy, single, full = timeit([
+        lambda: [legacy_parse_forecast(d) for d in payloads.values()],
+        lambda: [parse_for_storage(d, code, False) for code, d in payloads.items()],
+        lambda: [parse_for_storage(d, code) for code, d in payloads.items()],
+    ], args.repeat)
+
+    print(f"offices={offices} rows(full)={rows} repeat={args.repeat}")
+    print(f"  legacy (areas[0])            : {legacy * 1000:.3f} ms/batch "
+          f"{legacy_rows / legacy:,.0f} rows/s")
+    print(f"  parse_for_storage(full=False): {single * 1000:.3f} ms/batch "
+          f"{legacy_rows / single:,.0f} rows/s")
+    print(f"  parse_for_storage(full=True) : {full * 1000:.3f} ms/batch "
+          f"{rows / full:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
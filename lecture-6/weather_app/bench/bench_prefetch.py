@@ -0,0 +1,49 @@
+"""全地域の予報先読みを逐次実行と並行実行で比較するベンチマーク
+
+ローカルのスタブサーバ（jma_stub.py）を使うためネットワークには接続しない。
+
+使い方:
+    python bench/bench_prefetch.py [--delay 0.05] [--workers 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from jma_stub import JmaStubServer, default_area_codes  # noqa: E402
+from prefetch import ForecastPrefetcher  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.05, help="スタブの応答遅延（秒）")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0, help="1 秒あたりの最大リクエスト数")
+    args = parser.parse_args()
+
+    area_codes = default_area_codes()
+
+    with JmaStubServer(delay=args.delay) as server, tempfile.TemporaryDirectory() as tmp:
+        for name, workers in (("sequential", 1), ("concurrent", args.workers)):
+            db = WeatherDatabase(os.path.join(tmp, f"{name}.db"))
+            prefetcher = ForecastPrefetcher(
+                db, area_codes,
+                max_workers=workers,
+                rate_limit=args.rate,
+                base_url=server.base_url,
+            )
+            stats = prefetcher.run()
+            print(f"{name:>10} workers={workers}: {stats['elapsed']:.3f}s "
+                  f"saved={stats['saved']} failed={stats['failed']}")
+
+            # 2 回目は全地域がデータベースから提供される
+            stats = prefetcher.run()
+            print(f"{'':>10} rerun: {stats['elapsed']:.3f}s skipped={stats['skipped']}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""予報読み取りキャッシュのベンチマーク
+
+履歴のプルダウンで 2 つの予報を行き来する操作（get_forecast_history +
+get_forecast_by_id）を、キャッシュなし / ありで比較し、キャッシュの統計を表示する。
+
+使い方:
+    python bench/bench_read_cache.py [--flips 5000] [--cache-size 256]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODE = "130000"
+
+
+def sample_weather_list(offset):
+    """ベンチマーク用の 7 日分の予報データ（offset ごとに内容が変わる）"""
+    return [
+        {
+            "date": f"2026-01-{day:02d}",
+            "weather": "晴れ　時々　くもり",
+            "weather_code": 101,
+            "temp_min": offset,
+            "temp_max": offset + 10,
+        }
+        for day in range(13, 20)
+    ]
+
+
+def flip(db, forecast_ids, flips):
+    """2 つの予報を交互に表示する操作を繰り返して経過時間を返す"""
+    start = time.perf_counter()
+    for i in range(flips):
+        db.get_forecast_by_id(forecast_ids[i % 2])
+        db.get_forecast_history(AREA_CODE)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flips", type=int, default=5000)
+    parser.add_argument("--cache-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed_db = WeatherDatabase(db_path, cache_size=0)
+        forecast_ids = [
+            seed_db.save_forecast(AREA_CODE, "気象庁", sample_weather_list(offset))
+            for offset in range(2)
+        ]
+        seed_db.close()
+
+        print(f"{args.flips} 回の切り替え:")
+        for name, cache_size in (("no cache", 0), ("cache", args.cache_size)):
+            db = WeatherDatabase(db_path, cache_size=cache_size)
+            elapsed = flip(db, forecast_ids, args.flips)
+            print(f"  {name:<9}: {elapsed * 1000:8.1f} ms"
+                  f"（1 回あたり {elapsed / args.flips * 1e6:.1f} µs）")
+            if cache_size:
+                print(f"  統計: {db.cache.stats()}")
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
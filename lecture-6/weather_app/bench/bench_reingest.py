@@ -0,0 +1,71 @@
+"""生の予報 JSON のアーカイブと再解析のベンチマーク
+
+全地域 × --days 日分の予報 JSON（スタブと同じ形式）を本文のまま保存し、
+1. アーカイブの件数と圧縮率
+2. reingest（1 プロセス / 複数プロセス）で予報詳細を作り直す時間
+3. 作り直した後の内容ハッシュが元と一致すること（一致しなければ終了コード 1）
+を表示する。
+
+使い方:
+    python bench/bench_reingest.py [--days 60] [--workers 4]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_codes import VALID_AREA_CODES  # noqa: E402
+from database import WeatherDatabase  # noqa: E402
+from jma_stub import canned_forecast  # noqa: E402
+from prefetch import store_forecast  # noqa: E402
+from reingest import reingest  # noqa: E402
+
+
+def content_hashes(db):
+    with db.pool.connection() as conn:
+        return dict(conn.execute("SELECT forecast_id, content_hash FROM forecasts"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), cache_size=0)
+        start_day = date(2026, 1, 1)
+        for day in range(args.days):
+            for area_code in sorted(VALID_AREA_CODES):
+                body = json.dumps(
+                    canned_forecast(area_code, start_day + timedelta(days=day)),
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                store_forecast(db, area_code, body)
+
+        for codec, stats in db.get_archive_stats().items():
+            ratio = stats["stored_bytes"] / stats["raw_bytes"]
+            print(f"アーカイブ（{codec}）: {stats['payloads']}件 "
+                  f"{stats['raw_bytes']:,} → {stats['stored_bytes']:,} バイト（{ratio:.1%}）")
+
+        expected = content_hashes(db)
+        for workers in sorted({1, args.workers}):
+            result = reingest(db, workers=workers, parallel_threshold=0)
+            print(f"  reingest {result['workers']} プロセス: {result['elapsed']:.2f} 秒"
+                  f"（{result['rebuilt']}件、{result['rebuilt'] / result['elapsed']:,.0f} 件/秒）")
+
+        mismatched = sum(1 for forecast_id, value in content_hashes(db).items()
+                         if expected.get(forecast_id) != value)
+        print(f"内容ハッシュの不一致: {mismatched}件")
+        db.close()
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
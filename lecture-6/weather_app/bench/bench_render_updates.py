@@ -0,0 +1,97 @@
+"""予報表示の更新ごとに送信されるコントロール数のベンチマーク
+
+rebuild : 表示のたびに予報部分のコントロールをすべて作り直す（従来の display_weather）
+keyed   : 日付ごとのカードと表示部分を使い回し、変わった値だけを更新する
+
+HeadlessPage で Flet と同じ差分計算を行い、追加されたコントロール数（added）と
+属性を更新したコントロール数（changed）を数える。
+
+使い方:
+    python bench/bench_render_updates.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from headless_page import HeadlessPage  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from weather_app import WeatherApp  # noqa: E402
+
+
+WEATHERS = ["晴れ", "くもり", "雨", "晴れ　時々　くもり", "くもり　一時　雨", "雪", "晴れ"]
+
+
+def weather_list(shift=0, changed_day=None):
+    """7 日分の予報（shift で天気をずらし、changed_day の日だけ気温を変える）"""
+    return [
+        {
+            "date": f"2026-01-{day + 13:02d}",
+            "weather": WEATHERS[(day + shift) % len(WEATHERS)],
+            "weather_code": 100,
+            "temp_min": day + (5 if day == changed_day else 0),
+            "temp_max": day + 10,
+        }
+        for day in range(7)
+    ]
+
+
+def scenario(db):
+    """(名前, 地域コード, forecast_id, keep_history) の並び"""
+    tokyo = db.save_forecast("130000", "気象庁", weather_list())
+    osaka_old = db.save_forecast("270000", "大阪管区気象台", weather_list(shift=2))
+    osaka = db.save_forecast("270000", "大阪管区気象台", weather_list(shift=2, changed_day=3))
+    return [
+        ("初回表示（東京）", "130000", tokyo, False),
+        ("地域の切り替え（大阪）", "270000", osaka, False),
+        ("過去の予報（1 日分だけ違う）", "270000", osaka_old, True),
+        ("最新の予報に戻す", "270000", osaka, True),
+        ("同じ予報の再表示", "270000", osaka, True),
+    ]
+
+
+def run(db, steps, rebuild):
+    page = HeadlessPage()
+    app = WeatherApp(db=db, client=JmaClient(None))
+    page.add(app)
+
+    results = []
+    for name, area_code, forecast_id, keep_history in steps:
+        if rebuild:
+            app.forecast_view = None
+            app.cards_by_date = {}
+            app.history_options = {}
+
+        forecast = db.get_forecast_by_id(forecast_id)
+        app.selected_area_code = area_code
+        app.current_forecast_id = forecast_id
+
+        start = time.perf_counter()
+        app.display_weather(
+            forecast["publishing_office"], forecast["weather_list"], forecast["fetched_at"],
+            keep_history=keep_history
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        results.append((name, page.last_update, elapsed))
+    return results
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"))
+        steps = scenario(db)
+
+        results = {mode: run(db, steps, mode == "rebuild") for mode in ("rebuild", "keyed")}
+
+        print(f"{'':<30} {'rebuild (added/changed)':>24} {'keyed (added/changed)':>24}")
+        for (name, full, full_ms), (_, keyed, keyed_ms) in zip(*results.values()):
+            print(f"{name:<30} {full['added']:>6} / {full['changed']:<4} {full_ms:6.2f} ms"
+                  f"   {keyed['added']:>6} / {keyed['changed']:<4} {keyed_ms:6.2f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""保持期間による間引き・集約のベンチマーク
+
+1 時間ごとに 1 年分の予報を持つ合成データベースに apply_retention を実行し、
+削除件数、データベースサイズ、読み取り時間の変化と、最長の書き込みトランザクションを表示する。
+
+使い方:
+    python bench/bench_retention.py [--areas 10] [--days 365] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+from maintenance import measure_read_latency  # noqa: E402
+
+
+def build(db, areas, days, now):
+    """1 時間ごとの予報（7 日分の詳細付き）を一括で投入"""
+    start = now - timedelta(days=days)
+    with db.pool.connection() as conn, conn:
+        forecast_id = 0
+        for hour in range(days * 24):
+            fetched_at = start + timedelta(hours=hour)
+            for area in range(areas):
+                forecast_id += 1
+                conn.execute("""
+                    INSERT INTO forecasts
+                    (forecast_id, area_code, publishing_office, report_datetime, fetched_at)
+                    VALUES (?, ?, '合成気象台', ?, ?)
+                """, (forecast_id, f"{area + 1:02d}0000",
+                      fetched_at.isoformat(), fetched_at.isoformat()))
+                conn.executemany("""
+                    INSERT INTO forecast_details
+                    (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+                    VALUES (?, ?, '晴れ', 100, ?, ?)
+                """, [
+                    (forecast_id, (fetched_at + timedelta(days=day)).date().isoformat(),
+                     hour % 7, hour % 7 + 10)
+                    for day in range(7)
+                ])
+    return forecast_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--areas", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"), pool_size=1, cache_size=0)
+        total = build(db, args.areas, args.days, now)
+        print(f"合成データ: 予報 {total:,}件 / 詳細 {total * 7:,}件")
+
+        latency_before = measure_read_latency(db)
+        start = time.perf_counter()
+        result = db.apply_retention(batch_size=args.batch_size, now=now)
+        elapsed = time.perf_counter() - start
+        latency_after = measure_read_latency(db)
+
+        with db.pool.connection() as conn:
+            remaining = conn.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+            summaries = conn.execute(
+                "SELECT COUNT(*) FROM forecast_daily_summaries"
+            ).fetchone()[0]
+
+        batches = -(-(result["downsampled_forecasts"] + result["aggregated_forecasts"])
+                    // args.batch_size)
+        print(f"  間引き {result['downsampled_forecasts']:,}件 / 集約 "
+              f"{result['aggregated_forecasts']:,}件 / 残り {remaining:,}件 "
+              f"/ 日別サマリ {summaries:,}行")
+        print(f"  所要時間 {elapsed:.2f}s（{batches} バッチ、1 バッチ平均 "
+              f"{elapsed / max(batches, 1) * 1000:.1f} ms、VACUUM: {result['vacuum']}）")
+        print(f"  サイズ {result['size_before']:,} → {result['size_after']:,} バイト"
+              f"（予報 JSON の本文 {result['removed_payloads']:,}件を削除）")
+        print(f"  読み取り時間（1 地域あたり） {latency_before:.3f} → {latency_after:.3f} ms")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
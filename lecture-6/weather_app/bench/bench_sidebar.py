@@ -0,0 +1,125 @@
+"""サイドバーの構築と地域検索のベンチマーク
+
+eager : 起動時にすべての地方・官署の項目を作成する（従来の build_sidebar_tiles）
+lazy  : 地方の項目だけを作成し、官署の項目は地方を開いたときに作成する
+search: 1 文字入力するごとの絞り込み（全件の部分一致 / 前方一致索引）
+
+HeadlessPage で Flet と同じ差分計算を行い、送信されるコントロール数も数える。
+一次細分区域などを対象に加えた場合を想定し、官署数を増やした合成データでも測る。
+
+使い方:
+    python bench/bench_sidebar.py [--sizes 58,500,3000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_search import AREA_READINGS, AreaSearchIndex, normalize  # noqa: E402
+from headless_page import HeadlessPage  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from weather_app import WeatherApp  # noqa: E402
+
+
+NAMES = {
+    "130000": "東京都", "140000": "神奈川県", "260000": "京都府", "270000": "大阪府",
+    "012000": "上川・留萌地方", "400000": "福岡県", "471000": "沖縄本島地方", "040000": "宮城県",
+}
+
+QUERIES = ["とうきょう", "かな", "京都", "るもい", "ふくおか", "4000"]
+
+
+def synthetic_area_data(size, centers=11):
+    """官署 size 件の area_data と読みの表（実在の官署名に番号を付けて増やす）"""
+    base = sorted(NAMES)
+    area_data = {}
+    readings = {}
+    for i in range(size):
+        source = base[i % len(base)]
+        code = f"{source[:2]}{i:04d}"
+        center_code = f"{i % centers + 1:02d}0100"
+        center = area_data.setdefault(center_code, {"name": f"地方{i % centers + 1}", "offices": []})
+        center["offices"].append({"code": code, "name": f"{NAMES[source]}{i // len(base) + 1}"})
+        readings[code] = AREA_READINGS[source] + str(i // len(base) + 1)
+    return area_data, readings
+
+
+class EagerWeatherApp(WeatherApp):
+    """官署の項目を起動時にすべて作成する従来の実装"""
+
+    def build_sidebar_tiles(self, area_data):
+        tiles = super().build_sidebar_tiles(area_data)
+        for tile, center in zip(tiles, area_data.values()):
+            tile.controls = [self.build_office_tile(office) for office in center["offices"]]
+        return tiles
+
+
+def render(app_class, area_data):
+    """サイドバーの描画時間（ミリ秒）と送信されるコントロール数"""
+    page = HeadlessPage()
+    app = app_class(db=object(), client=JmaClient(None))
+    page.add(app)
+    start = time.perf_counter()
+    app.render_sidebar(area_data)
+    elapsed = (time.perf_counter() - start) * 1000
+    return app, page, elapsed
+
+
+def linear_search(offices, readings, query):
+    query = normalize(query)
+    return [
+        office for office in offices
+        if query in normalize(office["name"]) or query in readings.get(office["code"], "")
+        or query in office["code"]
+    ]
+
+
+def per_keystroke(search, queries):
+    """クエリを 1 文字ずつ入力したときの 1 回あたりの時間（マイクロ秒）"""
+    prefixes = [query[:n] for query in queries for n in range(1, len(query) + 1)]
+    start = time.perf_counter()
+    for _ in range(20):
+        for prefix in prefixes:
+            search(prefix)
+    return (time.perf_counter() - start) / (20 * len(prefixes)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="58,500,3000", help="官署数（カンマ区切り）")
+    args = parser.parse_args()
+
+    for size in [int(value) for value in args.sizes.split(",")]:
+        area_data, readings = synthetic_area_data(size)
+        offices = [office for center in area_data.values() for office in center["offices"]]
+        print(f"官署 {size} 件（{len(area_data)} 地方）")
+
+        for name, app_class in (("eager", EagerWeatherApp), ("lazy", WeatherApp)):
+            app, page, elapsed = render(app_class, area_data)
+            print(f"  {name:>5} 描画        : {elapsed:8.1f} ms  added {page.last_update['added']:>6}")
+
+        tile = app.center_tiles[0]
+        start = time.perf_counter()
+        app.on_center_expanded(tile, next(iter(area_data.values()))["offices"], True)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"   lazy 地方を開く    : {elapsed:8.1f} ms  added {page.last_update['added']:>6}")
+
+        start = time.perf_counter()
+        index = AreaSearchIndex(area_data, readings)
+        build = (time.perf_counter() - start) * 1000
+        linear = per_keystroke(lambda query: linear_search(offices, readings, query), QUERIES)
+        indexed = per_keystroke(index.search, QUERIES)
+        print(f"  search 索引の作成   : {build:8.1f} ms")
+        print(f"  search linear       : {linear:8.1f} µs/入力")
+        print(f"  search prefix index : {indexed:8.1f} µs/入力")
+
+        app.area_index = index
+        app.on_search_changed("と")
+        print(f"  search 結果の表示   : added {page.last_update['added']:>6}"
+              f"（一致 {len(app.search_results)} 件、先頭 {app.SIDEBAR_PAGE_SIZE} 件を表示）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""起動からサイドバーが操作可能になるまでの時間を測るベンチマーク
+
+cold   : area.json をネットワーク（スタブ）から取得してサイドバーを構築
+cached : データベースに保存済みの地域データからサイドバーを構築
+
+使い方:
+    python bench/bench_startup.py [--delay 0.3] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from areas import parse_area_json  # noqa: E402
+from database import WeatherDatabase  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from jma_stub import JmaStubServer  # noqa: E402
+from weather_app import WeatherApp  # noqa: E402
+
+
+def cold_start(app):
+    content = app.client.fetch_area_json()
+    area_data, area_rows = parse_area_json(json.loads(content), app.VALID_AREA_CODES)
+    app.build_sidebar_tiles(area_data)
+    return area_rows
+
+
+def cached_start(app):
+    app.build_sidebar_tiles(app.db.get_area_data())
+
+
+def measure(func, app, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(app)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.3, help="スタブの応答遅延（秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with JmaStubServer(delay=args.delay) as server, tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "bench.db"))
+        # 毎回フルダウンロードになるよう検証子は保存しない
+        app = WeatherApp(db=db, client=JmaClient(None, base_url=server.base_url))
+
+        area_rows = cold_start(app)
+        db.save_areas(area_rows)
+
+        for name, func in (("cold", cold_start), ("cached", cached_start)):
+            median, worst = measure(func, app, args.repeat)
+            print(f"{name:>7}: median {median:.1f} ms  max {worst:.1f} ms")
+
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""予報の取得からデータベース・表示までを通しで測るベンチマーク集
+
+ローカルのスタブ（--fixtures を指定した場合は記録した応答のリプレイ）に対して
+次のシナリオを実行し、p50 / p95 / 最大の時間（ミリ秒）を表示する。ネットワークは使わない。
+
+cold_start    : 空のデータベースで起動し、area.json の取得からサイドバー表示まで
+warm_click    : 保存済みの地域を選択してから予報の初回表示まで
+refetch       : 1 地域分の再取得（304 による再検証・解析・保存）
+history_browse: 履歴プルダウンから過去の予報を選択して表示するまで
+full_prefetch : 空のデータベースに全地域の予報を先読み
+
+使い方:
+    python bench/bench_suite.py [--fixtures bench/fixtures/jma] [--delay 0.0]
+                                [--repeat 20] [--prefetch-repeat 3] [--output results.json]
+                                [--scenarios warm_click,refetch] [--verbose]
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_codes import VALID_AREA_CODES  # noqa: E402
+from database import WeatherDatabase  # noqa: E402
+from headless_page import HeadlessPage  # noqa: E402
+from jma_client import JmaClient  # noqa: E402
+from jma_stub import JmaStubServer, fixture_area_codes, load_fixtures  # noqa: E402
+from prefetch import ForecastPrefetcher, store_forecast  # noqa: E402
+from weather_app import WeatherApp  # noqa: E402
+
+
+HISTORY_SNAPSHOTS = 30
+
+
+def percentile(samples, q):
+    """最近順位法によるパーセンタイル"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def wait_until(predicate, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise TimeoutError("完了しませんでした")
+        time.sleep(0.0005)
+
+
+def timed(func):
+    """func() の実行時間（ミリ秒）"""
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+class Suite:
+    def __init__(self, base_url, area_codes, tmp, repeat, prefetch_repeat):
+        self.base_url = base_url
+        self.area_codes = sorted(area_codes)
+        self.tmp = tmp
+        self.repeat = repeat
+        self.prefetch_repeat = prefetch_repeat
+        self._databases = 0
+
+        # warm_click / refetch / history_browse で共有する、全地域を保存済みのデータベース
+        self.db = self.new_db()
+        self.client = JmaClient(self.db, base_url=base_url)
+        ForecastPrefetcher(self.db, self.area_codes, client=self.client, rate_limit=0).run()
+
+    def new_db(self):
+        self._databases += 1
+        return WeatherDatabase(os.path.join(self.tmp, f"suite{self._databases}.db"))
+
+    def new_app(self, db, client=None):
+        app = WeatherApp(db=db, client=client or JmaClient(None, base_url=self.base_url),
+                         reader_only=True)
+        HeadlessPage().add(app)
+        return app
+
+    def cold_start(self):
+        samples = []
+        for _ in range(self.repeat):
+            db = self.new_db()
+            client = JmaClient(db, base_url=self.base_url)
+            app = self.new_app(db, client)
+            # 読むだけのモードのため、取得した地域情報は保存されない
+            samples.append(timed(app.load_area_data))
+            client.close()
+            db.close()
+        return samples
+
+    def warm_click(self):
+        app = self.new_app(self.db)
+        samples = []
+        for i in range(self.repeat):
+            count = len(app.first_paint_ms)
+            app.on_area_clicked(self.area_codes[i % len(self.area_codes)])
+            wait_until(lambda: len(app.first_paint_ms) > count)
+            samples.append(app.first_paint_ms[-1])
+        return samples
+
+    def refetch(self):
+        # 初回の取得で検証子（ETag / Last-Modified）を保存済みのため、以降は 304 になる
+        samples = []
+        for i in range(self.repeat):
+            area_code = self.area_codes[i % len(self.area_codes)]
+            samples.append(timed(lambda: store_forecast(
+                self.db, area_code, self.client.fetch_forecast_raw(area_code)
+            )))
+        return samples
+
+    def history_browse(self):
+        area_code = self.area_codes[0]
+        latest = self.db.get_latest_forecast(area_code)
+        for n in range(HISTORY_SNAPSHOTS):
+            weather_list = [dict(item, temp_min=n) for item in latest["weather_list"]]
+            self.db.save_forecast(area_code, latest["publishing_office"], weather_list)
+
+        app = self.new_app(self.db)
+        app.on_area_clicked(area_code)
+        wait_until(lambda: app.history_rows)
+        forecast_ids = [row[0] for row in app.history_rows]
+
+        samples = []
+        for i in range(self.repeat):
+            event = SimpleNamespace(control=SimpleNamespace(
+                value=str(forecast_ids[i % len(forecast_ids)])
+            ))
+            samples.append(timed(lambda: app.on_history_selected(event)))
+        return samples
+
+    def full_prefetch(self):
+        samples = []
+        for _ in range(self.prefetch_repeat):
+            db = self.new_db()
+            client = JmaClient(db, base_url=self.base_url)
+            prefetcher = ForecastPrefetcher(db, self.area_codes, client=client, rate_limit=0)
+            samples.append(timed(prefetcher.run))
+            client.close()
+            db.close()
+        return samples
+
+    def close(self):
+        self.client.close()
+        self.db.close()
+
+
+SCENARIOS = ("cold_start", "warm_click", "refetch", "history_browse", "full_prefetch")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="record_fixtures.py で記録したディレクトリ（省略時は固定の応答）")
+    parser.add_argument("--delay", type=float, default=0.0, help="スタブの応答遅延（秒）")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--prefetch-repeat", type=int, default=3,
+                        help="full_prefetch の繰り返し回数")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="実行するシナリオ")
+    parser.add_argument("--output", help="結果を JSON で保存するファイル")
+    parser.add_argument("--verbose", action="store_true", help="アプリのログを表示する")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+        area_codes = fixture_area_codes(args.fixtures)
+    else:
+        fixtures = None
+        area_codes = VALID_AREA_CODES
+
+    results = {}
+    with JmaStubServer(delay=args.delay, fixtures=fixtures) as server, \
+            tempfile.TemporaryDirectory() as tmp:
+        log = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+            suite = Suite(server.base_url, area_codes, tmp, args.repeat, args.prefetch_repeat)
+        try:
+            print(f"{'scenario':<15} {'n':>4} {'p50':>9} {'p95':>9} {'max':>9}  (ms)")
+            for name in args.scenarios.split(","):
+                with contextlib.redirect_stdout(sys.stdout if args.verbose else log):
+                    samples = getattr(suite, name)()
+                results[name] = {
+                    "n": len(samples),
+                    "p50": statistics.median(samples),
+                    "p95": percentile(samples, 95),
+                    "max": max(samples),
+                }
+                row = results[name]
+                print(f"{name:<15} {row['n']:>4} {row['p50']:>9.2f} {row['p95']:>9.2f} "
+                      f"{row['max']:>9.2f}")
+        finally:
+            with contextlib.redirect_stdout(log):
+                suite.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"fixtures": args.fixtures, "delay": args.delay, "results": results},
+                      f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
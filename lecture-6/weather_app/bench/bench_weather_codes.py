@@ -0,0 +1,82 @@
+"""予報カード 1 枚あたりの描画コストのベンチマーク
+
+icon : アイコンの決定（旧実装の天気文の部分一致 / 天気コードの表）
+label: 天気コードから略称（予報 JSON の解析で使う）
+card : WeatherCard の作成と、別の日の予報による set_item
+
+使い方:
+    python bench/bench_weather_codes.py [--repeat 20000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from weather_card import WeatherCard, weather_icon  # noqa: E402
+from weather_codes import WEATHER_CODES, weather_label  # noqa: E402
+
+
+def legacy_icon_key(weather):
+    """旧実装（display_weather 内の部分一致）"""
+    if "雨" in weather:
+        return "rain"
+    if "雪" in weather or "ふぶく" in weather:
+        return "snow"
+    if "晴" in weather:
+        return "sunny"
+    if "曇" in weather or "くもり" in weather:
+        return "cloudy"
+    return "cloudy"
+
+
+def sample_items():
+    """全天気コード分の 1 日分の予報（天気文は気象庁の表記に近い形）"""
+    return [
+        {
+            "date": f"2026-01-{i % 28 + 1:02d}",
+            "weather": info.label.replace("晴", "晴れ　").replace("曇", "くもり　"),
+            "weather_code": code,
+            "temp_min": i % 10,
+            "temp_max": i % 10 + 10,
+        }
+        for i, (code, info) in enumerate(WEATHER_CODES.items())
+    ]
+
+
+def per_item(func, items, repeat):
+    """1 件あたりの処理時間（マイクロ秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat // len(items) + 1):
+        for item in items:
+            func(item)
+    count = (repeat // len(items) + 1) * len(items)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    items = sample_items()
+    print(f"天気コード {len(WEATHER_CODES)} 種類")
+
+    legacy = per_item(lambda item: legacy_icon_key(item["weather"]), items, args.repeat * 10)
+    table = per_item(weather_icon, items, args.repeat * 10)
+    print(f"  icon  legacy (substring) : {legacy:.3f} µs/card")
+    print(f"  icon  table              : {table:.3f} µs/card")
+
+    label = per_item(lambda item: weather_label(item["weather_code"]), items, args.repeat * 10)
+    print(f"  label table              : {label:.3f} µs/card")
+
+    create = per_item(WeatherCard, items, args.repeat)
+    card = WeatherCard(items[0])
+    update = per_item(card.set_item, items, args.repeat)
+    print(f"  card  WeatherCard(item)  : {create:.1f} µs/card")
+    print(f"  card  set_item(item)     : {update:.1f} µs/card")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""保守コマンドの後の予報の変化の集計の確認
+
+1 地域に次の予報を保存し、apply_retention → compact_duplicate_forecasts の順に実行する。
+- 保持期間を過ぎて削除される古い予報（対象日 2025-09-01、5 回取得して 4 回改訂）
+- 保持期間内の予報（直前と内容が同じ重複を含む）
+古い対象日の集計が保持期間の削除と重複の削除の後も変わらないこと、
+保持期間内の対象日の集計・改訂が残った予報から作り直した結果と一致し、
+削除した予報を指していないことを確かめる。問題があれば終了コード 1。
+
+使い方:
+    python bench/check_maintenance.py
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODE = "130000"
+NOW = datetime(2026, 10, 22, 12, 0)
+OLD_DATE = "2025-09-01"
+
+# (取得日時, {対象日: (天気コード, 最低気温, 最高気温)})
+FORECASTS = [
+    ("2025-08-27T05:00:00", {OLD_DATE: (100, 20, 30)}),
+    ("2025-08-28T05:00:00", {OLD_DATE: (101, 20, 30)}),
+    ("2025-08-29T05:00:00", {OLD_DATE: (101, 21, 30)}),
+    ("2025-08-30T05:00:00", {OLD_DATE: (101, 21, 31)}),
+    ("2025-08-31T05:00:00", {OLD_DATE: (200, 21, 31)}),
+    ("2026-10-20T05:00:00", {"2026-10-20": (100, 10, 20), "2026-10-21": (200, 11, 19)}),
+    ("2026-10-20T11:00:00", {"2026-10-20": (100, 10, 20), "2026-10-21": (200, 11, 19)}),
+    ("2026-10-20T17:00:00", {"2026-10-20": (101, 10, 21), "2026-10-21": (200, 11, 19)}),
+    ("2026-10-21T05:00:00", {"2026-10-20": (101, 10, 21), "2026-10-21": (200, 11, 19)}),
+    ("2026-10-21T11:00:00", {"2026-10-20": (101, 10, 21), "2026-10-21": (200, 11, 19)}),
+]
+
+
+def build(db):
+    """予報を直接挿入し、集計テーブルを作成"""
+    with db.pool.connection() as conn, conn:
+        for forecast_id, (fetched_at, days) in enumerate(FORECASTS, start=1):
+            conn.execute("""
+                INSERT INTO forecasts
+                (forecast_id, area_code, publishing_office, report_datetime, fetched_at)
+                VALUES (?, ?, '合成気象台', ?, ?)
+            """, (forecast_id, AREA_CODE, fetched_at, fetched_at))
+            conn.executemany("""
+                INSERT INTO forecast_details
+                (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+                VALUES (?, ?, '', ?, ?, ?)
+            """, ((forecast_id, date) + values for date, values in days.items()))
+    db.rebuild_forecast_date_stats()
+
+
+def read_stats(db):
+    with db.pool.connection() as conn:
+        stats = {row[1]: row for row in conn.execute(
+            "SELECT * FROM forecast_date_stats WHERE area_code = ?", (AREA_CODE,)
+        )}
+        revisions = conn.execute("""
+            SELECT * FROM forecast_revisions WHERE area_code = ?
+            ORDER BY forecast_date, fetched_at, forecast_id
+        """, (AREA_CODE,)).fetchall()
+        forecast_ids = {row[0] for row in conn.execute("SELECT forecast_id FROM forecasts")}
+    return stats, revisions, forecast_ids
+
+
+def main():
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "check.db"), cache_size=0)
+        build(db)
+        before, _, _ = read_stats(db)
+        if before[OLD_DATE][16:18] != (5, 4):
+            problems.append(f"作成直後の {OLD_DATE} の集計が想定と異なります: {before[OLD_DATE]}")
+
+        retention = db.apply_retention(now=NOW)
+        compaction = db.compact_duplicate_forecasts()
+        print(f"保持期間で削除: {retention['aggregated_forecasts']}件、"
+              f"重複の削除: {compaction['removed_forecasts']}件")
+        if retention["aggregated_forecasts"] != 5 or compaction["removed_forecasts"] != 3:
+            problems.append("削除された予報の件数が想定と異なります")
+
+        stats, revisions, forecast_ids = read_stats(db)
+        if stats.get(OLD_DATE) != before[OLD_DATE]:
+            problems.append(f"{OLD_DATE} の集計が変わりました: "
+                            f"{before[OLD_DATE]} → {stats.get(OLD_DATE)}")
+
+        recent = {date: row for date, row in stats.items() if date != OLD_DATE}
+        recent_revisions = [row for row in revisions if row[1] != OLD_DATE]
+        for date, row in recent.items():
+            if row[2] not in forecast_ids or row[3] not in forecast_ids:
+                problems.append(f"{date} の集計が削除した予報を指しています: {row}")
+        for row in recent_revisions:
+            if row[3] not in forecast_ids:
+                problems.append(f"改訂が削除した予報を指しています: {row}")
+
+        # 保持期間内の対象日は、残った予報から作り直した集計と一致するはず
+        db.rebuild_forecast_date_stats(AREA_CODE)
+        rebuilt, rebuilt_revisions, _ = read_stats(db)
+        if recent != rebuilt:
+            problems.append(f"集計が作り直した結果と一致しません: {recent} / {rebuilt}")
+        if recent_revisions != rebuilt_revisions:
+            problems.append(f"改訂が作り直した結果と一致しません: "
+                            f"{recent_revisions} / {rebuilt_revisions}")
+        db.close()
+
+    if problems:
+        for problem in problems:
+            print(f"NG: {problem}")
+        sys.exit(1)
+    print("OK: 保持期間の削除と重複の削除の後も集計は正しく残っています")
+
+
+if __name__ == "__main__":
+    main()
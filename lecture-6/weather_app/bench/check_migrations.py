@@ -0,0 +1,109 @@
+"""v2 の移行（気温・天気コードの数値化）の確認
+
+v1 までのスキーマ（気温・天気コードが TEXT）のデータベースに、数値・空文字・
+'--' や '不明' のような数値として読めない値を入れてから最新のスキーマへ移行する。
+読めない値が 0 ではなく NULL になり、数値は数値型に変換され、
+user_version が最新になることを確かめる。問題があれば終了コード 1。
+
+使い方:
+    python bench/check_migrations.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from database import WeatherDatabase  # noqa: E402
+
+
+AREA_CODE = "130000"
+
+# (対象日, TEXT のまま保存されていた値, 移行後に期待する値)
+# 値はそれぞれ forecast_details の weather_code / temp_min / temp_max に入れる
+CASES = [
+    ("2025-09-01", ("100", "12", "25"), (100, 12, 25)),
+    ("2025-09-02", (" 201 ", "-3", " 7 "), (201, -3, 7)),
+    ("2025-09-03", ("", " ", None), (None, None, None)),
+    ("2025-09-04", ("--", "不明", "--"), (None, None, None)),
+    ("2025-09-05", ("300", "0", "3.5"), (300, 0, 3.5)),
+]
+
+# (細分区域, 天気コード, 移行後に期待する値)
+AREA_CASES = [
+    ("130010", "100", 100),
+    ("130020", "--", None),
+    ("130030", "不明", None),
+    ("130040", "", None),
+]
+
+
+class V1Database(WeatherDatabase):
+    """v1 の移行までで止めたデータベース"""
+
+    MIGRATIONS = WeatherDatabase.MIGRATIONS[:1]
+
+
+def build(path):
+    db = V1Database(path, cache_size=0)
+    with db.pool.connection() as conn, conn:
+        conn.execute("""
+            INSERT INTO forecasts
+            (forecast_id, area_code, publishing_office, report_datetime, fetched_at)
+            VALUES (1, ?, '合成気象台', '2025-08-31T05:00:00', '2025-08-31T05:00:00')
+        """, (AREA_CODE,))
+        conn.executemany("""
+            INSERT INTO forecast_details
+            (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+            VALUES (1, ?, '', ?, ?, ?)
+        """, [(date,) + values for date, values, _ in CASES])
+        conn.executemany("""
+            INSERT INTO forecast_area_details
+            (forecast_id, area_code, area_name, forecast_date, weather_code)
+            VALUES (1, ?, '', '2025-09-01', ?)
+        """, [(area_code, value) for area_code, value, _ in AREA_CASES])
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    db.close()
+    return version
+
+
+def main():
+    problems = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "check.db")
+        if build(path) != 1:
+            problems.append("移行前のデータベースが v1 になっていません")
+
+        db = WeatherDatabase(path, cache_size=0)
+        with db.pool.connection() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            details = {row[0]: row[1:] for row in conn.execute("""
+                SELECT forecast_date, weather_code, temp_min, temp_max
+                FROM forecast_details WHERE forecast_id = 1
+            """)}
+            area_details = dict(conn.execute("""
+                SELECT area_code, weather_code FROM forecast_area_details
+                WHERE forecast_id = 1
+            """).fetchall())
+        db.close()
+
+    if version != len(WeatherDatabase.MIGRATIONS):
+        problems.append(f"user_version が v{version} です"
+                        f"（最新は v{len(WeatherDatabase.MIGRATIONS)}）")
+    for date, values, expected in CASES:
+        if details.get(date) != expected:
+            problems.append(f"{date} {values!r} → {details.get(date)!r}（期待値 {expected!r}）")
+    for area_code, value, expected in AREA_CASES:
+        if area_code not in area_details or area_details[area_code] != expected:
+            problems.append(f"細分区域 {area_code} {value!r} → "
+                            f"{area_details.get(area_code)!r}（期待値 {expected!r}）")
+
+    if problems:
+        for problem in problems:
+            print(f"NG: {problem}")
+        sys.exit(1)
+    print("OK: 数値として読めない値は NULL に移行されました")
+
+
+if __name__ == "__main__":
+    main()
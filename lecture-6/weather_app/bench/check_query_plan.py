@@ -0,0 +1,77 @@
+"""予報の取得クエリの実行計画の確認
+
+小さな合成データ（既定で 58 地域 × 各 20 件の予報）を作成し、
+get_latest_forecast / get_forecast_by_id のクエリを EXPLAIN QUERY PLAN で調べる。
+想定したインデックスが使われていない、予報・予報詳細の全件走査がある、
+または一時 B-tree で並べ替えている場合は終了コード 1。
+ベンチマークとは別に、数秒で終わる確認としてクエリを変更したときに実行する。
+
+使い方:
+    python bench/check_query_plan.py [--forecasts 1160]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from bench_latest_query import AREA_CODES, build  # noqa: E402
+from database import WeatherDatabase  # noqa: E402
+
+
+# (名前, クエリの属性名, パラメータ, 実行計画に含まれていなければならないインデックス)
+CHECKS = (
+    ("get_latest_forecast", "LATEST_FORECAST_QUERY", (AREA_CODES[0],), (
+        "idx_forecasts_area_fetched",
+        "sqlite_autoindex_forecast_details_1",
+    )),
+    ("get_forecast_by_id", "FORECAST_BY_ID_QUERY", (1,), (
+        "sqlite_autoindex_forecast_details_1",
+    )),
+)
+
+FULL_SCAN_TABLES = ("f", "d", "forecasts", "forecast_details")
+
+
+def check_plan(conn, query, params, expected_indexes):
+    """(実行計画の各行, 問題点のリスト)"""
+    plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)]
+    text = "\n".join(plan)
+    problems = [f"インデックス {name} が使われていません"
+                for name in expected_indexes if name not in text]
+    problems += [f"全件走査があります: {line}" for line in plan
+                 if line.startswith("SCAN") and line.split()[1] in FULL_SCAN_TABLES]
+    problems += [f"並べ替えに一時 B-tree を使っています: {line}" for line in plan
+                 if "TEMP B-TREE" in line]
+    return plan, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--forecasts", type=int, default=len(AREA_CODES) * 20)
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = WeatherDatabase(os.path.join(tmp, "plan.db"), pool_size=1, cache_size=0)
+        build(db, args.forecasts)
+        with db.pool.connection() as conn:
+            for name, attribute, params, expected_indexes in CHECKS:
+                plan, problems = check_plan(conn, getattr(db, attribute), params,
+                                            expected_indexes)
+                print(f"{name}:")
+                for line in plan:
+                    print(f"  {line}")
+                for problem in problems:
+                    print(f"  NG: {problem}")
+                failed = failed or bool(problems)
+        db.close()
+
+    if failed:
+        sys.exit(1)
+    print("OK: 実行計画は想定どおりです")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""ウィンドウなしで WeatherApp を動かすための代替ページ
+
+Flet のページと同じ手順（Control.build_update_commands による差分計算）で
+更新コマンドを作り、送信する代わりに件数を数える。
+
+使い方:
+    page = HeadlessPage()
+    app = WeatherApp(db=db, client=client)
+    page.add(app)
+    app.on_area_clicked("130000")
+    print(page.last_update)  # {"added": 追加されたコントロール数, "changed": 属性を更新したコントロール数}
+"""
+import itertools
+import threading
+
+
+class HeadlessPage:
+    """update / run_thread だけを持つ Flet ページの代替"""
+
+    def __init__(self):
+        self._index = {"page": self}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.last_update = {"added": 0, "changed": 0}
+        self.totals = {"added": 0, "changed": 0}
+
+    def _assign_ids(self, added_controls):
+        for control in added_controls:
+            uid = f"_{next(self._ids)}"
+            control._Control__uid = uid
+            self._index[uid] = control
+
+    def add(self, *controls):
+        with self._lock:
+            for control in controls:
+                added_controls = []
+                control._build_add_commands(index=self._index, added_controls=added_controls)
+                self._assign_ids(added_controls)
+
+    def update(self, *controls):
+        """差分を計算し、送信されるはずのコントロール数を記録"""
+        with self._lock:
+            commands, added_controls, removed_controls = [], [], []
+            for control in controls:
+                control.build_update_commands(
+                    self._index, commands, added_controls, removed_controls
+                )
+            self._assign_ids(added_controls)
+
+            changed = sum(1 for command in commands if command.name == "set")
+            self.updates += 1
+            self.last_update = {"added": len(added_controls), "changed": changed}
+            self.totals["added"] += len(added_controls)
+            self.totals["changed"] += changed
+
+    def run_thread(self, handler, *args):
+        threading.Thread(target=handler, args=args, daemon=True).start()
@@ -0,0 +1,284 @@
+"""気象庁 API の代わりに固定の JSON を返すローカル HTTP サーバ
+
+fixtures を指定した場合は、record_fixtures.py で記録した応答をそのまま返す（リプレイ）。
+
+使い方:
+    with JmaStubServer(delay=0.05) as server:
+        prefetcher = ForecastPrefetcher(db, codes, base_url=server.base_url)
+
+    with JmaStubServer(fixtures=load_fixtures("bench/fixtures/jma")) as server:
+        ...
+
+単体で起動する場合:
+    python bench/jma_stub.py --port 8765 [--fixtures bench/fixtures/jma]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import timedelta
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_codes import VALID_AREA_CODES  # noqa: E402
+from freshness import latest_publish_time  # noqa: E402
+
+FORECAST_RE = re.compile(r"^/bosai/forecast/data/forecast/(\d{6})\.json$")
+AREA_PATH = "/bosai/common/const/area.json"
+
+# 記録した応答と同じディレクトリに置く記録情報（応答としては返さない）
+MANIFEST_NAME = "manifest.json"
+
+WEATHERS = [
+    ("100", "晴れ"),
+    ("101", "晴れ　時々　くもり"),
+    ("200", "くもり"),
+    ("202", "くもり　一時　雨"),
+    ("300", "雨"),
+    ("400", "雪"),
+]
+
+
+def _time_define(day, hour=0):
+    return f"{day.isoformat()}T{hour:02d}:00:00+09:00"
+
+
+def canned_forecast(area_code, base_day=None):
+    """地域コードから決定的に生成した気象庁形式の予報 JSON"""
+    seed = int(area_code[:2])
+    if base_day is None:
+        published = latest_publish_time()
+        base_day = published.date()
+        report = published.isoformat()
+    else:
+        report = _time_define(base_day, 5)
+    days = [base_day + timedelta(days=i) for i in range(8)]
+
+    def weather(i):
+        return WEATHERS[(seed + i) % len(WEATHERS)]
+
+    sub_areas = [
+        {"name": f"{area_code}地方{n}", "code": f"{area_code[:4]}{n:02d}"}
+        for n in (10, 20)
+    ]
+    short_term = {
+        "publishingOffice": f"{area_code}気象台",
+        "reportDatetime": report,
+        "timeSeries": [
+            {
+                "timeDefines": [_time_define(d, 5) for d in days[:3]],
+                "areas": [
+                    {
+                        "area": sub_area,
+                        "weatherCodes": [weather(i)[0] for i in range(3)],
+                        "weathers": [weather(i)[1] for i in range(3)],
+                    }
+                    for sub_area in sub_areas
+                ],
+            },
+            {
+                "timeDefines": [
+                    _time_define(days[i // 4], (i % 4) * 6) for i in range(2, 10)
+                ],
+                "areas": [
+                    {"area": sub_area, "pops": [str((seed + i) * 10 % 100) for i in range(8)]}
+                    for sub_area in sub_areas
+                ],
+            },
+            {
+                "timeDefines": [
+                    _time_define(days[0], 9), _time_define(days[0], 0),
+                    _time_define(days[1], 0), _time_define(days[1], 9),
+                ],
+                "areas": [
+                    {
+                        "area": {"name": f"{area_code}観測点", "code": f"{seed:02d}000"},
+                        "temps": [str(seed % 10), str(seed % 10 + 8),
+                                  str(seed % 10 - 2), str(seed % 10 + 7)],
+                    }
+                ],
+            },
+        ],
+    }
+    weekly = {
+        "publishingOffice": f"{area_code}気象台",
+        "reportDatetime": _time_define(base_day, 11),
+        "timeSeries": [
+            {
+                "timeDefines": [_time_define(d) for d in days[1:8]],
+                "areas": [
+                    {
+                        "area": sub_areas[0],
+                        "weatherCodes": [weather(i)[0] for i in range(1, 8)],
+                        "pops": [""] + [str((seed + i) * 10 % 100) for i in range(6)],
+                        "reliabilities": ["", "", "A", "B", "B", "C", "C"],
+                    }
+                ],
+            },
+            {
+                "timeDefines": [_time_define(d) for d in days[1:8]],
+                "areas": [
+                    {
+                        "area": {"name": f"{area_code}観測点", "code": f"{seed:02d}000"},
+                        "tempsMin": [""] + [str(seed % 10 - i % 3) for i in range(6)],
+                        "tempsMax": [""] + [str(seed % 10 + 6 + i % 4) for i in range(6)],
+                    }
+                ],
+            },
+        ],
+    }
+    return [short_term, weekly]
+
+
+def canned_area_json(area_codes):
+    """地域コードの一覧から area.json 相当のデータを生成"""
+    centers = {}
+    offices = {}
+    for area_code in sorted(area_codes):
+        center_code = f"0{area_code[0]}0100"
+        center = centers.setdefault(
+            center_code, {"name": f"地方{area_code[0]}", "children": []}
+        )
+        center["children"].append(area_code)
+        offices[area_code] = {"name": f"{area_code}県", "parent": center_code}
+    return {"centers": centers, "offices": offices}
+
+
+def default_area_codes():
+    """アプリが対象とする地域コード"""
+    return VALID_AREA_CODES
+
+
+def load_fixtures(directory):
+    """記録した応答を {URL のパス: 本文} として読み込む
+
+    ファイルは URL のパスと同じ構成で保存されている
+    （例: bosai/forecast/data/forecast/130000.json）。
+    """
+    fixtures = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, directory).replace(os.sep, "/")
+            if relative == MANIFEST_NAME:
+                continue
+            with open(path, "rb") as f:
+                fixtures["/" + relative] = f.read()
+    return fixtures
+
+
+def fixture_area_codes(directory):
+    """記録した予報の地域コード"""
+    with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+        return json.load(f)["area_codes"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.request_count += 1
+        if server.delay:
+            time.sleep(server.delay)
+
+        body = server.lookup(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            server.not_modified_count += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            encoding = "gzip"
+        else:
+            encoding = None
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class JmaStubServer(ThreadingHTTPServer):
+    """別スレッドで動作する気象庁 API のスタブ"""
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, area_codes=None, fixtures=None):
+        """fixtures（load_fixtures の戻り値）を指定すると記録した応答だけを返す"""
+        super().__init__((host, port), _Handler)
+        self.delay = delay
+        self.area_codes = area_codes
+        self.fixtures = fixtures
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.last_modified = formatdate(usegmt=True)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, path):
+        """パスに対応するレスポンス本文（bytes）を返す"""
+        path = path.split("?", 1)[0]
+        if self.fixtures is not None:
+            return self.fixtures.get(path)
+
+        if path == AREA_PATH:
+            return json.dumps(
+                canned_area_json(self.area_codes or default_area_codes()), ensure_ascii=False
+            ).encode("utf-8")
+
+        match = FORECAST_RE.match(path)
+        if match:
+            return json.dumps(canned_forecast(match.group(1)), ensure_ascii=False).encode("utf-8")
+        return None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="気象庁 API スタブサーバ")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--fixtures", help="record_fixtures.py で記録したディレクトリ")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else None
+    server = JmaStubServer(port=args.port, delay=args.delay, fixtures=fixtures)
+    print(f"listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""気象庁 API の応答を記録し、ネットワークなしで再生できるようにするスクリプト
+
+area.json と地域ごとの予報 JSON を URL のパスと同じ構成でファイルに保存する。
+記録したディレクトリは jma_stub.py（--fixtures）と bench_suite.py（--fixtures）で再生できる。
+
+使い方:
+    python bench/record_fixtures.py --out bench/fixtures/jma [--areas 130000,270000] [--rate 2]
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from area_codes import VALID_AREA_CODES  # noqa: E402
+from jma_client import AREA_PATH, FORECAST_PATH, JMA_BASE_URL, JmaClient  # noqa: E402
+from jma_stub import MANIFEST_NAME  # noqa: E402
+from prefetch import RateLimiter  # noqa: E402
+
+
+def write_fixture(directory, path, body):
+    """URL のパスに対応するファイルへ本文を保存"""
+    target = os.path.join(directory, *path.lstrip("/").split("/"))
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, "wb") as f:
+        f.write(body)
+
+
+def record_fixtures(directory, area_codes=VALID_AREA_CODES, base_url=JMA_BASE_URL, rate=2.0):
+    """area.json と各地域の予報 JSON を記録し、記録した地域コードの一覧を返す"""
+    # 条件付きリクエストにならないよう、検証子を保存しないクライアントを使う
+    client = JmaClient(None, base_url=base_url)
+    limiter = RateLimiter(rate)
+    recorded = []
+    try:
+        write_fixture(directory, AREA_PATH, client.fetch_area_json())
+        for area_code in sorted(area_codes):
+            limiter.wait()
+            path = FORECAST_PATH.format(area_code=area_code)
+            try:
+                write_fixture(directory, path, client.fetch(path))
+            except Exception as e:
+                print(f"予報の記録に失敗しました（{area_code}）: {e}")
+                continue
+            recorded.append(area_code)
+    finally:
+        client.close()
+
+    manifest = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "base_url": base_url,
+        "area_codes": recorded,
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return recorded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="記録先のディレクトリ")
+    parser.add_argument("--areas", help="地域コード（カンマ区切り、省略時は全地域）")
+    parser.add_argument("--base-url", default=JMA_BASE_URL, help="気象庁 API のベース URL")
+    parser.add_argument("--rate", type=float, default=2.0, help="1 秒あたりの最大リクエスト数")
+    args = parser.parse_args()
+
+    area_codes = args.areas.split(",") if args.areas else VALID_AREA_CODES
+    recorded = record_fixtures(args.out, area_codes, args.base_url, args.rate)
+    print(f"{len(recorded)} 地域の予報を {args.out} に記録しました")
+
+
+if __name__ == "__main__":
+    main()
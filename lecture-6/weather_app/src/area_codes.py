@@ -0,0 +1,14 @@
+# アプリと取り込みデーモンが対象とする地域（府県予報区）のコード
+VALID_AREA_CODES = {
+    "011000", "012000", "013000", "014030", "014100", "015000", "016000", "017000",
+    "020000", "030000", "040000", "050000", "060000", "070000",
+    "080000", "090000", "100000", "110000", "120000", "130000", "140000", "190000", "200000",
+    "210000", "220000", "230000", "240000",
+    "150000", "160000", "170000", "180000",
+    "250000", "260000", "270000", "280000", "290000", "300000",
+    "310000", "320000", "330000", "340000",
+    "360000", "370000", "380000", "390000",
+    "350000", "400000", "410000", "420000", "430000", "440000",
+    "450000", "460040", "460100",
+    "471000", "472000", "473000", "474000"
+}
@@ -0,0 +1,130 @@
+import unicodedata
+from bisect import bisect_left
+
+
+# 官署（府県予報区）名の読み（「・」で区切った地域名はそれぞれの読みも「・」で区切る）
+# 表にない地域（一次細分区域などを対象に加えた場合）は名前とコードだけで検索する
+AREA_READINGS = {
+    "011000": "そうやちほう",
+    "012000": "かみかわ・るもいちほう",
+    "013000": "あばしり・きたみ・もんべつちほう",
+    "014030": "とかちちほう",
+    "014100": "くしろ・ねむろちほう",
+    "015000": "いぶり・ひだかちほう",
+    "016000": "いしかり・そらち・しりべしちほう",
+    "017000": "おしま・ひやまちほう",
+    "020000": "あおもりけん",
+    "030000": "いわてけん",
+    "040000": "みやぎけん",
+    "050000": "あきたけん",
+    "060000": "やまがたけん",
+    "070000": "ふくしまけん",
+    "080000": "いばらきけん",
+    "090000": "とちぎけん",
+    "100000": "ぐんまけん",
+    "110000": "さいたまけん",
+    "120000": "ちばけん",
+    "130000": "とうきょうと",
+    "140000": "かながわけん",
+    "150000": "にいがたけん",
+    "160000": "とやまけん",
+    "170000": "いしかわけん",
+    "180000": "ふくいけん",
+    "190000": "やまなしけん",
+    "200000": "ながのけん",
+    "210000": "ぎふけん",
+    "220000": "しずおかけん",
+    "230000": "あいちけん",
+    "240000": "みえけん",
+    "250000": "しがけん",
+    "260000": "きょうとふ",
+    "270000": "おおさかふ",
+    "280000": "ひょうごけん",
+    "290000": "ならけん",
+    "300000": "わかやまけん",
+    "310000": "とっとりけん",
+    "320000": "しまねけん",
+    "330000": "おかやまけん",
+    "340000": "ひろしまけん",
+    "350000": "やまぐちけん",
+    "360000": "とくしまけん",
+    "370000": "かがわけん",
+    "380000": "えひめけん",
+    "390000": "こうちけん",
+    "400000": "ふくおかけん",
+    "410000": "さがけん",
+    "420000": "ながさきけん",
+    "430000": "くまもとけん",
+    "440000": "おおいたけん",
+    "450000": "みやざきけん",
+    "460040": "あまみちほう",
+    "460100": "かごしまけん",
+    "471000": "おきなわほんとうちほう",
+    "472000": "だいとうじまちほう",
+    "473000": "みやこじまちほう",
+    "474000": "やえやまちほう",
+}
+
+# カタカナ -> ひらがな（「ァ」〜「ヶ」）
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(ord("ァ"), ord("ヶ") + 1)}
+
+
+def normalize(text):
+    """検索用の正規化（全角英数字・半角カナの統一、カタカナをひらがなに、英字は小文字、空白除去）"""
+    text = unicodedata.normalize("NFKC", text).translate(_KATAKANA_TO_HIRAGANA)
+    return "".join(text.lower().split())
+
+
+def _segment_keys(text):
+    """「上川・留萌地方」なら「上川・留萌地方」と「留萌地方」（途中の地域名からも前方一致させる）"""
+    keys = []
+    start = 0
+    while True:
+        keys.append(text[start:].replace("・", ""))
+        position = text.find("・", start)
+        if position < 0:
+            return keys
+        start = position + 1
+
+
+class AreaSearchIndex:
+    """官署名・読み・コードの前方一致索引
+
+    すべての検索キーを並べ替えたリストを作り、bisect で先頭の位置を探す。
+    1 回の検索は O(log n + 一致件数) で、地域数が数千になっても入力ごとに検索できる。
+    """
+
+    def __init__(self, area_data, readings=AREA_READINGS):
+        """area_data は parse_area_json / WeatherDatabase.get_area_data の形式"""
+        self.offices = []
+        entries = set()
+        for center in area_data.values():
+            for office in center["offices"]:
+                order = len(self.offices)
+                self.offices.append(office)
+                texts = [office["name"], readings.get(office["code"], "")]
+                for text in texts:
+                    for key in _segment_keys(normalize(text)):
+                        if key:
+                            entries.add((key, order))
+                entries.add((office["code"], order))
+
+        entries = sorted(entries)
+        self._keys = [key for key, _ in entries]
+        self._orders = [order for _, order in entries]
+
+    def __len__(self):
+        return len(self.offices)
+
+    def search(self, query):
+        """query で始まる名前・読み・コードを持つ官署の一覧（サイドバーと同じ並び）"""
+        query = normalize(query).replace("・", "")
+        if not query:
+            return list(self.offices)
+
+        orders = set()
+        index = bisect_left(self._keys, query)
+        while index < len(self._keys) and self._keys[index].startswith(query):
+            orders.add(self._orders[index])
+            index += 1
+        return [self.offices[order] for order in sorted(orders)]
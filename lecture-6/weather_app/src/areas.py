@@ -0,0 +1,35 @@
+def parse_area_json(data, valid_codes):
+    """area.json から地方（center）ごとの官署一覧を取り出す
+
+    戻り値は (area_data, area_rows)。
+    area_data は {center_code: {"name": ..., "offices": [{"code", "name"}, ...]}}、
+    area_rows は WeatherDatabase.save_areas に渡す行のリスト。
+    """
+    centers = data.get("centers", {})
+    offices = data.get("offices", {})
+
+    area_data = {}
+    area_rows = []
+
+    # データベースに保存した地域情報（地方コード・官署コード順）と同じ並びにする
+    for center_code in sorted(centers):
+        center_info = centers[center_code]
+        center_name = center_info.get("name", "")
+        office_list = []
+
+        for office_code in sorted(center_info.get("children", [])):
+            if office_code in offices and office_code in valid_codes:
+                office_name = offices[office_code].get("name", "")
+                office_list.append({
+                    "code": office_code,
+                    "name": office_name
+                })
+                area_rows.append((office_code, office_name, center_code, center_name))
+
+        if office_list:
+            area_data[center_code] = {
+                "name": center_name,
+                "offices": office_list
+            }
+
+    return area_data, area_rows
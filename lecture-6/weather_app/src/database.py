@@ -0,0 +1,1667 @@
+import calendar
+import hashlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:  # 未インストールの場合、生の予報 JSON は zlib で圧縮する
+    zstandard = None
+
+from forecast_parser import to_number
+from metrics import METRICS
+from read_cache import ReadCache
+
+
+class ConnectionPool:
+    """スレッドセーフな SQLite コネクションプール"""
+
+    # 接続ごとに適用する PRAGMA の既定値
+    DEFAULT_PRAGMAS = {
+        # 空き領域を少しずつ回収できるようにする。新規作成時は journal_mode より前に
+        # 設定する必要があり、既存のデータベースでは次回の VACUUM で切り替わる
+        "auto_vacuum": "INCREMENTAL",
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 64 * 1024 * 1024,
+        "cache_size": -8000,  # 負の値は KiB 単位（約 8MB）
+    }
+
+    # データベースファイルに書き込まれる PRAGMA（読み取り専用の接続では適用しない）
+    PERSISTENT_PRAGMAS = ("auto_vacuum", "journal_mode")
+
+    def __init__(self, db_path, pool_size=4, pragmas=None, timeout=10.0, read_only=False):
+        """pool_size=0 の場合は従来どおり呼び出しごとに接続を開閉する
+
+        read_only=True の場合は mode=ro の URI で開き、書き込みもロックの取得もしない。
+        """
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragmas = dict(self.DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self.read_only = read_only
+        if read_only:
+            for name in self.PERSISTENT_PRAGMAS:
+                self.pragmas.pop(name, None)
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self):
+        """新しい接続を作成して PRAGMA を適用"""
+        conn = sqlite3.connect(
+            read_only_uri(self.db_path) if self.read_only else self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            uri=self.read_only,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self):
+        """プールから接続を取り出す（空きがなければ作成または待機）"""
+        if self._closed:
+            raise RuntimeError("コネクションプールは既に閉じられています")
+
+        if self.pool_size <= 0:
+            return self._connect()
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("コネクションプールから接続を取得できませんでした")
+
+    def release(self, conn):
+        """接続をプールに返却"""
+        if self.pool_size <= 0 or self._closed:
+            conn.close()
+            return
+
+        # 途中で失敗したトランザクションを持ち越さない
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """with 文で接続を借りて自動的に返却する"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """プール内のすべての接続を閉じる"""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+        with self._lock:
+            self._created = 0
+
+
+def read_only_uri(db_path):
+    """データベースファイルを読み取り専用で開く URI（sqlite3.connect の uri=True で使う）"""
+    return Path(db_path).resolve().as_uri() + "?mode=ro"
+
+
+def number_or_null(value):
+    """to_number と同じ変換で、数値として読めない値（'--' や '不明' など）は None"""
+    try:
+        return to_number(value)
+    except ValueError:
+        return None
+
+
+def months_before(value, months):
+    """value の months か月前の同じ日時（月末を超える日は月末に丸める）"""
+    month = value.month - 1 - months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def forecast_content_hash(weather_list, area_rows=(), pop_rows=()):
+    """予報内容のハッシュ（同一内容の予報を重複保存しないために使う）
+
+    area_rows は forecast_area_details、pop_rows は forecast_pops の行
+    （forecast_id を除いた列）。
+    """
+    payload = json.dumps([
+        [
+            [item["date"], item["weather"], item.get("weather_code"),
+             item["temp_min"], item["temp_max"]]
+            for item in weather_list
+        ],
+        sorted(list(row) for row in area_rows),
+        sorted(list(row) for row in pop_rows),
+    ], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compress_payload(body):
+    """予報 JSON の本文を圧縮して (codec, blob) を返す（zstandard があれば zstd、なければ zlib）"""
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(body)
+    return "zlib", zlib.compress(body, 9)
+
+
+def decompress_payload(codec, blob):
+    """compress_payload で圧縮した本文を展開"""
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd で圧縮された本文の展開には zstandard が必要です")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    raise ValueError(f"不明な圧縮形式です: {codec}")
+
+
+class WeatherDatabase:
+    """SQLite データベース管理クラス"""
+
+    def __init__(self, db_path="weather_forecast.db", pool_size=4, pragmas=None,
+                 cache_size=256, cache_ttl=300.0, watch_external_writes=False,
+                 read_only=False):
+        """cache_size=0 の場合は予報の読み取りをキャッシュしない
+
+        watch_external_writes=True の場合は、ほかのプロセス（ingest.py など）の書き込みを
+        PRAGMA data_version で検出し、キャッシュした予報を読み取りのたびに破棄する。
+        read_only=True の場合は読み取り専用で開き、テーブルの作成やスキーマの移行を行わない
+        （データベースがない、またはスキーマが古い場合は RuntimeError）。
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.pool = ConnectionPool(db_path, pool_size=pool_size, pragmas=pragmas,
+                                   read_only=read_only)
+        self.cache = ReadCache(max_entries=cache_size, ttl=cache_ttl)
+        if read_only:
+            self.check_schema_version()
+        else:
+            self.init_database()
+
+        # data_version は接続ごとの値のため、確認には専用の接続を使う
+        self._version_conn = None
+        self._data_version = None
+        self._version_lock = threading.Lock()
+        if watch_external_writes and cache_size > 0:
+            self._version_conn = sqlite3.connect(
+                read_only_uri(db_path) if read_only else db_path,
+                check_same_thread=False,
+                uri=read_only,
+            )
+            self._data_version = self._read_data_version()
+
+    def close(self):
+        """コネクションプールを閉じる"""
+        self.pool.close()
+        if self._version_conn is not None:
+            self._version_conn.close()
+            self._version_conn = None
+
+    def _read_data_version(self):
+        return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _cached(self, key, loader):
+        """キャッシュ経由で読み取る（ほかの接続の書き込みがあればキャッシュを破棄してから）"""
+        if self._version_conn is not None:
+            with self._version_lock:
+                version = self._read_data_version()
+                changed = version != self._data_version
+                self._data_version = version
+            if changed:
+                self.cache.clear()
+        return self.cache.get(key, loader)
+
+    def check_schema_version(self):
+        """スキーマが最新であることを確認（読み取り専用では移行できないため）"""
+        try:
+            with self.pool.connection() as conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+        except sqlite3.OperationalError as e:
+            raise RuntimeError(
+                f"データベースを読み取り専用で開けません: {self.db_path}（{e}）。"
+                "先に ingest.py で予報を取り込んでください"
+            ) from e
+        if version < len(self.MIGRATIONS):
+            raise RuntimeError(
+                f"データベースのスキーマが古いため読み取り専用では開けません: {self.db_path}"
+                f"（v{version}、必要なのは v{len(self.MIGRATIONS)}）。"
+                "ingest.py を一度実行して移行してください"
+            )
+
+    def init_database(self):
+        """データベーステーブルの作成"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # 1. 地域情報テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS areas (
+                    area_code TEXT PRIMARY KEY,
+                    area_name TEXT NOT NULL,
+                    center_code TEXT,
+                    center_name TEXT,
+                    created_at TEXT NOT NULL
+                )
+            """)
+
+            # 2. 予報情報テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS forecasts (
+                    forecast_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    area_code TEXT NOT NULL,
+                    publishing_office TEXT,
+                    report_datetime TEXT NOT NULL,
+                    fetched_at TEXT NOT NULL
+                )
+            """)
+
+            # 3. 予報詳細テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_details (
+                    detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    forecast_id INTEGER NOT NULL,
+                    forecast_date TEXT NOT NULL,
+                    weather_text TEXT,
+                    weather_code TEXT,
+                    temp_min TEXT,
+                    temp_max TEXT,
+                    FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id),
+                    UNIQUE(forecast_id, forecast_date)
+                )
+            """)
+
+            # 4. メタ情報テーブル（area.json のハッシュなど）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS app_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            """)
+
+            # 5. HTTP キャッシュテーブル（ETag / Last-Modified と本文）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS http_cache (
+                    url TEXT PRIMARY KEY,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body BLOB NOT NULL,
+                    checked_at TEXT NOT NULL
+                )
+            """)
+
+            # 6. 細分区域ごとの日別予報テーブル（全細分区域・全日付）
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_area_details (
+                    forecast_id INTEGER NOT NULL,
+                    area_code TEXT NOT NULL,
+                    area_name TEXT,
+                    forecast_date TEXT NOT NULL,
+                    weather_code TEXT,
+                    weather_text TEXT,
+                    temp_min INTEGER,
+                    temp_max INTEGER,
+                    pop INTEGER,
+                    reliability TEXT,
+                    PRIMARY KEY (forecast_id, area_code, forecast_date),
+                    FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id)
+                ) WITHOUT ROWID
+            """)
+
+            # 7. 細分区域ごとの 6 時間降水確率テーブル
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS forecast_pops (
+                    forecast_id INTEGER NOT NULL,
+                    area_code TEXT NOT NULL,
+                    time_define TEXT NOT NULL,
+                    pop INTEGER,
+                    PRIMARY KEY (forecast_id, area_code, time_define),
+                    FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id)
+                ) WITHOUT ROWID
+            """)
+
+            # インデックスの作成
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_area_details_area_date
+                ON forecast_area_details(area_code, forecast_date)
+            """)
+
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_forecast_date
+                ON forecast_details(forecast_date)
+            """)
+
+            conn.commit()
+
+            # スキーマの移行（PRAGMA user_version で管理）
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, migrate in enumerate(self.MIGRATIONS, start=1):
+                if version < target:
+                    with conn:
+                        migrate(self, conn)
+                        conn.execute(f"PRAGMA user_version = {target}")
+                    version = target
+
+    def _migrate_observations(self, conn):
+        """v1: 予報内容のハッシュと取得履歴（observation）テーブルを追加"""
+        conn.execute("ALTER TABLE forecasts ADD COLUMN content_hash TEXT")
+
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecast_observations (
+                forecast_id INTEGER NOT NULL,
+                observed_at TEXT NOT NULL,
+                report_datetime TEXT,
+                FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id)
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_observations_forecast
+            ON forecast_observations(forecast_id, observed_at)
+        """)
+
+        # 既存の予報は取得時刻を 1 回分の取得履歴として登録
+        conn.execute("""
+            INSERT INTO forecast_observations (forecast_id, observed_at, report_datetime)
+            SELECT forecast_id, fetched_at, report_datetime FROM forecasts
+        """)
+
+    def _migrate_numeric_columns(self, conn):
+        """v2: 気温・天気コードを TEXT から数値型に変更（欠測は NULL）
+
+        SQLite の `x + 0` は数値として読めない文字列を 0 にしてしまうため、
+        変換は保存時と同じ to_number で行い、読めない値は NULL にする。
+        """
+        conn.create_function("number_or_null", 1, number_or_null, deterministic=True)
+        conn.execute("""
+            CREATE TABLE forecast_details_v2 (
+                detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                forecast_id INTEGER NOT NULL,
+                forecast_date TEXT NOT NULL,
+                weather_text TEXT,
+                weather_code INTEGER,
+                temp_min INTEGER,
+                temp_max INTEGER,
+                FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id),
+                UNIQUE(forecast_id, forecast_date)
+            )
+        """)
+        conn.execute("""
+            INSERT INTO forecast_details_v2
+            (detail_id, forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+            SELECT detail_id, forecast_id, forecast_date, weather_text,
+                   number_or_null(weather_code),
+                   number_or_null(temp_min),
+                   number_or_null(temp_max)
+            FROM forecast_details
+        """)
+        conn.execute("DROP TABLE forecast_details")
+        conn.execute("ALTER TABLE forecast_details_v2 RENAME TO forecast_details")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_forecast_date
+            ON forecast_details(forecast_date)
+        """)
+
+        conn.execute("""
+            CREATE TABLE forecast_area_details_v2 (
+                forecast_id INTEGER NOT NULL,
+                area_code TEXT NOT NULL,
+                area_name TEXT,
+                forecast_date TEXT NOT NULL,
+                weather_code INTEGER,
+                weather_text TEXT,
+                temp_min INTEGER,
+                temp_max INTEGER,
+                pop INTEGER,
+                reliability TEXT,
+                PRIMARY KEY (forecast_id, area_code, forecast_date),
+                FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            INSERT INTO forecast_area_details_v2
+            SELECT forecast_id, area_code, area_name, forecast_date,
+                   number_or_null(weather_code), weather_text,
+                   temp_min, temp_max, pop, reliability
+            FROM forecast_area_details
+        """)
+        conn.execute("DROP TABLE forecast_area_details")
+        conn.execute("ALTER TABLE forecast_area_details_v2 RENAME TO forecast_area_details")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_area_details_area_date
+            ON forecast_area_details(area_code, forecast_date)
+        """)
+
+        # 値の型が変わるので内容ハッシュを計算し直す。重複判定に使う各地域の最新分だけを
+        # ここで更新し、それ以外は compact_duplicate_forecasts で必要になったときに計算する
+        conn.execute("UPDATE forecasts SET content_hash = NULL")
+        latest_ids = conn.execute("""
+            SELECT MAX(forecast_id) FROM forecasts GROUP BY area_code
+        """).fetchall()
+        conn.executemany(
+            "UPDATE forecasts SET content_hash = ? WHERE forecast_id = ?",
+            [(self._stored_content_hash(conn, forecast_id), forecast_id)
+             for forecast_id, in latest_ids]
+        )
+
+    def _migrate_latest_index(self, conn):
+        """v3: 最新予報の検索用に (area_code, fetched_at DESC) の複合インデックスへ置き換え
+
+        forecast_details(forecast_id, forecast_date) は UNIQUE 制約の自動インデックスを使う。
+        """
+        conn.execute("DROP INDEX IF EXISTS idx_area_code")
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_forecasts_area_fetched
+            ON forecasts(area_code, fetched_at DESC)
+        """)
+
+    def _migrate_history_index(self, conn):
+        """v4: 履歴のキーセット・ページングで並べ替えが不要になるよう forecast_id を追加"""
+        conn.execute("DROP INDEX IF EXISTS idx_forecasts_area_fetched")
+        conn.execute("""
+            CREATE INDEX idx_forecasts_area_fetched
+            ON forecasts(area_code, fetched_at DESC, forecast_id DESC)
+        """)
+
+    def _migrate_daily_summaries(self, conn):
+        """v5: 保持期間を過ぎた予報を集約する日別サマリテーブルを追加"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecast_daily_summaries (
+                area_code TEXT NOT NULL,
+                forecast_date TEXT NOT NULL,
+                temp_min INTEGER,
+                temp_max INTEGER,
+                snapshots INTEGER NOT NULL,
+                PRIMARY KEY (area_code, forecast_date)
+            ) WITHOUT ROWID
+        """)
+
+    def _migrate_raw_payloads(self, conn):
+        """v6: 取得した予報 JSON を圧縮して保存するアーカイブテーブルを追加
+
+        同じ本文（content_hash）は 1 回だけ保存する。forecast_id はその本文から作成した予報。
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS raw_payloads (
+                payload_id INTEGER PRIMARY KEY,
+                area_code TEXT NOT NULL,
+                report_datetime TEXT NOT NULL,
+                content_hash TEXT NOT NULL UNIQUE,
+                forecast_id INTEGER,
+                codec TEXT NOT NULL,
+                raw_size INTEGER NOT NULL,
+                payload BLOB NOT NULL,
+                fetched_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_raw_payloads_area_report
+            ON raw_payloads(area_code, report_datetime)
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_raw_payloads_forecast
+            ON raw_payloads(forecast_id)
+        """)
+
+    def _migrate_forecast_date_stats(self, conn):
+        """v7: 地域・予報対象日ごとの予報の変化を集計するテーブルを追加し、既存の予報から作成
+
+        forecast_date_stats は最初／最後の予報・予想気温の範囲・改訂回数、
+        forecast_revisions は予報の内容が変わった取得ごとの値を持つ。
+        以降は save_forecast が新しい予報の保存と同じトランザクションで更新する。
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecast_date_stats (
+                area_code TEXT NOT NULL,
+                forecast_date TEXT NOT NULL,
+                first_forecast_id INTEGER NOT NULL,
+                last_forecast_id INTEGER NOT NULL,
+                first_fetched_at TEXT NOT NULL,
+                last_fetched_at TEXT NOT NULL,
+                first_weather_code INTEGER,
+                last_weather_code INTEGER,
+                first_temp_min INTEGER,
+                first_temp_max INTEGER,
+                last_temp_min INTEGER,
+                last_temp_max INTEGER,
+                lowest_temp_min INTEGER,
+                highest_temp_min INTEGER,
+                lowest_temp_max INTEGER,
+                highest_temp_max INTEGER,
+                snapshots INTEGER NOT NULL,
+                revisions INTEGER NOT NULL,
+                weather_code_changes INTEGER NOT NULL,
+                PRIMARY KEY (area_code, forecast_date)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS forecast_revisions (
+                area_code TEXT NOT NULL,
+                forecast_date TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                forecast_id INTEGER NOT NULL,
+                weather_code INTEGER,
+                previous_weather_code INTEGER,
+                temp_min INTEGER,
+                temp_max INTEGER,
+                PRIMARY KEY (area_code, forecast_date, fetched_at, forecast_id)
+            ) WITHOUT ROWID
+        """)
+        self._rebuild_forecast_date_stats(conn)
+
+    MIGRATIONS = (
+        _migrate_observations,
+        _migrate_numeric_columns,
+        _migrate_latest_index,
+        _migrate_history_index,
+        _migrate_daily_summaries,
+        _migrate_raw_payloads,
+        _migrate_forecast_date_stats,
+    )
+
+    def save_area(self, area_code, area_name, center_code=None, center_name=None):
+        """地域情報をデータベースに保存"""
+        with self.pool.connection() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO areas
+                (area_code, area_name, center_code, center_name, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (area_code, area_name, center_code, center_name,
+                  datetime.now().isoformat()))
+            conn.commit()
+
+    def save_areas(self, areas, content_hash=None):
+        """地域情報を 1 トランザクションでまとめて保存
+
+        areas は (area_code, area_name, center_code, center_name) の反復可能オブジェクト。
+        content_hash を指定した場合は area.json 全体の内容とみなし、含まれない地域を削除する。
+        content_hash が前回保存時と同じ場合は書き込みを行わず False を返す。
+        """
+        areas = list(areas)
+
+        with self.pool.connection() as conn:
+            if content_hash is not None:
+                row = conn.execute(
+                    "SELECT value FROM app_meta WHERE key = 'area_json_hash'"
+                ).fetchone()
+                if row and row[0] == content_hash:
+                    return False
+
+            created_at = datetime.now().isoformat()
+            with conn:
+                conn.executemany("""
+                    INSERT INTO areas
+                    (area_code, area_name, center_code, center_name, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(area_code) DO UPDATE SET
+                        area_name = excluded.area_name,
+                        center_code = excluded.center_code,
+                        center_name = excluded.center_name
+                """, (
+                    (area_code, area_name, center_code, center_name, created_at)
+                    for area_code, area_name, center_code, center_name in areas
+                ))
+
+                if content_hash is not None:
+                    conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_areas (area_code TEXT)")
+                    conn.execute("DELETE FROM current_areas")
+                    conn.executemany(
+                        "INSERT INTO current_areas VALUES (?)",
+                        ((row[0],) for row in areas)
+                    )
+                    conn.execute("""
+                        DELETE FROM areas
+                        WHERE area_code NOT IN (SELECT area_code FROM current_areas)
+                    """)
+                    conn.execute("""
+                        INSERT OR REPLACE INTO app_meta (key, value)
+                        VALUES ('area_json_hash', ?)
+                    """, (content_hash,))
+            return True
+
+    @METRICS.timed("db_query_seconds", query="area_data")
+    def get_area_data(self):
+        """保存済みの地域情報を地方ごとにまとめて取得（load_area_data と同じ形式）"""
+        with self.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT area_code, area_name, center_code, center_name
+                FROM areas
+                WHERE center_code IS NOT NULL
+                ORDER BY center_code, area_code
+            """).fetchall()
+
+        area_data = {}
+        for area_code, area_name, center_code, center_name in rows:
+            center = area_data.setdefault(
+                center_code, {"name": center_name or "", "offices": []}
+            )
+            center["offices"].append({"code": area_code, "name": area_name})
+        return area_data
+
+    def get_http_cache(self, url):
+        """URL に対応する (etag, last_modified, body) を取得"""
+        with self.pool.connection() as conn:
+            return conn.execute("""
+                SELECT etag, last_modified, body
+                FROM http_cache
+                WHERE url = ?
+            """, (url,)).fetchone()
+
+    def save_http_cache(self, url, etag, last_modified, body):
+        """HTTP レスポンスの検証子と本文を保存"""
+        with self.pool.connection() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO http_cache
+                (url, etag, last_modified, body, checked_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (url, etag, last_modified, body, datetime.now().isoformat()))
+            conn.commit()
+
+    def delete_http_cache(self, url):
+        """検証子のない応答になった URL のキャッシュを削除"""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+            conn.commit()
+
+    def touch_http_cache(self, url):
+        """304 応答時にキャッシュの確認時刻だけを更新"""
+        with self.pool.connection() as conn:
+            conn.execute("""
+                UPDATE http_cache SET checked_at = ? WHERE url = ?
+            """, (datetime.now().isoformat(), url))
+            conn.commit()
+
+    @METRICS.timed("db_query_seconds", query="save_forecast")
+    def save_forecast(self, area_code, publishing_office, weather_list,
+                      columns=None, pop_steps=None, report_datetime=None, raw_payload=None):
+        """天気予報をデータベースに保存
+
+        report_datetime には予報 JSON の reportDatetime（気象庁の発表時刻）を渡す。
+        省略した場合は取得時刻を記録する。
+        columns（ForecastColumns）と pop_steps（PopStepColumns）を渡すと、
+        全細分区域の日別予報と 6 時間降水確率も同じトランザクションで保存する。
+        raw_payload（予報 JSON の本文 bytes）を渡すと、圧縮して raw_payloads にも保存する。
+        直前の予報と内容が同じ場合は新しい行を作らず、取得履歴だけを記録する。
+        """
+        weather_list, area_rows, pop_rows, content_hash = self._forecast_rows(
+            weather_list, columns, pop_steps
+        )
+
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # 直前の予報の確認から挿入までを 1 つの書き込みトランザクションにする。
+            # 遅延トランザクションのままだと、同じ内容を同時に保存したスレッドや
+            # プロセスがどちらも一致を見逃し、重複した予報を作ってしまう
+            cursor.execute("BEGIN IMMEDIATE")
+
+            fetched_at = datetime.now().isoformat()
+            report_datetime = report_datetime or fetched_at
+
+            # 直前の予報と内容が同じなら取得履歴だけを記録する
+            cursor.execute("""
+                SELECT forecast_id, content_hash
+                FROM forecasts
+                WHERE area_code = ?
+                ORDER BY fetched_at DESC
+                LIMIT 1
+            """, (area_code,))
+            latest = cursor.fetchone()
+
+            if latest and latest[1] == content_hash:
+                forecast_id = latest[0]
+                cursor.execute("""
+                    UPDATE forecasts SET report_datetime = ? WHERE forecast_id = ?
+                """, (report_datetime, forecast_id))
+                cursor.execute("""
+                    INSERT INTO forecast_observations (forecast_id, observed_at, report_datetime)
+                    VALUES (?, ?, ?)
+                """, (forecast_id, fetched_at, report_datetime))
+                if raw_payload is not None:
+                    self._archive_payload(
+                        cursor, area_code, report_datetime, raw_payload, forecast_id, fetched_at
+                    )
+                conn.commit()
+                self._invalidate_forecast(area_code, forecast_id)
+                return forecast_id
+
+            cursor.execute("""
+                INSERT INTO forecasts
+                (area_code, publishing_office, report_datetime, fetched_at, content_hash)
+                VALUES (?, ?, ?, ?, ?)
+            """, (area_code, publishing_office, report_datetime, fetched_at, content_hash))
+
+            forecast_id = cursor.lastrowid
+
+            cursor.execute("""
+                INSERT INTO forecast_observations (forecast_id, observed_at, report_datetime)
+                VALUES (?, ?, ?)
+            """, (forecast_id, fetched_at, report_datetime))
+
+            self._insert_forecast_rows(cursor, forecast_id, weather_list, area_rows, pop_rows)
+            self._update_forecast_date_stats(
+                cursor, area_code, forecast_id, fetched_at, weather_list
+            )
+            if raw_payload is not None:
+                self._archive_payload(
+                    cursor, area_code, report_datetime, raw_payload, forecast_id, fetched_at
+                )
+
+            conn.commit()
+            self._invalidate_forecast(area_code, forecast_id)
+            return forecast_id
+
+    def _forecast_rows(self, weather_list, columns, pop_steps):
+        """保存する予報を (weather_list, area_rows, pop_rows, content_hash) に変換"""
+        area_rows = list(zip(
+            columns.area_code, columns.area_name, columns.date, columns.weather_code,
+            columns.weather_text, columns.temp_min, columns.temp_max, columns.pop,
+            columns.reliability,
+        )) if columns is not None else []
+        pop_rows = list(zip(
+            pop_steps.area_code, pop_steps.time_define, pop_steps.pop,
+        )) if pop_steps is not None else []
+        weather_list = [
+            {
+                "date": item["date"],
+                "weather": item["weather"],
+                "weather_code": to_number(item.get("weather_code")),
+                "temp_min": to_number(item["temp_min"]),
+                "temp_max": to_number(item["temp_max"])
+            }
+            for item in weather_list
+        ]
+        content_hash = forecast_content_hash(weather_list, area_rows, pop_rows)
+        return weather_list, area_rows, pop_rows, content_hash
+
+    def _insert_forecast_rows(self, cursor, forecast_id, weather_list, area_rows, pop_rows):
+        """予報詳細・細分区域ごとの日別予報・6 時間降水確率の行を挿入"""
+        for item in weather_list:
+            cursor.execute("""
+                INSERT INTO forecast_details
+                (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (
+                forecast_id,
+                item["date"],
+                item["weather"],
+                item["weather_code"],
+                item["temp_min"],
+                item["temp_max"]
+            ))
+
+        if area_rows:
+            cursor.executemany("""
+                INSERT OR REPLACE INTO forecast_area_details
+                (forecast_id, area_code, area_name, forecast_date, weather_code,
+                 weather_text, temp_min, temp_max, pop, reliability)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, ((forecast_id,) + row for row in area_rows))
+
+        if pop_rows:
+            cursor.executemany("""
+                INSERT OR REPLACE INTO forecast_pops
+                (forecast_id, area_code, time_define, pop)
+                VALUES (?, ?, ?, ?)
+            """, ((forecast_id,) + row for row in pop_rows))
+
+    # 直前の値から変わっていれば（または最初の予報なら）forecast_revisions に記録する
+    REVISION_INSERT = """
+        INSERT OR IGNORE INTO forecast_revisions
+        (area_code, forecast_date, fetched_at, forecast_id, weather_code, previous_weather_code,
+         temp_min, temp_max)
+        SELECT :area_code, :forecast_date, :fetched_at, :forecast_id, :weather_code,
+               (SELECT last_weather_code FROM forecast_date_stats
+                WHERE area_code = :area_code AND forecast_date = :forecast_date),
+               :temp_min, :temp_max
+        WHERE NOT EXISTS (
+            SELECT 1 FROM forecast_date_stats
+            WHERE area_code = :area_code AND forecast_date = :forecast_date
+              AND last_weather_code IS :weather_code
+              AND last_temp_min IS :temp_min AND last_temp_max IS :temp_max
+        )
+    """
+
+    # 集計行を追加または更新する（SET の右辺は更新前の値を参照する）
+    DATE_STATS_UPSERT = """
+        INSERT INTO forecast_date_stats
+        (area_code, forecast_date, first_forecast_id, last_forecast_id,
+         first_fetched_at, last_fetched_at, first_weather_code, last_weather_code,
+         first_temp_min, first_temp_max, last_temp_min, last_temp_max,
+         lowest_temp_min, highest_temp_min, lowest_temp_max, highest_temp_max,
+         snapshots, revisions, weather_code_changes)
+        VALUES (:area_code, :forecast_date, :forecast_id, :forecast_id,
+                :fetched_at, :fetched_at, :weather_code, :weather_code,
+                :temp_min, :temp_max, :temp_min, :temp_max,
+                :temp_min, :temp_min, :temp_max, :temp_max,
+                1, 0, 0)
+        ON CONFLICT (area_code, forecast_date) DO UPDATE SET
+            last_forecast_id = excluded.last_forecast_id,
+            last_fetched_at = excluded.last_fetched_at,
+            last_weather_code = excluded.last_weather_code,
+            last_temp_min = excluded.last_temp_min,
+            last_temp_max = excluded.last_temp_max,
+            lowest_temp_min = COALESCE(MIN(lowest_temp_min, excluded.lowest_temp_min),
+                                       lowest_temp_min, excluded.lowest_temp_min),
+            highest_temp_min = COALESCE(MAX(highest_temp_min, excluded.highest_temp_min),
+                                        highest_temp_min, excluded.highest_temp_min),
+            lowest_temp_max = COALESCE(MIN(lowest_temp_max, excluded.lowest_temp_max),
+                                       lowest_temp_max, excluded.lowest_temp_max),
+            highest_temp_max = COALESCE(MAX(highest_temp_max, excluded.highest_temp_max),
+                                        highest_temp_max, excluded.highest_temp_max),
+            snapshots = snapshots + 1,
+            revisions = revisions + (
+                last_weather_code IS NOT excluded.last_weather_code
+                OR last_temp_min IS NOT excluded.last_temp_min
+                OR last_temp_max IS NOT excluded.last_temp_max
+            ),
+            weather_code_changes = weather_code_changes + (
+                last_weather_code IS NOT excluded.last_weather_code
+            )
+    """
+
+    def _update_forecast_date_stats(self, cursor, area_code, forecast_id, fetched_at,
+                                    weather_list):
+        """新しく保存した予報を forecast_date_stats / forecast_revisions に反映"""
+        for item in weather_list:
+            params = {
+                "area_code": area_code,
+                "forecast_date": item["date"],
+                "forecast_id": forecast_id,
+                "fetched_at": fetched_at,
+                "weather_code": item["weather_code"],
+                "temp_min": item["temp_min"],
+                "temp_max": item["temp_max"],
+            }
+            cursor.execute(self.REVISION_INSERT, params)
+            cursor.execute(self.DATE_STATS_UPSERT, params)
+
+    # 地域・予報対象日ごとに取得順（save_forecast が集計を更新する順）に並べ、
+    # 何番目の取得か・全体の件数・直前の取得の値を付ける
+    ORDERED_DETAILS = """
+        WITH ordered AS (
+            SELECT f.area_code, d.forecast_date, f.forecast_id, f.fetched_at,
+                   d.weather_code, d.temp_min, d.temp_max,
+                   ROW_NUMBER() OVER w AS position,
+                   COUNT(*) OVER (PARTITION BY f.area_code, d.forecast_date) AS snapshots,
+                   LAG(d.weather_code) OVER w AS previous_weather_code,
+                   LAG(d.temp_min) OVER w AS previous_temp_min,
+                   LAG(d.temp_max) OVER w AS previous_temp_max
+            FROM forecasts f
+            JOIN forecast_details d ON d.forecast_id = f.forecast_id
+            {where}
+            WINDOW w AS (
+                PARTITION BY f.area_code, d.forecast_date ORDER BY f.fetched_at, f.forecast_id
+            )
+        ),
+        changes AS (
+            SELECT *,
+                   position > 1 AND weather_code IS NOT previous_weather_code AS code_changed,
+                   position > 1 AND (
+                       weather_code IS NOT previous_weather_code
+                       OR temp_min IS NOT previous_temp_min
+                       OR temp_max IS NOT previous_temp_max
+                   ) AS revised
+            FROM ordered
+        )
+    """
+
+    # REVISION_INSERT と同じく、最初の取得と値が変わった取得を記録する
+    REVISIONS_REBUILD = ORDERED_DETAILS + """
+        INSERT INTO forecast_revisions
+        (area_code, forecast_date, fetched_at, forecast_id, weather_code, previous_weather_code,
+         temp_min, temp_max)
+        SELECT area_code, forecast_date, fetched_at, forecast_id, weather_code,
+               previous_weather_code, temp_min, temp_max
+        FROM changes
+        WHERE position = 1 OR revised
+    """
+
+    # DATE_STATS_UPSERT を取得順に繰り返した結果を 1 回の集計で作る
+    DATE_STATS_REBUILD = ORDERED_DETAILS + """
+        INSERT INTO forecast_date_stats
+        (area_code, forecast_date, first_forecast_id, last_forecast_id,
+         first_fetched_at, last_fetched_at, first_weather_code, last_weather_code,
+         first_temp_min, first_temp_max, last_temp_min, last_temp_max,
+         lowest_temp_min, highest_temp_min, lowest_temp_max, highest_temp_max,
+         snapshots, revisions, weather_code_changes)
+        SELECT area_code, forecast_date,
+               MAX(CASE WHEN position = 1 THEN forecast_id END),
+               MAX(CASE WHEN position = snapshots THEN forecast_id END),
+               MAX(CASE WHEN position = 1 THEN fetched_at END),
+               MAX(CASE WHEN position = snapshots THEN fetched_at END),
+               MAX(CASE WHEN position = 1 THEN weather_code END),
+               MAX(CASE WHEN position = snapshots THEN weather_code END),
+               MAX(CASE WHEN position = 1 THEN temp_min END),
+               MAX(CASE WHEN position = 1 THEN temp_max END),
+               MAX(CASE WHEN position = snapshots THEN temp_min END),
+               MAX(CASE WHEN position = snapshots THEN temp_max END),
+               MIN(temp_min), MAX(temp_min), MIN(temp_max), MAX(temp_max),
+               COUNT(*), SUM(revised), SUM(code_changed)
+        FROM changes
+        GROUP BY area_code, forecast_date
+    """
+
+    def _rebuild_forecast_date_stats(self, conn, area_code=None):
+        """保存されている予報から forecast_date_stats / forecast_revisions を作り直す
+
+        行ごとに Python で更新せず、ウィンドウ関数を使った 2 つの INSERT ... SELECT で作る
+        （並べ替えは SQLite が一時ファイルを使って行うため、予報の件数によらずメモリは一定）。
+        戻り値は集計した予報詳細の行数。
+        """
+        where = "WHERE area_code = ?" if area_code else ""
+        params = (area_code,) if area_code else ()
+        conn.execute(f"DELETE FROM forecast_date_stats {where}", params)
+        conn.execute(f"DELETE FROM forecast_revisions {where}", params)
+
+        details_where = where.replace("area_code", "f.area_code")
+        conn.execute(self.REVISIONS_REBUILD.format(where=details_where), params)
+        conn.execute(self.DATE_STATS_REBUILD.format(where=details_where), params)
+        return conn.execute(
+            f"SELECT COALESCE(SUM(snapshots), 0) FROM forecast_date_stats {where}", params
+        ).fetchone()[0]
+
+    def rebuild_forecast_date_stats(self, area_code=None):
+        """予報の変化の集計を、保存されている予報から作り直す
+
+        保持期間で削除された予報は集計から外れる。reingest で予報詳細を作り直した後などに使う。
+        """
+        with self.pool.connection() as conn:
+            with conn:
+                return self._rebuild_forecast_date_stats(conn, area_code)
+
+    def _archive_payload(self, cursor, area_code, report_datetime, raw_payload, forecast_id,
+                         fetched_at):
+        """予報 JSON の本文を圧縮して raw_payloads に保存（同じ本文は保存済みなら何もしない）"""
+        content_hash = hashlib.sha256(raw_payload).hexdigest()
+        if cursor.execute(
+            "SELECT 1 FROM raw_payloads WHERE content_hash = ?", (content_hash,)
+        ).fetchone():
+            return False
+
+        codec, blob = compress_payload(raw_payload)
+        cursor.execute("""
+            INSERT INTO raw_payloads
+            (area_code, report_datetime, content_hash, forecast_id, codec, raw_size, payload,
+             fetched_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (area_code, report_datetime, content_hash, forecast_id, codec, len(raw_payload),
+              blob, fetched_at))
+        return True
+
+    def _invalidate_forecast(self, area_code, forecast_id):
+        """予報の保存後に、その地域の最新予報・履歴と該当予報のキャッシュを破棄"""
+        self.cache.invalidate_matching(
+            lambda key: key[0] in ("latest", "history") and key[1] == area_code
+        )
+        self.cache.invalidate(("forecast", forecast_id))
+
+    def _stored_content_hash(self, conn, forecast_id):
+        """保存済みの予報から forecast_content_hash を計算"""
+        weather_list = [
+            {
+                "date": row[0],
+                "weather": row[1],
+                "weather_code": row[2],
+                "temp_min": row[3],
+                "temp_max": row[4]
+            }
+            for row in conn.execute("""
+                SELECT forecast_date, weather_text, weather_code, temp_min, temp_max
+                FROM forecast_details
+                WHERE forecast_id = ?
+                ORDER BY forecast_date
+            """, (forecast_id,))
+        ]
+        area_rows = conn.execute("""
+            SELECT area_code, area_name, forecast_date, weather_code, weather_text,
+                   temp_min, temp_max, pop, reliability
+            FROM forecast_area_details
+            WHERE forecast_id = ?
+        """, (forecast_id,)).fetchall()
+        pop_rows = conn.execute("""
+            SELECT area_code, time_define, pop
+            FROM forecast_pops
+            WHERE forecast_id = ?
+        """, (forecast_id,)).fetchall()
+        return forecast_content_hash(weather_list, area_rows, pop_rows)
+
+    def _database_size(self, conn):
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    # 重複した予報 1 件を集計から差し引く（予報詳細を削除する前に実行する）
+    # 重複は直前の予報と内容が同じため改訂・天気コードの変化には数えられておらず、
+    # 保存回数と「最後の予報」だけを直前の予報に戻せばよい。SET の右辺は更新前の値を参照する
+    DATE_STATS_REMOVE_DUPLICATE = """
+        UPDATE forecast_date_stats SET
+            snapshots = snapshots - 1,
+            last_forecast_id = CASE WHEN last_forecast_id = :duplicate_id
+                                    THEN :kept_id ELSE last_forecast_id END,
+            last_fetched_at = CASE WHEN last_forecast_id = :duplicate_id
+                                   THEN (SELECT fetched_at FROM forecasts
+                                         WHERE forecast_id = :kept_id)
+                                   ELSE last_fetched_at END
+        WHERE area_code = (SELECT area_code FROM forecasts WHERE forecast_id = :duplicate_id)
+          AND forecast_date IN (SELECT forecast_date FROM forecast_details
+                                WHERE forecast_id = :duplicate_id)
+    """
+
+    def compact_duplicate_forecasts(self):
+        """内容が直前と同じ予報をまとめて削除し、VACUUM で領域を回収
+
+        削除した予報の取得履歴は残した予報に付け替え、予報の変化の集計からは
+        削除した予報の分だけを差し引く（保持期間で予報を削除済みの日の集計は残す）。
+        戻り値は削除件数と VACUUM 前後のデータベースサイズ（バイト）。
+        """
+        with self.pool.connection() as conn:
+            size_before = self._database_size(conn)
+
+            with conn:
+                missing = conn.execute(
+                    "SELECT forecast_id FROM forecasts WHERE content_hash IS NULL"
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE forecasts SET content_hash = ? WHERE forecast_id = ?",
+                    [(self._stored_content_hash(conn, forecast_id), forecast_id)
+                     for forecast_id, in missing]
+                )
+
+                rows = conn.execute("""
+                    SELECT forecast_id, area_code, content_hash, report_datetime
+                    FROM forecasts
+                    ORDER BY area_code, fetched_at
+                """).fetchall()
+
+                duplicates = []
+                kept = {}
+                for forecast_id, area_code, content_hash, report_datetime in rows:
+                    previous = kept.get(area_code)
+                    if previous and previous[1] == content_hash:
+                        duplicates.append((previous[0], forecast_id, report_datetime))
+                    else:
+                        kept[area_code] = (forecast_id, content_hash)
+
+                for kept_id, duplicate_id, report_datetime in duplicates:
+                    conn.execute("""
+                        UPDATE forecast_observations SET forecast_id = ? WHERE forecast_id = ?
+                    """, (kept_id, duplicate_id))
+                    conn.execute("""
+                        UPDATE forecasts SET report_datetime = ? WHERE forecast_id = ?
+                    """, (report_datetime, kept_id))
+                    conn.execute("""
+                        UPDATE raw_payloads SET forecast_id = ? WHERE forecast_id = ?
+                    """, (kept_id, duplicate_id))
+                    conn.execute(self.DATE_STATS_REMOVE_DUPLICATE,
+                                 {"kept_id": kept_id, "duplicate_id": duplicate_id})
+                    conn.execute("""
+                        UPDATE forecast_revisions SET forecast_id = ? WHERE forecast_id = ?
+                    """, (kept_id, duplicate_id))
+
+                removed_details = 0
+                duplicate_ids = [(duplicate_id,) for _, duplicate_id, _ in duplicates]
+                for table in ("forecast_details", "forecast_area_details", "forecast_pops"):
+                    cursor = conn.executemany(
+                        f"DELETE FROM {table} WHERE forecast_id = ?", duplicate_ids
+                    )
+                    if table == "forecast_details":
+                        removed_details = cursor.rowcount
+                conn.executemany("DELETE FROM forecasts WHERE forecast_id = ?", duplicate_ids)
+
+            conn.execute("VACUUM")
+            size_after = self._database_size(conn)
+
+        self.cache.clear()
+
+        return {
+            "removed_forecasts": len(duplicates),
+            "removed_details": removed_details,
+            "size_before": size_before,
+            "size_after": size_after,
+            "reclaimed": size_before - size_after,
+        }
+
+    # 保持期間を過ぎた予報の候補を forecast_id 順に batch_size 件ずつ選ぶクエリ
+    # 各地域の最新の予報は重複判定に使うため常に残す
+    RETENTION_DAILY_QUERY = """
+        SELECT forecast_id FROM forecasts f
+        WHERE fetched_at < :keep_all AND fetched_at >= :keep_daily
+          AND forecast_id > :after
+          AND forecast_id <> (
+              SELECT g.forecast_id FROM forecasts g
+              WHERE g.area_code = f.area_code
+                AND g.fetched_at >= DATE(f.fetched_at)
+                AND g.fetched_at < DATE(f.fetched_at, '+1 day')
+              ORDER BY g.fetched_at DESC, g.forecast_id DESC
+              LIMIT 1
+          )
+        ORDER BY forecast_id
+        LIMIT :batch_size
+    """
+
+    RETENTION_EXPIRED_QUERY = """
+        SELECT forecast_id FROM forecasts f
+        WHERE fetched_at < :keep_daily
+          AND forecast_id > :after
+          AND forecast_id <> (
+              SELECT g.forecast_id FROM forecasts g
+              WHERE g.area_code = f.area_code
+              ORDER BY g.fetched_at DESC, g.forecast_id DESC
+              LIMIT 1
+          )
+        ORDER BY forecast_id
+        LIMIT :batch_size
+    """
+
+    def _delete_retention_batch(self, conn):
+        """temp.retention_batch の予報を関連テーブルごと削除
+
+        予報に対応する生の予報 JSON（raw_payloads）も削除する。予報を削除した後の本文は
+        iter_raw_payloads で読み出せず、再解析にも使えないため。
+        戻り値は (削除した予報詳細の件数, 削除した本文の件数)。
+        """
+        removed = {}
+        for table in ("forecast_details", "forecast_area_details", "forecast_pops",
+                      "forecast_observations", "raw_payloads", "forecasts"):
+            cursor = conn.execute(f"""
+                DELETE FROM {table}
+                WHERE forecast_id IN (SELECT forecast_id FROM temp.retention_batch)
+            """)
+            removed[table] = cursor.rowcount
+        return removed["forecast_details"], removed["raw_payloads"]
+
+    def _delete_orphan_payloads(self, conn):
+        """予報が削除済みの本文（以前の retention が残したもの）を削除し、件数を返す"""
+        with conn:
+            return conn.execute("""
+                DELETE FROM raw_payloads
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM forecasts f WHERE f.forecast_id = raw_payloads.forecast_id
+                )
+            """).rowcount
+
+    def _run_retention_phase(self, query, params, batch_size, pause, aggregate):
+        """query が返す予報を batch_size 件ずつ短いトランザクションで削除
+
+        aggregate=True の場合は削除前に日別の最低／最高気温を forecast_daily_summaries に集約する。
+        戻り値は (削除した予報の件数, 削除した予報詳細の件数, 削除した本文の件数)。
+        """
+        removed_forecasts = removed_details = removed_payloads = 0
+        after = 0
+
+        with self.pool.connection() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS retention_batch "
+                         "(forecast_id INTEGER PRIMARY KEY)")
+            while True:
+                with conn:
+                    ids = conn.execute(
+                        query, dict(params, after=after, batch_size=batch_size)
+                    ).fetchall()
+                    if not ids:
+                        break
+
+                    conn.execute("DELETE FROM temp.retention_batch")
+                    conn.executemany("INSERT INTO temp.retention_batch VALUES (?)", ids)
+
+                    if aggregate:
+                        conn.execute("""
+                            INSERT INTO forecast_daily_summaries
+                            (area_code, forecast_date, temp_min, temp_max, snapshots)
+                            SELECT f.area_code, d.forecast_date,
+                                   MIN(d.temp_min), MAX(d.temp_max), COUNT(*)
+                            FROM forecast_details d
+                            JOIN forecasts f ON f.forecast_id = d.forecast_id
+                            WHERE d.forecast_id IN (SELECT forecast_id FROM temp.retention_batch)
+                            GROUP BY f.area_code, d.forecast_date
+                            ON CONFLICT(area_code, forecast_date) DO UPDATE SET
+                                temp_min = MIN(COALESCE(temp_min, excluded.temp_min),
+                                               COALESCE(excluded.temp_min, temp_min)),
+                                temp_max = MAX(COALESCE(temp_max, excluded.temp_max),
+                                               COALESCE(excluded.temp_max, temp_max)),
+                                snapshots = snapshots + excluded.snapshots
+                        """)
+
+                    details, payloads = self._delete_retention_batch(conn)
+                    removed_details += details
+                    removed_payloads += payloads
+                    removed_forecasts += len(ids)
+                    after = ids[-1][0]
+
+                # バッチの間に書き込みロックを解放して他の書き込みを通す
+                if pause:
+                    time.sleep(pause)
+
+        return removed_forecasts, removed_details, removed_payloads
+
+    def _incremental_vacuum(self, conn, pages=1000):
+        """空きページを pages 単位で少しずつ回収し、方式を返す
+
+        auto_vacuum が INCREMENTAL でない既存のデータベースは 1 回だけ VACUUM で切り替える。
+        """
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return "full"
+
+        while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            conn.execute(f"PRAGMA incremental_vacuum({pages})").fetchall()
+        return "incremental"
+
+    def apply_retention(self, keep_all_days=14, keep_daily_months=6,
+                        batch_size=500, pause=0.0, now=None):
+        """古い予報を間引き・集約して削除
+
+        取得から keep_all_days 日以内の予報はすべて残し、keep_daily_months か月以内の予報は
+        地域・取得日ごとに最後の 1 件だけを残す。それより古い予報は日別の最低／最高気温を
+        forecast_daily_summaries に集約してから削除する。
+        削除した予報に対応する生の予報 JSON（raw_payloads）も削除する。
+        削除は batch_size 件ずつ別々のトランザクションで行い、最後に空き領域を回収する。
+        """
+        now = now or datetime.now()
+        params = {
+            "keep_all": (now - timedelta(days=keep_all_days)).isoformat(),
+            "keep_daily": months_before(now, keep_daily_months).isoformat(),
+        }
+
+        with self.pool.connection() as conn:
+            size_before = self._database_size(conn)
+
+        downsampled, downsampled_details, downsampled_payloads = self._run_retention_phase(
+            self.RETENTION_DAILY_QUERY, params, batch_size, pause, aggregate=False
+        )
+        aggregated, aggregated_details, aggregated_payloads = self._run_retention_phase(
+            self.RETENTION_EXPIRED_QUERY, params, batch_size, pause, aggregate=True
+        )
+
+        with self.pool.connection() as conn:
+            orphan_payloads = self._delete_orphan_payloads(conn)
+            vacuum = self._incremental_vacuum(conn)
+            size_after = self._database_size(conn)
+
+        self.cache.clear()
+
+        return {
+            "downsampled_forecasts": downsampled,
+            "aggregated_forecasts": aggregated,
+            "removed_details": downsampled_details + aggregated_details,
+            "removed_payloads": downsampled_payloads + aggregated_payloads + orphan_payloads,
+            "vacuum": vacuum,
+            "size_before": size_before,
+            "size_after": size_after,
+            "reclaimed": size_before - size_after,
+        }
+
+    def get_forecast_area_codes(self):
+        """予報が保存されている地域コードの一覧"""
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT DISTINCT area_code FROM forecasts ORDER BY area_code"
+            )]
+
+    def get_archive_stats(self):
+        """raw_payloads の件数と展開前・圧縮後の合計サイズ（バイト）を圧縮形式ごとに返す"""
+        with self.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT codec, COUNT(*), SUM(raw_size), SUM(LENGTH(payload))
+                FROM raw_payloads
+                GROUP BY codec
+            """).fetchall()
+        return {
+            codec: {"payloads": count, "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
+            for codec, count, raw_bytes, stored_bytes in rows
+        }
+
+    def iter_raw_payloads(self, area_code=None, chunk_size=200):
+        """保存済みの予報に対応する生の予報 JSON を payload_id 順に chunk_size 件ずつ返す
+
+        各要素は (forecast_id, area_code, codec, payload) で、payload は圧縮されたまま。
+        削除済み（保持期間など）の予報に対応する本文は含めない。
+        1 チャンクごとに接続を返却するため、呼び出し側の処理中に書き込みを妨げない。
+        """
+        after = 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute("""
+                    SELECT r.payload_id, r.forecast_id, r.area_code, r.codec, r.payload
+                    FROM raw_payloads r
+                    JOIN forecasts f ON f.forecast_id = r.forecast_id
+                    WHERE r.payload_id > ? AND (? IS NULL OR r.area_code = ?)
+                    ORDER BY r.payload_id
+                    LIMIT ?
+                """, (after, area_code, area_code, chunk_size)).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    FORECAST_ROWS_QUERY = """
+        SELECT f.forecast_id, f.area_code, f.publishing_office, f.report_datetime,
+               f.fetched_at, d.forecast_date, d.weather_text, d.weather_code,
+               d.temp_min, d.temp_max
+        FROM (
+            SELECT forecast_id FROM forecasts
+            WHERE area_code = ? AND (fetched_at, forecast_id) > (?, ?)
+            ORDER BY fetched_at, forecast_id
+            LIMIT ?
+        ) page
+        JOIN forecasts f ON f.forecast_id = page.forecast_id
+        LEFT JOIN forecast_details d ON d.forecast_id = f.forecast_id
+        ORDER BY f.fetched_at, f.forecast_id, d.forecast_date
+    """
+
+    def iter_forecast_rows(self, area_code=None, chunk_size=500):
+        """予報と予報詳細を結合した行を、地域ごとに取得日時順で chunk_size 予報分ずつ返す
+
+        各行は (forecast_id, area_code, publishing_office, report_datetime, fetched_at,
+        forecast_date, weather_text, weather_code, temp_min, temp_max)。
+        予報詳細のない予報は含めない。地域ごとに (fetched_at, forecast_id) のキーセットで
+        idx_forecasts_area_fetched をたどるため、全体を並べ替えずに済む。
+        1 チャンクごとに接続を返却するため、呼び出し側の処理中に書き込みを妨げない。
+        """
+        area_codes = [area_code] if area_code else self.get_forecast_area_codes()
+        for code in area_codes:
+            after = ("", 0)
+            while True:
+                with self.pool.connection() as conn:
+                    rows = conn.execute(
+                        self.FORECAST_ROWS_QUERY, (code, *after, chunk_size)
+                    ).fetchall()
+                if not rows:
+                    break
+                after = (rows[-1][4], rows[-1][0])
+                rows = [row for row in rows if row[5] is not None]
+                if rows:
+                    yield rows
+
+    def rebuild_forecasts(self, forecasts):
+        """予報の保存内容を解析し直した結果で置き換え、置き換えた件数を返す
+
+        forecasts は (forecast_id, weather_list, columns, pop_steps) の反復可能オブジェクトで、
+        1 回の呼び出しを 1 トランザクションで書き込む。
+        """
+        rebuilt = 0
+        with self.pool.connection() as conn:
+            with conn:
+                cursor = conn.cursor()
+                for forecast_id, weather_list, columns, pop_steps in forecasts:
+                    weather_list, area_rows, pop_rows, content_hash = self._forecast_rows(
+                        weather_list, columns, pop_steps
+                    )
+                    for table in ("forecast_details", "forecast_area_details", "forecast_pops"):
+                        cursor.execute(f"DELETE FROM {table} WHERE forecast_id = ?", (forecast_id,))
+                    self._insert_forecast_rows(
+                        cursor, forecast_id, weather_list, area_rows, pop_rows
+                    )
+                    cursor.execute(
+                        "UPDATE forecasts SET content_hash = ? WHERE forecast_id = ?",
+                        (content_hash, forecast_id)
+                    )
+                    rebuilt += 1
+        self.cache.clear()
+        return rebuilt
+
+    def get_monthly_temperature_averages(self, area_code=None):
+        """地域・月ごとの予想最低／最高気温の平均（数値列をそのまま集計）"""
+        where = "WHERE f.area_code = ?" if area_code else ""
+        params = (area_code,) if area_code else ()
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT f.area_code, SUBSTR(d.forecast_date, 1, 7) AS month,
+                       AVG(d.temp_min), AVG(d.temp_max), COUNT(d.temp_max)
+                FROM forecast_details d
+                JOIN forecasts f ON f.forecast_id = d.forecast_id
+                {where}
+                GROUP BY f.area_code, month
+                ORDER BY f.area_code, month
+            """, params).fetchall()
+
+        return [
+            {
+                "area_code": row[0],
+                "month": row[1],
+                "avg_temp_min": row[2],
+                "avg_temp_max": row[3],
+                "samples": row[4]
+            }
+            for row in rows
+        ]
+
+    DATE_STATS_COLUMNS = (
+        "area_code", "forecast_date", "first_forecast_id", "last_forecast_id",
+        "first_fetched_at", "last_fetched_at", "first_weather_code", "last_weather_code",
+        "first_temp_min", "first_temp_max", "last_temp_min", "last_temp_max",
+        "lowest_temp_min", "highest_temp_min", "lowest_temp_max", "highest_temp_max",
+        "snapshots", "revisions", "weather_code_changes",
+    )
+
+    def get_forecast_date_stats(self, area_code, start_date=None, end_date=None):
+        """地域の予報対象日ごとの予報の変化（forecast_date_stats を主キーの範囲で読む）
+
+        start_date / end_date（YYYY-MM-DD、両端を含む）で対象日を絞り込める。
+        temp_min_drift / temp_max_drift は最後の予報と最初の予報の予想気温の差。
+        """
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+                SELECT {", ".join(self.DATE_STATS_COLUMNS)}
+                FROM forecast_date_stats
+                WHERE area_code = ? AND forecast_date >= ? AND forecast_date <= ?
+                ORDER BY forecast_date
+            """, (area_code, start_date or "", end_date or "9999")).fetchall()
+
+        result = []
+        for row in rows:
+            stats = dict(zip(self.DATE_STATS_COLUMNS, row))
+            for name in ("temp_min", "temp_max"):
+                first, last = stats[f"first_{name}"], stats[f"last_{name}"]
+                stats[f"{name}_drift"] = (
+                    last - first if first is not None and last is not None else None
+                )
+            result.append(stats)
+        return result
+
+    def get_forecast_revisions(self, area_code, forecast_date):
+        """予報対象日の予報が変わった取得ごとの値（古い順、最初の予報を含む）"""
+        with self.pool.connection() as conn:
+            rows = conn.execute("""
+                SELECT fetched_at, forecast_id, weather_code, previous_weather_code,
+                       temp_min, temp_max
+                FROM forecast_revisions
+                WHERE area_code = ? AND forecast_date = ?
+                ORDER BY fetched_at, forecast_id
+            """, (area_code, forecast_date)).fetchall()
+
+        return [
+            {
+                "fetched_at": row[0],
+                "forecast_id": row[1],
+                "weather_code": row[2],
+                "previous_weather_code": row[3],
+                "temp_min": row[4],
+                "temp_max": row[5]
+            }
+            for row in rows
+        ]
+
+    def get_sub_areas(self, forecast_id):
+        """予報に含まれる細分区域の (area_code, area_name) 一覧"""
+        with self.pool.connection() as conn:
+            return conn.execute("""
+                SELECT DISTINCT area_code, area_name
+                FROM forecast_area_details
+                WHERE forecast_id = ?
+                ORDER BY area_code
+            """, (forecast_id,)).fetchall()
+
+    def get_area_forecast(self, forecast_id, area_code):
+        """細分区域 1 つ分の日別予報と 6 時間降水確率を取得"""
+        with self.pool.connection() as conn:
+            days = conn.execute("""
+                SELECT forecast_date, weather_code, weather_text,
+                       temp_min, temp_max, pop, reliability
+                FROM forecast_area_details
+                WHERE forecast_id = ? AND area_code = ?
+                ORDER BY forecast_date
+            """, (forecast_id, area_code)).fetchall()
+
+            pops = conn.execute("""
+                SELECT time_define, pop
+                FROM forecast_pops
+                WHERE forecast_id = ? AND area_code = ?
+                ORDER BY time_define
+            """, (forecast_id, area_code)).fetchall()
+
+        return {
+            "days": [
+                {
+                    "date": row[0],
+                    "weather_code": row[1],
+                    "weather": row[2],
+                    "temp_min": row[3],
+                    "temp_max": row[4],
+                    "pop": row[5],
+                    "reliability": row[6]
+                }
+                for row in days
+            ],
+            "pops": pops
+        }
+
+    # 予報 1 件分（ヘッダ + 日別詳細）を 1 回の JOIN で取得するクエリ
+    # {target} は対象の forecast_id（1 件）。forecasts を主キーで 1 行に絞り込み、
+    # 予報詳細を主キー (forecast_id, forecast_date) の順に読むため一時 B-tree での並べ替えが不要
+    FORECAST_QUERY = """
+        SELECT f.forecast_id, f.publishing_office, f.report_datetime, f.fetched_at,
+               (SELECT MAX(observed_at) FROM forecast_observations o
+                WHERE o.forecast_id = f.forecast_id) AS observed_at,
+               d.forecast_date, d.weather_text, d.weather_code, d.temp_min, d.temp_max
+        FROM forecasts f
+        LEFT JOIN forecast_details d ON d.forecast_id = f.forecast_id
+        WHERE f.forecast_id = {target}
+        ORDER BY d.forecast_id, d.forecast_date
+    """
+
+    LATEST_FORECAST_QUERY = FORECAST_QUERY.format(target="""(
+            SELECT forecast_id FROM forecasts
+            WHERE area_code = ?
+            ORDER BY fetched_at DESC
+            LIMIT 1
+        )""")
+
+    FORECAST_BY_ID_QUERY = FORECAST_QUERY.format(target="?")
+
+    def _fetch_forecast(self, query, params):
+        """FORECAST_QUERY の結果を予報の辞書にまとめる"""
+        name = "latest" if query is self.LATEST_FORECAST_QUERY else "forecast_by_id"
+        with METRICS.timer("db_query_seconds", query=name), self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        if not rows:
+            return None
+
+        forecast_id, publishing_office, report_datetime, fetched_at, observed_at = rows[0][:5]
+
+        weather_list = []
+        for row in rows:
+            if row[5] is None:
+                continue
+            weather_list.append({
+                "date": row[5],
+                "weather": row[6],
+                "weather_code": row[7],
+                "temp_min": row[8],
+                "temp_max": row[9]
+            })
+
+        return {
+            "forecast_id": forecast_id,
+            "publishing_office": publishing_office,
+            "report_datetime": report_datetime,
+            "fetched_at": fetched_at,
+            "observed_at": observed_at or fetched_at,
+            "weather_list": weather_list
+        }
+
+    def get_latest_forecast(self, area_code):
+        """最新の天気予報をデータベースから取得（キャッシュ経由）"""
+        return self._cached(
+            ("latest", area_code),
+            lambda: self._fetch_forecast(self.LATEST_FORECAST_QUERY, (area_code,))
+        )
+
+    def get_forecast_history(self, area_code, limit=10):
+        """過去の予報履歴（新しい順の先頭 limit 件）を取得"""
+        return self.get_forecast_history_page(area_code, limit=limit)[0]
+
+    def get_forecast_history_page(self, area_code, limit=10, before=None):
+        """過去の予報履歴を新しい順に 1 ページ分取得（キャッシュ経由）
+
+        before には前のページが返したカーソル (fetched_at, forecast_id) を渡す。
+        OFFSET を使わずインデックス上の位置から読み始めるため、履歴が深くても
+        1 ページの取得時間は変わらない。
+        戻り値は (rows, next_cursor)。次のページがなければ next_cursor は None。
+        """
+        def load():
+            with METRICS.timer("db_query_seconds", query="history"), \
+                    self.pool.connection() as conn:
+                if before is None:
+                    rows = conn.execute("""
+                        SELECT forecast_id, fetched_at, publishing_office
+                        FROM forecasts
+                        WHERE area_code = ?
+                        ORDER BY fetched_at DESC, forecast_id DESC
+                        LIMIT ?
+                    """, (area_code, limit + 1)).fetchall()
+                else:
+                    rows = conn.execute("""
+                        SELECT forecast_id, fetched_at, publishing_office
+                        FROM forecasts
+                        WHERE area_code = ? AND (fetched_at, forecast_id) < (?, ?)
+                        ORDER BY fetched_at DESC, forecast_id DESC
+                        LIMIT ?
+                    """, (area_code, before[0], before[1], limit + 1)).fetchall()
+
+            # 1 件多く読んで次のページの有無を判定する
+            if len(rows) <= limit:
+                return rows, None
+            rows = rows[:limit]
+            return rows, (rows[-1][1], rows[-1][0])
+
+        key = ("history", area_code, limit, tuple(before) if before else None)
+        return self._cached(key, load)
+
+    def get_forecast_by_id(self, forecast_id):
+        """指定されたforecast_idの予報を取得（キャッシュ経由）"""
+        return self._cached(
+            ("forecast", forecast_id),
+            lambda: self._fetch_forecast(self.FORECAST_BY_ID_QUERY, (forecast_id,))
+        )
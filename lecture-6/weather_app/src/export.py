@@ -0,0 +1,276 @@
+"""予報の履歴を地域・月ごとの列指向ファイルに書き出すコマンド
+
+forecasts × forecast_details を iter_forecast_rows で少しずつ読み出し、
+列ごとに型を付けて次の構成で保存する（月は取得日時 fetched_at の年月）。
+
+    <out>/area_code=130000/month=2026-01/part-00000.parquet
+
+既定では NumPy の .npz（numpy.load で読める、列ごとの .npy を ZIP にまとめたもの）で保存する。
+.npz の書き込みには numpy も使わない。
+--format parquet を指定すると pyarrow で Parquet（zstd 圧縮）に書き出す（pyarrow が必要）。
+
+列の型:
+    forecast_id             int64
+    area_code など文字列    string（.npz では固定長の Unicode）
+    fetched_at              timestamp[us]（.npz では datetime64[us]）
+    forecast_date           date32（.npz では datetime64[D]）
+    weather_code            int16（.npz では欠損を -1）
+    temp_min / temp_max     float32（欠損は null、.npz では NaN）
+
+1 ファイルに書く行数を rows_per_file までに抑えるため、
+データベースの大きさによらず使用メモリは一定に収まる。
+
+使い方:
+    python export.py --out export/ [--db weather_forecast.db] [--format npz|parquet]
+                     [--area 130000] [--chunk-size 500] [--rows-per-file 100000]
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zipfile
+from array import array
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # 未インストールの場合は Parquet では書き出せない
+    pyarrow = None
+
+from database import WeatherDatabase
+
+
+# (列名, 型)。型は "int64" / "string" / "timestamp" / "date" / "int16" / "float32"
+COLUMNS = (
+    ("forecast_id", "int64"),
+    ("area_code", "string"),
+    ("publishing_office", "string"),
+    ("report_datetime", "string"),
+    ("fetched_at", "timestamp"),
+    ("forecast_date", "date"),
+    ("weather_text", "string"),
+    ("weather_code", "int16"),
+    ("temp_min", "float32"),
+    ("temp_max", "float32"),
+)
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+DEFAULT_FORMAT = "npz"
+
+
+def _convert(rows):
+    """iter_forecast_rows の行を COLUMNS の型に合わせた値のタプルのリストに変換
+
+    天気コード・気温はスキーマ v2 から数値の列のため、そのまま使う。
+    """
+    # 1 つの予報の行は取得日時が同じため、変換結果を使い回す
+    fetched = {}
+    converted = []
+    for (forecast_id, area_code, publishing_office, report_datetime, fetched_at,
+         forecast_date, weather_text, weather_code, temp_min, temp_max) in rows:
+        if fetched_at not in fetched:
+            fetched[fetched_at] = datetime.fromisoformat(fetched_at)
+        converted.append((
+            forecast_id,
+            area_code,
+            publishing_office,
+            report_datetime,
+            fetched[fetched_at],
+            date.fromisoformat(forecast_date),
+            weather_text,
+            weather_code,
+            temp_min,
+            temp_max,
+        ))
+    return converted
+
+
+# ---- Parquet ----
+
+def _arrow_type(kind):
+    return {
+        "int64": pyarrow.int64(),
+        "string": pyarrow.string(),
+        "timestamp": pyarrow.timestamp("us"),
+        "date": pyarrow.date32(),
+        "int16": pyarrow.int16(),
+        "float32": pyarrow.float32(),
+    }[kind]
+
+
+def write_parquet(path, columns):
+    table = pyarrow.table({
+        name: pyarrow.array(values, type=_arrow_type(kind))
+        for (name, kind), values in zip(COLUMNS, columns)
+    })
+    pyarrow.parquet.write_table(table, path, compression="zstd")
+
+
+# ---- .npz（numpy を使わずに .npy 形式で書く）----
+
+def _npy_header(descr, length):
+    """.npy 形式 1.0 のヘッダ（全体が 64 バイトの倍数になるよう空白で埋める）"""
+    header = repr({"descr": descr, "fortran_order": False, "shape": (length,)})
+    padding = -(10 + len(header) + 1) % 64
+    header = (header + " " * padding + "\n").encode("latin1")
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _npy_column(kind, values):
+    """列の値を (.npy の dtype, データのバイト列) に変換"""
+    if kind == "int64":
+        return "<i8", _little_endian(array("q", values))
+    if kind == "timestamp":
+        # datetime64[us] はエポックからのマイクロ秒（タイムゾーンなし）
+        return "<M8[us]", _little_endian(array("q", (
+            (value - EPOCH) // MICROSECOND for value in values
+        )))
+    if kind == "date":
+        return "<M8[D]", _little_endian(array("q", (
+            value.toordinal() - EPOCH_ORDINAL for value in values
+        )))
+    if kind == "int16":
+        return "<i2", _little_endian(array("h", (
+            -1 if value is None else value for value in values
+        )))
+    if kind == "float32":
+        return "<f4", _little_endian(array("f", (
+            float("nan") if value is None else value for value in values
+        )))
+    # 固定長 Unicode（UTF-32）。最長の値に合わせ、短い値は NUL で埋める
+    values = ["" if value is None else value for value in values]
+    width = max(1, max(map(len, values), default=0))
+    return f"<U{width}", "".join(value.ljust(width, "\0") for value in values).encode("utf-32-le")
+
+
+def write_npz(path, columns):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for (name, kind), values in zip(COLUMNS, columns):
+            descr, data = _npy_column(kind, values)
+            with archive.open(f"{name}.npy", "w") as f:
+                f.write(_npy_header(descr, len(values)))
+                f.write(data)
+
+
+WRITERS = {
+    "parquet": (".parquet", write_parquet),
+    "npz": (".npz", write_npz),
+}
+
+
+class PartitionWriter:
+    """行を列ごとに溜め、地域・月が変わるか rows_per_file 行に達したらファイルに書き出す"""
+
+    def __init__(self, out_dir, file_format, rows_per_file):
+        self.out_dir = out_dir
+        self.extension, self.write = WRITERS[file_format]
+        self.rows_per_file = rows_per_file
+        self.partition = None
+        self.columns = [[] for _ in COLUMNS]
+        self.parts = {}
+        self.files = 0
+
+    def extend(self, partition, rows):
+        """同じ地域・月の変換済みの行を追加する"""
+        if partition != self.partition:
+            self.flush()
+            self.partition = partition
+        while rows:
+            space = self.rows_per_file - len(self.columns[0])
+            for column, values in zip(self.columns, zip(*rows[:space])):
+                column.extend(values)
+            rows = rows[space:]
+            if len(self.columns[0]) >= self.rows_per_file:
+                self.flush()
+
+    def flush(self):
+        if not self.columns[0]:
+            return
+        area_code, month = self.partition
+        directory = os.path.join(self.out_dir, f"area_code={area_code}", f"month={month}")
+        os.makedirs(directory, exist_ok=True)
+        part = self.parts.get(self.partition, 0)
+        self.parts[self.partition] = part + 1
+        path = os.path.join(directory, f"part-{part:05d}{self.extension}")
+        # 書き込み途中のファイルが読まれないよう、一時ファイルに書いてから置き換える
+        self.write(path + ".tmp", self.columns)
+        os.replace(path + ".tmp", path)
+        self.files += 1
+        self.columns = [[] for _ in COLUMNS]
+
+
+def export_forecasts(db, out_dir, file_format=None, area_code=None,
+                     chunk_size=500, rows_per_file=100_000):
+    """予報の履歴を out_dir に書き出し、行数・予報数・ファイル数・所要時間を返す
+
+    out_dir は存在しないか空である必要がある。
+    """
+    file_format = file_format or DEFAULT_FORMAT
+    if file_format == "parquet" and pyarrow is None:
+        raise RuntimeError("Parquet で書き出すには pyarrow が必要です")
+    if os.path.isdir(out_dir) and os.listdir(out_dir):
+        raise FileExistsError(f"書き出し先が空ではありません: {out_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    writer = PartitionWriter(out_dir, file_format, rows_per_file)
+    rows = 0
+    forecasts = 0
+    for chunk in db.iter_forecast_rows(area_code=area_code, chunk_size=chunk_size):
+        forecasts += len({row[0] for row in chunk})
+        rows += len(chunk)
+        # チャンク内の行は地域・取得日時順のため、同じ区分の行は連続している
+        for partition, group in groupby(chunk, key=lambda row: (row[1], row[4][:7])):
+            writer.extend(partition, _convert(group))
+    writer.flush()
+
+    return {
+        "format": file_format,
+        "rows": rows,
+        "forecasts": forecasts,
+        "partitions": len(writer.parts),
+        "files": writer.files,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="予報の履歴の列指向ファイルへの書き出し")
+    parser.add_argument("--db", default="weather_forecast.db", help="データベースファイル")
+    parser.add_argument("--out", required=True, help="書き出し先のディレクトリ（空であること）")
+    parser.add_argument("--format", choices=sorted(WRITERS), default=DEFAULT_FORMAT,
+                        help="ファイル形式（parquet には pyarrow が必要）")
+    parser.add_argument("--area", help="対象の地域コード（省略時は全地域）")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="1 回に読み出す予報の数")
+    parser.add_argument("--rows-per-file", type=int, default=100_000,
+                        help="1 ファイルに書く最大の行数")
+    args = parser.parse_args()
+
+    db = WeatherDatabase(args.db, pool_size=1, cache_size=0)
+    try:
+        result = export_forecasts(db, args.out, args.format, args.area,
+                                  args.chunk_size, args.rows_per_file)
+    finally:
+        db.close()
+    print(f"{args.out} に書き出しました（{result['format']}）: "
+          f"予報 {result['forecasts']}件 / {result['rows']}行、"
+          f"{result['partitions']} 区分 {result['files']} ファイル、"
+          f"{result['elapsed']:.1f} 秒")
+
+
+if __name__ == "__main__":
+    main()
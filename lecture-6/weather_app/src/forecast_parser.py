@@ -0,0 +1,329 @@
+from itertools import zip_longest
+
+from metrics import METRICS
+from weather_codes import weather_label
+
+
+class ForecastColumns:
+    """列指向の日別予報データ
+
+    各フィールドは同じ長さのリストで、i 番目の要素が 1 行（官署・細分区域・日付）に対応する。
+    天気コード・気温・降水確率（週間予報の日別値）は数値（欠測は None）で保持する。
+    """
+
+    FIELDS = (
+        "office_code",
+        "publishing_office",
+        "report_datetime",
+        "area_code",
+        "area_name",
+        "date",
+        "weather_code",
+        "weather_text",
+        "temp_min",
+        "temp_max",
+        "pop",
+        "reliability",
+    )
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, [])
+
+    def __len__(self):
+        return len(self.date)
+
+
+
+def to_number(value):
+    """気温・降水確率・天気コードの値を数値に変換（空文字・空白だけの文字列や None は None）
+
+    パーサが読む予報 JSON の文字列と、save_forecast に渡される値（数値はそのまま）の両方に使う。
+    空文字は例外を起こさずに判定する（週間予報の初日などで頻繁に現れるため）。
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    value = str(value).strip()
+    return float(value) if value else None
+
+
+class _ConversionTable(dict):
+    """変換結果の表（値の種類が少ない文字列の変換を 1 回だけ行い、以降は引くだけにする）
+
+    気温・降水確率・天気コード・発表時刻は値の種類が少ないため、予報 JSON ごとに
+    変換し直すより表を引くほうが速い。件数が上限に達したら表を作り直す。
+    """
+
+    MAX_ENTRIES = 4096
+
+    def __init__(self, convert):
+        super().__init__()
+        self.convert = convert
+
+    def __missing__(self, value):
+        result = self.convert(value)
+        if len(self) >= self.MAX_ENTRIES:
+            self.clear()
+        self[value] = result
+        return result
+
+
+# 文字列 → 数値（空文字は None）、timeDefines → 日付、天気コード → 略称
+_NUMBERS = _ConversionTable(to_number)
+_DATES = _ConversionTable(lambda time_define: time_define[:10])
+_LABELS = _ConversionTable(weather_label)
+
+
+def _series(time_series, index):
+    """timeSeries[index] を (日付リスト, areas) で返す（存在しなければ空）"""
+    if index >= len(time_series):
+        return [], []
+    series = time_series[index]
+    dates = list(map(_DATES.__getitem__, series.get("timeDefines", [])))
+    return dates, series.get("areas") or []
+
+
+def _pick_area(areas, area_code, index):
+    """細分区域コードが一致する要素、なければ同じ位置の要素を返す"""
+    for i, area in enumerate(areas):
+        if area.get("area", {}).get("code") == area_code:
+            return i
+    return index if index < len(areas) else None
+
+
+class _Report:
+    """予報 JSON 1 件分から取り出した 4 つの timeSeries（日付は日単位に切り詰め済み）"""
+
+    __slots__ = (
+        "publishing_office", "report_datetime",
+        "weather_dates", "weather_areas", "temp_dates", "temp_areas",
+        "weekly_dates", "weekly_areas", "weekly_temp_dates", "weekly_temp_areas",
+    )
+
+    def __init__(self, data):
+        short_term, weekly = data[0], data[1]
+        self.publishing_office = short_term.get("publishingOffice", "")
+        self.report_datetime = short_term.get("reportDatetime", "")
+        short_series = short_term.get("timeSeries") or []
+        weekly_series = weekly.get("timeSeries") or []
+        self.weather_dates, self.weather_areas = _series(short_series, 0)
+        self.temp_dates, self.temp_areas = _series(short_series, 2)
+        self.weekly_dates, self.weekly_areas = _series(weekly_series, 0)
+        self.weekly_temp_dates, self.weekly_temp_areas = _series(weekly_series, 1)
+
+    def target_areas(self, max_areas=None):
+        """対象の細分区域（短期予報に細分区域がなければ週間予報の区域）"""
+        return (self.weather_areas or self.weekly_areas)[:max_areas]
+
+    def area_days(self, index, area_code):
+        """細分区域 1 つ分の {日付: [天気文, 天気コード, 最低, 最高, 降水確率, 信頼度]}
+
+        天気コードは文字列のまま、気温と降水確率は数値（欠測は None）にする。
+        """
+        numbers = _NUMBERS
+        days = {}
+
+        weather_areas = self.weather_areas
+        if index < len(weather_areas):
+            area = weather_areas[index]
+            for date, text, code in zip_longest(
+                self.weather_dates, area.get("weathers", []), area.get("weatherCodes", []),
+                fillvalue="",
+            ):
+                if date:
+                    days[date] = [text, code, None, None, None, ""]
+
+        temp_areas = self.temp_areas
+        if index < len(temp_areas):
+            # 気温は 最低, 最高 の順に交互に並ぶ（位置 2 と 3 に入れる）
+            position = 2
+            for date, temp in zip(self.temp_dates, temp_areas[index].get("temps", [])):
+                value = numbers[temp]
+                if value is not None:
+                    day = days.get(date)
+                    if day is None:
+                        day = days[date] = ["", "", None, None, None, ""]
+                    day[position] = value
+                position = 5 - position
+
+        weekly_areas = self.weekly_areas
+        weekly_index = _pick_area(weekly_areas, area_code, index)
+        if weekly_index is None:
+            return days
+
+        area = weekly_areas[weekly_index]
+        for date, code, pop, reliability in zip_longest(
+            self.weekly_dates, area.get("weatherCodes", []),
+            area.get("pops", []), area.get("reliabilities", []),
+        ):
+            if date is None:
+                break
+            day = days.get(date)
+            if day is None:
+                day = days[date] = ["", "", None, None, None, ""]
+            if code:
+                day[1] = code
+            day[4] = numbers[pop]
+            day[5] = reliability or ""
+
+        weekly_temp_areas = self.weekly_temp_areas
+        if weekly_index < len(weekly_temp_areas):
+            area = weekly_temp_areas[weekly_index]
+            for date, temp_min, temp_max in zip_longest(
+                self.weekly_temp_dates, area.get("tempsMin", []), area.get("tempsMax", []),
+            ):
+                if date is None:
+                    break
+                day = days.get(date)
+                if day is None:
+                    day = days[date] = ["", "", None, None, None, ""]
+                if day[2] is None:
+                    day[2] = numbers[temp_min]
+                if day[3] is None:
+                    day[3] = numbers[temp_max]
+        return days
+
+
+def _append_rows(append, data, office_code, max_areas=None):
+    """予報 JSON 1 件分の行（ForecastColumns.FIELDS の順のタプル）を append に渡す"""
+    if not data or len(data) < 2:
+        return
+
+    report = _Report(data)
+    numbers = _NUMBERS
+    labels = _LABELS
+    publishing_office = report.publishing_office
+    report_datetime = report.report_datetime
+    for index, target in enumerate(report.target_areas(max_areas)):
+        area_info = target.get("area", {})
+        area_code = area_info.get("code", "")
+        area_name = area_info.get("name", "")
+        for date, (text, code, temp_min, temp_max, pop, reliability) in sorted(
+            report.area_days(index, area_code).items()
+        ):
+            append((
+                office_code, publishing_office, report_datetime,
+                area_code, area_name, date,
+                numbers[code], text or labels[code],
+                temp_min, temp_max, pop, reliability,
+            ))
+
+
+def _to_columns(rows):
+    """行のタプルのリストを ForecastColumns に転置"""
+    columns = ForecastColumns()
+    if rows:
+        columns.__dict__.update(zip(ForecastColumns.FIELDS, map(list, zip(*rows))))
+    return columns
+
+
+@METRICS.timed("parse_seconds")
+def parse_forecast_columns(data, office_code="", max_areas=None):
+    """気象庁の予報 JSON 1 件分を ForecastColumns に変換
+
+    短期予報の全細分区域（timeSeries[0] の areas）について、短期の天気・気温と
+    週間予報の天気コード・気温を日付ごとにまとめる。
+    max_areas を指定すると先頭からその数の細分区域だけを処理する。
+    """
+    # 行をタプルで集め、最後に列ごとに転置する（細分区域ごとに 12 列を伸ばすより速い）
+    rows = []
+    _append_rows(rows.append, data, office_code, max_areas)
+    return _to_columns(rows)
+
+
+class PopStepColumns:
+    """列指向の 6 時間ごとの降水確率（短期予報 timeSeries[1]）"""
+
+    FIELDS = (
+        "office_code",
+        "area_code",
+        "time_define",
+        "pop",
+    )
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, [])
+
+    def __len__(self):
+        return len(self.time_define)
+
+
+
+def parse_pop_steps(data, office_code=""):
+    """短期予報の 6 時間ごとの降水確率を全細分区域分 PopStepColumns に変換"""
+    steps = PopStepColumns()
+    if not data:
+        return steps
+
+    time_series = data[0].get("timeSeries") or []
+    if len(time_series) < 2:
+        return steps
+
+    time_defines = time_series[1].get("timeDefines", [])
+    for area in time_series[1].get("areas") or []:
+        area_code = area.get("area", {}).get("code", "")
+        pops = [_NUMBERS[pop] for pop in area.get("pops", [])[:len(time_defines)]]
+        count = len(pops)
+
+        steps.office_code.extend([office_code] * count)
+        steps.area_code.extend([area_code] * count)
+        steps.time_define.extend(time_defines[:count])
+        steps.pop.extend(pops)
+    return steps
+
+
+def parse_forecast_batch(payloads):
+    """複数官署の予報 JSON をまとめて 1 つの ForecastColumns に変換
+
+    payloads は (office_code, data) の反復可能オブジェクトまたは dict。
+    全官署の行を集めてから 1 回だけ列に転置する。
+    """
+    if isinstance(payloads, dict):
+        payloads = payloads.items()
+
+    rows = []
+    for office_code, data in payloads:
+        _append_rows(rows.append, data, office_code)
+    return _to_columns(rows)
+
+
+def to_weather_list(columns, area_code=None, days=7):
+    """ForecastColumns から 1 細分区域分の表示用リストを作る
+
+    area_code を省略した場合は先頭の細分区域を使う。
+    天気コードと気温は数値（欠測は None）のまま返す。
+    """
+    if not len(columns):
+        return []
+    if area_code is None:
+        area_code = columns.area_code[0]
+
+    # 同じ細分区域の行は連続しているため、先頭から days 行までのうち同じ区域の範囲を使う
+    start = columns.area_code.index(area_code)
+    stop = min(start + days, len(columns))
+    while columns.area_code[stop - 1] != area_code:
+        stop -= 1
+
+    return [
+        {
+            "date": date,
+            "weather": weather_text,
+            "weather_code": weather_code,
+            "temp_min": temp_min,
+            "temp_max": temp_max
+        }
+        for date, weather_text, weather_code, temp_min, temp_max in zip(
+            columns.date[start:stop],
+            columns.weather_text[start:stop],
+            columns.weather_code[start:stop],
+            columns.temp_min[start:stop],
+            columns.temp_max[start:stop],
+        )
+    ]
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+
+
+JST = timezone(timedelta(hours=9), "JST")
+
+# 府県天気予報の定時発表時刻（JST）。週間予報は 11 時・17 時で、この中に含まれる
+PUBLISH_HOURS = (5, 11, 17)
+
+# 発表時刻から API に反映されるまでの余裕
+PUBLISH_GRACE = timedelta(minutes=10)
+
+# 発表時刻を過ぎても古い報しか得られなかった場合に、次に再取得するまでの間隔
+RETRY_INTERVAL = timedelta(minutes=10)
+
+
+def to_jst(value):
+    """ISO 形式の文字列または datetime を JST の aware datetime に変換
+
+    タイムゾーンのない値（fetched_at など）は実行環境のローカル時刻とみなす。
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.astimezone(JST)
+
+
+def _now(now):
+    return to_jst(now) if now is not None else datetime.now(JST)
+
+
+def latest_publish_time(now=None):
+    """現在までに取得可能になっている最新の定時発表時刻"""
+    now = _now(now)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for hour in reversed(PUBLISH_HOURS):
+        slot = day.replace(hour=hour)
+        if slot + PUBLISH_GRACE <= now:
+            return slot
+    return (day - timedelta(days=1)).replace(hour=PUBLISH_HOURS[-1])
+
+
+def next_publish_time(now=None):
+    """次の定時発表が取得可能になる時刻（発表時刻 + PUBLISH_GRACE）"""
+    now = _now(now)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    for hour in PUBLISH_HOURS:
+        available = day.replace(hour=hour) + PUBLISH_GRACE
+        if available > now:
+            return available
+    return (day + timedelta(days=1)).replace(hour=PUBLISH_HOURS[0]) + PUBLISH_GRACE
+
+
+def needs_refresh(report_datetime, fetched_at=None, now=None):
+    """保存済みの予報を再取得すべきかを発表スケジュールから判定
+
+    保存済みの報が最新の定時発表以降のものなら、新しい報はまだ存在しないので不要。
+    発表時刻を過ぎてから取得しても古い報だった場合は RETRY_INTERVAL だけ待つ。
+    """
+    if not report_datetime:
+        return True
+
+    now = _now(now)
+    slot = latest_publish_time(now)
+    if to_jst(report_datetime) >= slot:
+        return False
+
+    if fetched_at:
+        fetched = to_jst(fetched_at)
+        if fetched >= slot + PUBLISH_GRACE and now - fetched < RETRY_INTERVAL:
+            return False
+    return True
@@ -0,0 +1,77 @@
+"""UI を起動せずに全地域の予報を取り込むコマンド
+
+定時発表の直後ごとに全地域の予報を取得し、アプリと共有する SQLite データベースに保存する。
+発表の反映が遅れて古い報しか得られなかった地域は、次の定時発表を待たずに 10 分ごとに取り直す。
+アプリは WEATHER_APP_READER_ONLY=1 で起動すると先読みを行わず、データベースを読むだけになる。
+
+使い方:
+    python ingest.py [--db weather_forecast.db] [--once] [--workers 8] [--rate 10]
+                     [--areas 130000,270000] [--base-url https://www.jma.go.jp]
+
+ローカルのスタブサーバに対して実行する場合:
+    python ../bench/jma_stub.py --port 8765
+    python ingest.py --once --base-url http://127.0.0.1:8765
+"""
+import argparse
+import hashlib
+import json
+
+from area_codes import VALID_AREA_CODES
+from areas import parse_area_json
+from database import WeatherDatabase
+from jma_client import JMA_BASE_URL, JmaClient
+from metrics import METRICS, start_exporters
+from prefetch import ForecastPrefetcher
+
+
+def ingest_areas(db, client, valid_codes=VALID_AREA_CODES):
+    """area.json を取得して地域情報を保存（変更がなければ書き込まない）"""
+    content = client.fetch_area_json()
+    _, area_rows = parse_area_json(json.loads(content), valid_codes)
+    if db.save_areas(area_rows, hashlib.sha256(content).hexdigest()):
+        print(f"地域情報を保存しました（{len(area_rows)}件）")
+    return len(area_rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="天気予報の取り込み（UI なし）")
+    parser.add_argument("--db", default="weather_forecast.db", help="データベースファイル")
+    parser.add_argument("--once", action="store_true", help="1 回だけ取り込んで終了する")
+    parser.add_argument("--workers", type=int, default=8, help="同時に取得する地域の数")
+    parser.add_argument("--rate", type=float, default=10.0, help="1 秒あたりの最大リクエスト数")
+    parser.add_argument("--areas", help="対象の地域コード（カンマ区切り、省略時は全地域）")
+    parser.add_argument("--base-url", default=JMA_BASE_URL, help="気象庁 API のベース URL")
+    args = parser.parse_args(argv)
+
+    area_codes = args.areas.split(",") if args.areas else VALID_AREA_CODES
+
+    db = WeatherDatabase(args.db, pool_size=args.workers)
+    client = JmaClient(db, base_url=args.base_url, pool_maxsize=args.workers)
+    prefetcher = ForecastPrefetcher(
+        db, area_codes, max_workers=args.workers, rate_limit=args.rate, client=client
+    )
+
+    # WEATHER_APP_METRICS=1 の場合は計測結果を出力する
+    METRICS.add_collector("read_cache", db.cache.stats)
+    METRICS.add_collector("http", client.stats)
+    start_exporters()
+
+    try:
+        try:
+            ingest_areas(db, client)
+        except Exception as e:
+            print(f"地域データの取得に失敗しました: {e}")
+
+        if args.once:
+            return prefetcher.run()
+        prefetcher.run_forever()
+    except KeyboardInterrupt:
+        print("取り込みを中止しました")
+        prefetcher.stop()
+    finally:
+        client.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
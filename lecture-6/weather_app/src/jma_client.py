@@ -0,0 +1,118 @@
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import METRICS
+
+
+JMA_BASE_URL = "https://www.jma.go.jp"
+AREA_PATH = "/bosai/common/const/area.json"
+FORECAST_PATH = "/bosai/forecast/data/forecast/{area_code}.json"
+
+
+class JmaClient:
+    """気象庁 API 用の HTTP クライアント
+
+    requests.Session で接続を使い回し、ETag / Last-Modified をデータベースに
+    保存して条件付きリクエストを送る。304 の場合は保存済みの本文を返す。
+    検証子のない 200 応答ではキャッシュを削除し、条件付きでないリクエストへの 304 は
+    本文がないため requests.HTTPError にする。
+    """
+
+    def __init__(self, db=None, base_url=JMA_BASE_URL, pool_maxsize=10, timeout=10):
+        self.db = db
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        self._lock = threading.Lock()
+        self.counters = {
+            "requests": 0,
+            "requests_avoided": 0,  # 304 で本文のダウンロードを省略した回数
+            "bytes_downloaded": 0,
+            "bytes_saved": 0,
+        }
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self.counters[name] += delta
+
+    def stats(self):
+        """カウンタのスナップショットを返す"""
+        with self._lock:
+            return dict(self.counters)
+
+    def url_for(self, path):
+        return self.base_url + path
+
+    def fetch(self, path):
+        """本文（bytes）を取得。変更がなければキャッシュ済みの本文を返す"""
+        url = self.url_for(path)
+        cached = self.db.get_http_cache(url) if self.db else None
+
+        headers = {}
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        with METRICS.timer("http_request_seconds"):
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        METRICS.count("http_responses_total", status=response.status_code)
+
+        if response.status_code == 304:
+            if not cached:
+                # 条件付きリクエストを送っていないので、返せる本文がない
+                raise requests.HTTPError(
+                    f"条件付きリクエストでないのに 304 が返されました: {url}",
+                    response=response,
+                )
+            body = bytes(cached[2])
+            self._count(requests=1, requests_avoided=1, bytes_saved=len(body))
+            METRICS.count("http_bytes_saved_total", len(body))
+            self.db.touch_http_cache(url)
+            return body
+
+        response.raise_for_status()
+        body = response.content
+        self._count(requests=1, bytes_downloaded=len(body))
+        METRICS.count("http_response_bytes_total", len(body))
+
+        if self.db:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.db.save_http_cache(url, etag, last_modified, body)
+            elif cached:
+                # 検証子がなくなった場合、古い本文が 304 で返され続けないよう削除する
+                self.db.delete_http_cache(url)
+        return body
+
+    def fetch_json(self, path):
+        """JSON を取得してデコード"""
+        return json.loads(self.fetch(path))
+
+    def fetch_area_json(self):
+        """area.json の本文を取得"""
+        return self.fetch(AREA_PATH)
+
+    def fetch_forecast(self, area_code):
+        """地域の予報 JSON を取得"""
+        return self.fetch_json(FORECAST_PATH.format(area_code=area_code))
+
+    def fetch_forecast_raw(self, area_code):
+        """地域の予報 JSON の本文（bytes）を取得（raw_payloads に保存する場合に使う）"""
+        return self.fetch(FORECAST_PATH.format(area_code=area_code))
+
+    def close(self):
+        self.session.close()
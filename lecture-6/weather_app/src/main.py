@@ -1,4 +1,7 @@
+import os
+
 import flet as ft
+from metrics import METRICS, start_exporters
 from weather_app import WeatherApp
 
 
@@ -14,7 +17,13 @@ def main(page: ft.Page):
     page.window.resizable = True
     
     # 天気予報アプリを作成（まだデータを読み込まない）
-    app = WeatherApp()
+    # WEATHER_APP_READER_ONLY=1 の場合、予報の取り込みは ingest.py に任せる
+    app = WeatherApp(reader_only=os.environ.get("WEATHER_APP_READER_ONLY") == "1")
+    
+    # WEATHER_APP_METRICS=1 の場合は計測結果を出力する
+    METRICS.add_collector("read_cache", app.db.cache.stats)
+    METRICS.add_collector("http", app.client.stats)
+    start_exporters()
     
     # ページに追加
     page.add(app)
@@ -0,0 +1,88 @@
+"""weather_forecast.db の保守用コマンド
+
+使い方:
+    python maintenance.py compact [--db weather_forecast.db]
+    python maintenance.py retention [--keep-all-days 14] [--keep-daily-months 6]
+                                    [--batch-size 500] [--pause 0.05]
+"""
+import argparse
+import time
+
+from database import WeatherDatabase
+
+
+def print_size(result):
+    print(f"データベースサイズ: {result['size_before']:,} → {result['size_after']:,} バイト"
+          f"（{result['reclaimed']:,} バイト回収）")
+
+
+def measure_read_latency(db):
+    """全地域の最新予報と履歴 1 ページの取得にかかる 1 地域あたりの時間（ミリ秒）"""
+    area_codes = db.get_forecast_area_codes()
+    if not area_codes:
+        return 0.0
+
+    start = time.perf_counter()
+    for area_code in area_codes:
+        db.get_latest_forecast(area_code)
+        db.get_forecast_history_page(area_code)
+    return (time.perf_counter() - start) / len(area_codes) * 1000
+
+
+def compact(db, args):
+    """重複した予報をまとめて領域を回収"""
+    result = db.compact_duplicate_forecasts()
+    print(f"重複した予報を削除しました: {result['removed_forecasts']}件"
+          f"（予報詳細 {result['removed_details']}件）")
+    print_size(result)
+
+
+def retention(db, args):
+    """保持期間を過ぎた予報を間引き・集約して領域を回収"""
+    latency_before = measure_read_latency(db)
+    result = db.apply_retention(
+        keep_all_days=args.keep_all_days,
+        keep_daily_months=args.keep_daily_months,
+        batch_size=args.batch_size,
+        pause=args.pause,
+    )
+    latency_after = measure_read_latency(db)
+
+    print(f"1 日 1 件に間引いた予報: {result['downsampled_forecasts']}件")
+    print(f"日別サマリに集約した予報: {result['aggregated_forecasts']}件")
+    print(f"削除した予報詳細: {result['removed_details']}件"
+          f"、予報 JSON の本文: {result['removed_payloads']}件（VACUUM: {result['vacuum']}）")
+    print_size(result)
+    print(f"読み取り時間（1 地域あたり）: {latency_before:.3f} → {latency_after:.3f} ms")
+
+
+COMMANDS = {
+    "compact": compact,
+    "retention": retention,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weather_forecast.db の保守")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db", default="weather_forecast.db", help="データベースファイル")
+    parser.add_argument("--keep-all-days", type=int, default=14,
+                        help="retention: すべての予報を残す日数")
+    parser.add_argument("--keep-daily-months", type=int, default=6,
+                        help="retention: 1 日 1 件に間引いて残す月数（それ以前は日別サマリに集約）")
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="retention: 1 トランザクションで削除する予報の件数")
+    parser.add_argument("--pause", type=float, default=0.05,
+                        help="retention: バッチ間の待ち時間（秒）")
+    args = parser.parse_args()
+
+    # 保守の前後で読み取り時間を測るため、キャッシュは使わない
+    db = WeatherDatabase(args.db, pool_size=1, cache_size=0)
+    try:
+        COMMANDS[args.command](db, args)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
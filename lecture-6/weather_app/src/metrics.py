@@ -0,0 +1,252 @@
+"""処理時間・件数の計測
+
+WEATHER_APP_METRICS=1 のときだけ記録する。無効な場合、各メソッドは最初の判定だけで戻る
+（timer は共有の何もしないコンテキストマネージャを返す）。
+
+出力先（いずれも WEATHER_APP_METRICS=1 のときのみ）:
+    WEATHER_APP_METRICS_FILE=metrics.jsonl  一定間隔と終了時にスナップショットを JSON Lines で追記
+    WEATHER_APP_METRICS_INTERVAL=60         JSON Lines の書き込み間隔（秒）
+    WEATHER_APP_METRICS_PORT=9464           http://127.0.0.1:9464/metrics で Prometheus 形式を返す
+
+使い方:
+    from metrics import METRICS
+
+    with METRICS.timer("db_query_seconds", query="latest"):
+        ...
+    METRICS.count("http_response_bytes_total", len(body))
+
+    @METRICS.timed("render_seconds", view="forecast")
+    def display_weather(...):
+        ...
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PREFIX = "weather_app_"
+
+# ヒストグラムの上限値（秒）。Prometheus のヒストグラムと同じく累積で出力する
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class _NullTimer:
+    """計測が無効なときの timer（何もしない）"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.start
+        self.metrics.observe(self.name, self.elapsed, **self.labels)
+        return False
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items())) if labels else ()
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in items) + "}"
+
+
+class Metrics:
+    """カウンタとヒストグラムを保持するスレッドセーフな記録先"""
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._counters = {}    # (name, labels) -> 合計
+        self._histograms = {}  # (name, labels) -> [バケットごとの件数..., 合計, 件数]
+        self._collectors = []  # (名前の接頭辞, 数値の辞書を返す関数)
+        self._lock = threading.Lock()
+
+    def count(self, name, value=1, **labels):
+        """カウンタに value を加算"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """ヒストグラムに値（秒など）を記録"""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            histogram[bisect_left(self.buckets, value)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def timer(self, name, **labels):
+        """with 文の処理時間をヒストグラムに記録するコンテキストマネージャ"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def timed(self, name, **labels):
+        """関数の処理時間をヒストグラムに記録するデコレータ"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    def add_collector(self, prefix, stats):
+        """出力時に stats() の数値をゲージとして加える（ReadCache.stats、JmaClient.stats など）"""
+        with self._lock:
+            self._collectors.append((prefix, stats))
+
+    def _gauges(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        gauges = {}
+        for prefix, stats in collectors:
+            for name, value in stats().items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{prefix}_{name}"] = value
+        return gauges
+
+    def snapshot(self):
+        """現在の値を JSON に変換できる辞書で返す"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        def name_of(key):
+            return key[0] + _format_labels(key[1])
+
+        result = {
+            "time": time.time(),
+            "counters": {name_of(key): value for key, value in counters.items()},
+            "histograms": {},
+            "gauges": self._gauges(),
+        }
+        for key, histogram in histograms.items():
+            count = histogram[-1]
+            result["histograms"][name_of(key)] = {
+                "count": count,
+                "sum": histogram[-2],
+                "mean": histogram[-2] / count if count else 0.0,
+                "buckets": dict(zip([*map(str, self.buckets), "+Inf"], histogram[:-2])),
+            }
+        return result
+
+    def to_prometheus(self):
+        """Prometheus のテキスト形式で出力"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        lines = []
+
+        for (name, labels), value in counters:
+            lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            cumulative = 0
+            for bound, count in zip([*map(str, self.buckets), "+Inf"], histogram[:-2]):
+                cumulative += count
+                lines.append(
+                    f"{PREFIX}{name}_bucket{_format_labels(labels, ('le', bound))} {cumulative}"
+                )
+            lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {histogram[-2]}")
+            lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {histogram[-1]}")
+
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"{PREFIX}{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, path):
+        """スナップショットを JSON Lines ファイルに 1 行追記"""
+        line = json.dumps(self.snapshot(), ensure_ascii=False)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def serve(self, port, host="127.0.0.1"):
+        """/metrics で Prometheus 形式を返す HTTP サーバをバックグラウンドで起動"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+METRICS = Metrics(enabled=os.environ.get("WEATHER_APP_METRICS") == "1")
+
+
+def start_exporters(environ=os.environ):
+    """環境変数で指定された出力先を開始（計測が無効なら何もしない）"""
+    if not METRICS.enabled:
+        return
+
+    path = environ.get("WEATHER_APP_METRICS_FILE")
+    if path:
+        interval = float(environ.get("WEATHER_APP_METRICS_INTERVAL", "60"))
+
+        def write_periodically():
+            while True:
+                time.sleep(interval)
+                METRICS.write_jsonl(path)
+
+        threading.Thread(target=write_periodically, daemon=True).start()
+        atexit.register(METRICS.write_jsonl, path)
+        print(f"計測結果を {path} に書き込みます（{interval:g} 秒ごと）")
+
+    port = environ.get("WEATHER_APP_METRICS_PORT")
+    if port:
+        METRICS.serve(int(port))
+        print(f"計測結果を http://127.0.0.1:{port}/metrics で公開しています")
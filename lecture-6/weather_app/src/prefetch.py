@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from forecast_parser import parse_forecast_columns, parse_pop_steps, to_weather_list
+from freshness import JST, RETRY_INTERVAL, needs_refresh, next_publish_time
+from jma_client import JMA_BASE_URL, JmaClient
+
+
+def parse_for_storage(data, area_code, full=True):
+    """予報 JSON を save_forecast に渡す (weather_list, columns, pop_steps) に変換"""
+    columns = parse_forecast_columns(data, area_code, max_areas=None if full else 1)
+    pop_steps = parse_pop_steps(data, area_code) if full else None
+    return to_weather_list(columns), columns if full else None, pop_steps
+
+
+def store_forecast(db, area_code, data, full=True):
+    """予報 JSON を解析してデータベースに保存
+
+    data には取得した本文（bytes）またはデコード済みの JSON を渡す。
+    本文を渡した場合は raw_payloads にも圧縮して保存し、後から解析し直せるようにする。
+    full=True の場合は全細分区域・全日付・6 時間降水確率も保存する。
+    戻り値は (forecast_id, publishing_office, weather_list)。データ不足なら None。
+    """
+    raw_payload = None
+    if isinstance(data, bytes):
+        raw_payload = data
+        data = json.loads(raw_payload)
+    if not data or len(data) < 2:
+        return None
+
+    weather_list, columns, pop_steps = parse_for_storage(data, area_code, full)
+    publishing_office = data[0].get("publishingOffice", "")
+
+    forecast_id = db.save_forecast(
+        area_code, publishing_office, weather_list,
+        columns=columns,
+        pop_steps=pop_steps,
+        report_datetime=data[0].get("reportDatetime"),
+        raw_payload=raw_payload,
+    )
+    return forecast_id, publishing_office, weather_list
+
+
+class RateLimiter:
+    """リクエストの送信間隔を一定に保つスレッドセーフなレートリミッタ"""
+
+    def __init__(self, rate):
+        """rate は 1 秒あたりの最大リクエスト数（0 または None で無制限）"""
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """次の送信枠まで待機"""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ForecastPrefetcher:
+    """全地域の天気予報を並行して取得しデータベースに保存する"""
+
+    def __init__(self, db, area_codes, max_workers=8, rate_limit=10.0,
+                 client=None, base_url=JMA_BASE_URL, full=True):
+        self.db = db
+        self.area_codes = sorted(area_codes)
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate_limit)
+        self.client = client or JmaClient(db, base_url=base_url, pool_maxsize=max_workers)
+        self.full = full
+
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """まだ開始していない取得を中止"""
+        self._stop_event.set()
+
+    def is_fresh(self, area_code):
+        """データベースの予報より新しい報がまだ発表されていないか"""
+        latest = self.db.get_latest_forecast(area_code)
+        if not latest:
+            return False
+        return not needs_refresh(latest["report_datetime"], latest["observed_at"])
+
+    def fetch(self, area_code):
+        """1 地域分の予報 JSON の本文（bytes）を取得"""
+        self.limiter.wait()
+        return self.client.fetch_forecast_raw(area_code)
+
+    def prefetch_one(self, area_code):
+        """1 地域分を取得して保存し、結果の種別を返す"""
+        if self._stop_event.is_set():
+            return "cancelled"
+        if self.is_fresh(area_code):
+            return "skipped"
+
+        if store_forecast(self.db, area_code, self.fetch(area_code), self.full) is None:
+            return "empty"
+        return "saved"
+
+    def run(self):
+        """全地域を取得して件数の集計を返す"""
+        stats = {"saved": 0, "skipped": 0, "empty": 0, "cancelled": 0, "failed": 0}
+        start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self.prefetch_one, area_code): area_code
+                for area_code in self.area_codes
+            }
+            for future in as_completed(futures):
+                try:
+                    stats[future.result()] += 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"予報の先読みに失敗しました（{futures[future]}）: {e}")
+
+        stats["elapsed"] = time.perf_counter() - start
+        print(f"予報の先読みが完了しました: {stats} HTTP: {self.client.stats()}")
+        return stats
+
+    def stale_areas(self):
+        """最新の定時発表より前の報しか保存されていない地域（未保存の地域を含む）
+
+        再取得の待ち時間（RETRY_INTERVAL）の内側かどうかは問わない。
+        """
+        stale = []
+        for area_code in self.area_codes:
+            latest = self.db.get_latest_forecast(area_code)
+            if not latest or needs_refresh(latest["report_datetime"]):
+                stale.append(area_code)
+        return stale
+
+    def run_forever(self):
+        """定時発表の直後ごとに run() を繰り返す（stop() で終了）
+
+        発表の反映が遅れて古い報しか得られなかった地域が残っている間は、
+        次の定時発表を待たずに RETRY_INTERVAL ごとに取り直す。
+        """
+        while not self._stop_event.is_set():
+            self.run()
+            wait = (next_publish_time() - datetime.now(JST)).total_seconds()
+            stale = self.stale_areas()
+            if stale and wait > RETRY_INTERVAL.total_seconds():
+                wait = RETRY_INTERVAL.total_seconds()
+                print(f"{len(stale)} 地域が最新の発表を取得できていないため、"
+                      f"{wait / 60:.0f} 分後に再取得します")
+            else:
+                print(f"次の先読みまで {wait / 60:.0f} 分待機します")
+            if self._stop_event.wait(max(wait, 1)):
+                break
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache:
+    """件数上限（LRU）と有効期限（TTL）付きのスレッドセーフな読み取りキャッシュ
+
+    キャッシュした値は呼び出し側で共有されるため、変更せずに読み取り専用として扱う。
+    """
+
+    def __init__(self, max_entries=256, ttl=300.0):
+        """max_entries=0 の場合はキャッシュしない。ttl は秒（None で無期限）"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        # 読み込み中のキー -> [読み込み中の数, 世代]。読み込み中に無効化されたキーは世代を進め、
+        # 読み込みを始めたときと世代が違う値は保存しない（無効化されていないキーの読み込みは捨てない）
+        self._loading = {}
+        self.counters = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,     # 件数上限で追い出した数
+            "expirations": 0,   # TTL 切れで捨てた数
+            "invalidations": 0, # 書き込みにより無効化した数
+            "stale_drops": 0,   # 読み込み中に無効化されたため保存しなかった数
+        }
+
+    def get(self, key, loader):
+        """key の値を返す。なければ loader() の結果を保存して返す
+
+        loader が None を返した場合（データなし）は保存しない。
+        loader の実行中にこのキーが無効化された場合は、古い値の可能性があるため結果を返すだけで保存しない。
+        """
+        if self.max_entries <= 0:
+            return loader()
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.counters["expirations"] += 1
+            self.counters["misses"] += 1
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            generation = loading[1]
+
+        value = None
+        try:
+            value = loader()
+        finally:
+            expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+            with self._lock:
+                loading = self._loading[key]
+                loading[0] -= 1
+                if not loading[0]:
+                    del self._loading[key]
+                if value is not None:
+                    if loading[1] != generation:
+                        self.counters["stale_drops"] += 1
+                    else:
+                        self._store(key, value, expires_at)
+        return value
+
+    def put(self, key, value):
+        """値を保存し、上限を超えた分を古い順に追い出す"""
+        if self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._store(key, value, expires_at)
+
+    def _store(self, key, value, expires_at):
+        """ロックを取得した状態で呼ぶ"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _discard(self, key):
+        """キーのエントリを捨て、読み込み中であれば結果を保存しないようにする（ロック内で呼ぶ）"""
+        loading = self._loading.get(key)
+        if loading is not None:
+            loading[1] += 1
+        if self._entries.pop(key, None) is not None:
+            self.counters["invalidations"] += 1
+
+    def invalidate(self, *keys):
+        """指定したキーを無効化"""
+        with self._lock:
+            for key in keys:
+                self._discard(key)
+
+    def invalidate_matching(self, predicate):
+        """predicate(key) が真になるキーをすべて無効化"""
+        with self._lock:
+            for key in [key for key in {*self._entries, *self._loading} if predicate(key)]:
+                self._discard(key)
+
+    def clear(self):
+        """すべてのエントリを破棄（読み込み中の値も保存しない）"""
+        with self._lock:
+            for loading in self._loading.values():
+                loading[1] += 1
+            self.counters["invalidations"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """カウンタと現在の件数・ヒット率のスナップショットを返す"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,99 @@
+"""raw_payloads に保存した予報 JSON を解析し直し、予報詳細を作り直すコマンド
+
+パーサを改善した後に、過去の予報を取得し直さずに forecast_details などへ反映する。
+本文は chunk_size 件ずつ読み出して展開・解析し、チャンクごとに 1 トランザクションで書き込む。
+本文の数が --parallel-threshold 以上の場合は、展開と解析を複数のプロセスで行う。
+
+使い方:
+    python reingest.py [--db weather_forecast.db] [--area 130000] [--workers 4]
+                       [--chunk-size 200] [--parallel-threshold 1000] [--rebuild-stats]
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from database import WeatherDatabase, decompress_payload
+from prefetch import parse_for_storage
+
+
+def parse_chunk(chunk):
+    """(forecast_id, area_code, codec, payload) のリストを rebuild_forecasts に渡す形に変換"""
+    parsed = []
+    for forecast_id, area_code, codec, payload in chunk:
+        data = json.loads(decompress_payload(codec, payload))
+        if not data or len(data) < 2:
+            continue
+        parsed.append((forecast_id, *parse_for_storage(data, area_code)))
+    return parsed
+
+
+def reingest(db, area_code=None, workers=None, chunk_size=200, parallel_threshold=1000):
+    """アーカイブから予報詳細を作り直し、件数と所要時間を返す
+
+    同じ予報に対応する本文が複数ある場合は、後から保存した本文の結果が残る。
+    """
+    workers = workers or os.cpu_count() or 1
+    payloads = sum(stats["payloads"] for stats in db.get_archive_stats().values())
+    parallel = workers > 1 and payloads >= parallel_threshold
+
+    result = {"payloads": 0, "rebuilt": 0, "workers": workers if parallel else 1}
+    start = time.perf_counter()
+    chunks = db.iter_raw_payloads(area_code=area_code, chunk_size=chunk_size)
+
+    def write(parsed):
+        result["rebuilt"] += db.rebuild_forecasts(parsed)
+
+    if not parallel:
+        for chunk in chunks:
+            result["payloads"] += len(chunk)
+            write(parse_chunk(chunk))
+    else:
+        # 読み出し済みのチャンクを workers * 2 件までに抑え、書き込みは読み出した順に行う
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for chunk in chunks:
+                result["payloads"] += len(chunk)
+                pending.append(executor.submit(parse_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="アーカイブからの予報詳細の再作成")
+    parser.add_argument("--db", default="weather_forecast.db", help="データベースファイル")
+    parser.add_argument("--area", help="対象の地域コード（省略時は全地域）")
+    parser.add_argument("--workers", type=int, help="解析に使うプロセス数（省略時は CPU 数）")
+    parser.add_argument("--chunk-size", type=int, default=200,
+                        help="1 回に読み出して 1 トランザクションで書き込む本文の数")
+    parser.add_argument("--parallel-threshold", type=int, default=1000,
+                        help="この数以上の本文がある場合に複数のプロセスで解析する")
+    parser.add_argument("--rebuild-stats", action="store_true",
+                        help="予報の変化の集計も作り直す（保持期間で削除した予報は集計から外れる）")
+    args = parser.parse_args()
+
+    db = WeatherDatabase(args.db, pool_size=1, cache_size=0)
+    try:
+        for codec, stats in db.get_archive_stats().items():
+            print(f"アーカイブ（{codec}）: {stats['payloads']}件 "
+                  f"{stats['raw_bytes']:,} → {stats['stored_bytes']:,} バイト")
+        result = reingest(db, args.area, args.workers, args.chunk_size, args.parallel_threshold)
+        print(f"予報詳細を作り直しました: {result['rebuilt']}件"
+              f"（本文 {result['payloads']}件、{result['workers']} プロセス、"
+              f"{result['elapsed']:.1f} 秒）")
+        if args.rebuild_stats:
+            rows = db.rebuild_forecast_date_stats(args.area)
+            print(f"予報の変化の集計を作り直しました（予報詳細 {rows}件）")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,267 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import deque
+
 import flet as ft
-import requests
-import sqlite3
 from datetime import datetime
 
-class WeatherDatabase:
-    """SQLite データベース管理クラス"""
-    
-    def __init__(self, db_path="weather_forecast.db"):
-        self.db_path = db_path
-        self.init_database()
-    
-    def init_database(self):
-        """データベーステーブルの作成"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # 1. 地域情報テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS areas (
-                area_code TEXT PRIMARY KEY,
-                area_name TEXT NOT NULL,
-                center_code TEXT,
-                center_name TEXT,
-                created_at TEXT NOT NULL
-            )
-        """)
-        
-        # 2. 予報情報テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS forecasts (
-                forecast_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                area_code TEXT NOT NULL,
-                publishing_office TEXT,
-                report_datetime TEXT NOT NULL,
-                fetched_at TEXT NOT NULL
-            )
-        """)
-        
-        # 3. 予報詳細テーブル
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS forecast_details (
-                detail_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                forecast_id INTEGER NOT NULL,
-                forecast_date TEXT NOT NULL,
-                weather_text TEXT,
-                weather_code TEXT,
-                temp_min TEXT,
-                temp_max TEXT,
-                FOREIGN KEY (forecast_id) REFERENCES forecasts(forecast_id),
-                UNIQUE(forecast_id, forecast_date)
-            )
-        """)
-        
-        # インデックスの作成
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_area_code 
-            ON forecasts(area_code)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_forecast_date 
-            ON forecast_details(forecast_date)
-        """)
-        
-        conn.commit()
-        conn.close()
-    
-    def save_area(self, area_code, area_name, center_code=None, center_name=None):
-        """地域情報をデータベースに保存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT OR IGNORE INTO areas 
-                (area_code, area_name, center_code, center_name, created_at)
-                VALUES (?, ?, ?, ?, ?)
-            """, (area_code, area_name, center_code, center_name, 
-                  datetime.now().isoformat()))
-            conn.commit()
-        finally:
-            conn.close()
-    
-    def save_forecast(self, area_code, publishing_office, weather_list):
-        """天気予報をデータベースに保存"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            fetched_at = datetime.now().isoformat()
-            cursor.execute("""
-                INSERT INTO forecasts 
-                (area_code, publishing_office, report_datetime, fetched_at)
-                VALUES (?, ?, ?, ?)
-            """, (area_code, publishing_office, fetched_at, fetched_at))
-            
-            forecast_id = cursor.lastrowid
-            
-            for item in weather_list:
-                cursor.execute("""
-                    INSERT INTO forecast_details
-                    (forecast_id, forecast_date, weather_text, weather_code, temp_min, temp_max)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    forecast_id,
-                    item["date"],
-                    item["weather"],
-                    item.get("weather_code", ""),
-                    item["temp_min"],
-                    item["temp_max"]
-                ))
-            
-            conn.commit()
-            return forecast_id
-        finally:
-            conn.close()
-    
-    def get_latest_forecast(self, area_code):
-        """最新の天気予報をデータベースから取得"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                SELECT forecast_id, publishing_office, fetched_at
-                FROM forecasts
-                WHERE area_code = ?
-                ORDER BY fetched_at DESC
-                LIMIT 1
-            """, (area_code,))
-            
-            result = cursor.fetchone()
-            if not result:
-                return None
-            
-            forecast_id, publishing_office, fetched_at = result
-            
-            cursor.execute("""
-                SELECT forecast_date, weather_text, weather_code, temp_min, temp_max
-                FROM forecast_details
-                WHERE forecast_id = ?
-                ORDER BY forecast_date
-            """, (forecast_id,))
-            
-            details = cursor.fetchall()
-            
-            weather_list = []
-            for row in details:
-                weather_list.append({
-                    "date": row[0],
-                    "weather": row[1],
-                    "weather_code": row[2],
-                    "temp_min": row[3],
-                    "temp_max": row[4]
-                })
-            
-            return {
-                "forecast_id": forecast_id,
-                "publishing_office": publishing_office,
-                "fetched_at": fetched_at,
-                "weather_list": weather_list
-            }
-        finally:
-            conn.close()
-    
-    def get_forecast_history(self, area_code):
-        """過去の予報履歴を取得"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                SELECT forecast_id, fetched_at, publishing_office
-                FROM forecasts
-                WHERE area_code = ?
-                ORDER BY fetched_at DESC
-                LIMIT 10
-            """, (area_code,))
-            
-            return cursor.fetchall()
-        finally:
-            conn.close()
-    
-    def get_forecast_by_id(self, forecast_id):
-        """指定されたforecast_idの予報を取得"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                SELECT publishing_office, fetched_at
-                FROM forecasts
-                WHERE forecast_id = ?
-            """, (forecast_id,))
-            
-            result = cursor.fetchone()
-            if not result:
-                return None
-            
-            publishing_office, fetched_at = result
-            
-            cursor.execute("""
-                SELECT forecast_date, weather_text, weather_code, temp_min, temp_max
-                FROM forecast_details
-                WHERE forecast_id = ?
-                ORDER BY forecast_date
-            """, (forecast_id,))
-            
-            details = cursor.fetchall()
-            
-            weather_list = []
-            for row in details:
-                weather_list.append({
-                    "date": row[0],
-                    "weather": row[1],
-                    "weather_code": row[2],
-                    "temp_min": row[3],
-                    "temp_max": row[4]
-                })
-            
-            return {
-                "forecast_id": forecast_id,
-                "publishing_office": publishing_office,
-                "fetched_at": fetched_at,
-                "weather_list": weather_list
-            }
-        finally:
-            conn.close()
+from area_codes import VALID_AREA_CODES
+from area_search import AreaSearchIndex
+from areas import parse_area_json
+from database import WeatherDatabase
+from freshness import needs_refresh
+from jma_client import JmaClient
+from metrics import METRICS, start_exporters
+from prefetch import ForecastPrefetcher, store_forecast
+from weather_card import WeatherCard
 
 
 class WeatherApp(ft.Row):
     """気象庁APIを使用した天気予報アプリケーション（データベース対応版）"""
     
-    VALID_AREA_CODES = {
-        "011000", "012000", "013000", "014030", "014100", "015000", "016000", "017000",
-        "020000", "030000", "040000", "050000", "060000", "070000",
-        "080000", "090000", "100000", "110000", "120000", "130000", "140000", "190000", "200000",
-        "210000", "220000", "230000", "240000",
-        "150000", "160000", "170000", "180000",
-        "250000", "260000", "270000", "280000", "290000", "300000",
-        "310000", "320000", "330000", "340000",
-        "360000", "370000", "380000", "390000",
-        "350000", "400000", "410000", "420000", "430000", "440000",
-        "450000", "460040", "460100",
-        "471000", "472000", "473000", "474000"
-    }
-    
-    def __init__(self):
+    VALID_AREA_CODES = VALID_AREA_CODES
+    
+    # 古い予報を即座に表示し、バックグラウンドで更新を確認する（stale-while-revalidate）
+    STALE_WHILE_REVALIDATE = True
+    
+    # 履歴プルダウンに 1 回で読み込む件数と「さらに読み込む」項目のキー
+    HISTORY_PAGE_SIZE = 10
+    LOAD_MORE_KEY = "load_more"
+    
+    # サイドバーの検索結果を 1 回に表示する件数
+    SIDEBAR_PAGE_SIZE = 50
+    
+    def __init__(self, db=None, client=None, reader_only=False):
+        """reader_only=True の場合は予報の取り込みを ingest.py に任せ、データベースを読むだけにする
+
+        このモードではデータベースに一切書き込まず、ほかのプロセスの書き込みを
+        検出してキャッシュを破棄する。
+        """
         super().__init__()
         self.expand = True
         self.spacing = 0
         
         self.area_data = {}
         self.selected_area_code = None
+        
+        # サイドバーの検索索引・地方の項目・検索結果（render_sidebar で作成）
+        self.area_index = None
+        self.center_tiles = []
+        self.search_results = []
+        self.sidebar_lock = threading.Lock()
         self.current_forecast_id = None
         
-        self.db = WeatherDatabase()
+        # 履歴プルダウンに読み込み済みの行と次のページのカーソル
+        self.history_area_code = None
+        self.history_rows = []
+        self.history_cursor = None
+        
+        self.db = db or WeatherDatabase(read_only=reader_only, watch_external_writes=reader_only)
+        # 読むだけのモードでは HTTP キャッシュの検証子もデータベースに保存しない
+        self.client = client or JmaClient(None if reader_only else self.db)
+        self.prefetcher = None
+        self.reader_only = reader_only
+        
+        # 地域を選択するたびに増える要求番号。古い要求の結果は表示しない
+        self.request_id = 0
+        self.render_lock = threading.Lock()
+        
+        # 地域選択から予報の初回表示までの時間（ミリ秒、直近 100 件）
+        self.first_paint_ms = deque(maxlen=100)
+        
+        # 予報の表示部分（初回の表示時に作成し、以降は値だけを書き換える）
+        self.forecast_view = None
+        self.cards_by_date = {}
+        self.history_options = {}
         
         self.init_ui()
     
     def init_ui(self):
         """UIコンポーネントの初期化"""
         
+        self.search_field = ft.TextField(
+            hint_text="地域名・よみ・コードで検索",
+            prefix_icon=ft.Icons.SEARCH,
+            dense=True,
+            color=ft.Colors.WHITE,
+            hint_style=ft.TextStyle(color=ft.Colors.WHITE54),
+            border_color=ft.Colors.WHITE24,
+            focused_border_color=ft.Colors.WHITE70,
+            on_change=lambda e: self.on_search_changed(e.control.value),
+        )
+        
+        # 画面に見えている項目だけが描画される ListView（検索結果は末尾までスクロールしたら追加する）
+        self.area_list = ft.ListView(
+            controls=[],
+            spacing=0,
+            expand=True,
+            build_controls_on_demand=True,
+            on_scroll_interval=100,
+            on_scroll=self.on_area_list_scroll,
+        )
+        
         self.sidebar = ft.Container(
             content=ft.Column(
                 controls=[
@@ -291,11 +132,11 @@ class WeatherApp(ft.Row):
                         padding=ft.padding.only(left=20, top=15, bottom=5),
                     ),
                     ft.Container(
-                        content=ft.Column(
-                            controls=[],
-                            spacing=0,
-                            scroll=ft.ScrollMode.AUTO,
-                        ),
+                        content=self.search_field,
+                        padding=ft.padding.only(left=15, right=15, bottom=10),
+                    ),
+                    ft.Container(
+                        content=self.area_list,
                         expand=True,
                     ),
                 ],
@@ -330,431 +171,588 @@ class WeatherApp(ft.Row):
             self.main_content,
         ]
     
+    @METRICS.timed("load_area_data_seconds")
     def load_area_data(self):
-        """気象庁APIから地域データを取得"""
+        """地域データを読み込み（保存済みのデータがあれば即座に表示）"""
         try:
-            url = "http://www.jma.go.jp/bosai/common/const/area.json"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            centers = data.get("centers", {})
-            offices = data.get("offices", {})
-            
-            expansion_tiles = []
-            self.area_data = {}
+            cached_area_data = self.db.get_area_data()
+            
+            if cached_area_data:
+                print(f"保存済みの地域データを表示しました（{len(cached_area_data)}地方）")
+                self.render_sidebar(cached_area_data)
+                # 最新の area.json との差分はバックグラウンドで反映
+                # （読むだけのモードでは ingest.py が保存した地域情報をそのまま使う）
+                if not self.reader_only:
+                    self.page.run_thread(self.refresh_area_data)
+            else:
+                self.refresh_area_data()
             
-            for center_code, center_info in centers.items():
-                center_name = center_info.get("name", "")
-                office_codes = center_info.get("children", [])
-                office_list = []
-                
-                for office_code in office_codes:
-                    if office_code in offices and office_code in self.VALID_AREA_CODES:
-                        office_name = offices[office_code].get("name", "")
-                        office_list.append({
-                            "code": office_code,
-                            "name": office_name
-                        })
-                        
-                        self.db.save_area(office_code, office_name, center_code, center_name)
-                
-                if not office_list:
-                    continue
-                
-                self.area_data[center_code] = {
-                    "name": center_name,
-                    "offices": office_list
-                }
-                
-                office_tiles = []
-                for office in office_list:
-                    tile = ft.Container(
-                        content=ft.Column(
-                            controls=[
-                                ft.Text(
-                                    office["name"],
-                                    size=15,
-                                    color=ft.Colors.WHITE,
-                                    weight=ft.FontWeight.W_400,
-                                ),
-                                ft.Text(
-                                    office["code"],
-                                    size=12,
-                                    color=ft.Colors.WHITE54,
-                                ),
-                            ],
-                            spacing=3,
-                            horizontal_alignment=ft.CrossAxisAlignment.START,
-                        ),
-                        padding=ft.padding.only(left=20, top=10, bottom=10, right=20),
-                        bgcolor=ft.Colors.BLUE_GREY_700,
-                        alignment=ft.alignment.center_left,
-                        on_click=lambda e, code=office["code"]: self.show_weather_forecast(code),
-                    )
-                    office_tiles.append(tile)
-                
-                expansion = ft.ExpansionTile(
-                    title=ft.Column(
-                        controls=[
-                            ft.Text(
-                                center_name,
-                                size=15,
-                                weight=ft.FontWeight.W_500,
-                                color=ft.Colors.WHITE,
-                            ),
-                            ft.Text(
-                                center_code,
-                                size=12,
-                                color=ft.Colors.WHITE54,
-                            ),
-                        ],
-                        spacing=3,
-                        horizontal_alignment=ft.CrossAxisAlignment.START,
-                    ),
-                    initially_expanded=False,
-                    controls=office_tiles,
-                    bgcolor=ft.Colors.BLUE_GREY_800,
-                    collapsed_bgcolor=ft.Colors.BLUE_GREY_800,
-                    text_color=ft.Colors.WHITE,
-                    icon_color=ft.Colors.WHITE70,
-                    controls_padding=ft.padding.all(0),
+            # 全地域の予報を先読みして、クリック時はデータベースから表示できるようにする
+            # （以降は定時発表の直後ごとに更新）
+            if not self.reader_only:
+                self.prefetcher = ForecastPrefetcher(
+                    self.db, self.VALID_AREA_CODES, client=self.client
                 )
-                expansion_tiles.append(expansion)
-            
-            sidebar_column = self.sidebar.content.controls[3].content
-            sidebar_column.controls = expansion_tiles
-            self.update()
+                threading.Thread(target=self.prefetcher.run_forever, daemon=True).start()
             
         except Exception as e:
             print(f"地域データの取得に失敗しました: {e}")
             self.show_error("地域データの取得に失敗しました")
     
-    def show_weather_forecast(self, area_code):
-        """選択された地域の天気予報を表示"""
+    def refresh_area_data(self):
+        """気象庁APIから地域データを取得し、変更があればサイドバーを更新"""
         try:
-            self.selected_area_code = area_code
-            
-            db_data = self.db.get_latest_forecast(area_code)
+            content = self.client.fetch_area_json()
+            area_data, area_rows = parse_area_json(json.loads(content), self.VALID_AREA_CODES)
             
-            if db_data:
-                fetched_time = datetime.fromisoformat(db_data["fetched_at"])
-                age = (datetime.now() - fetched_time).total_seconds() / 3600
-                
-                if age < 1:
-                    print(f"データベースからデータを取得しました（{age:.1f}時間前）")
-                    self.current_forecast_id = db_data["forecast_id"]
-                    self.display_weather(
-                        db_data["publishing_office"],
-                        db_data["weather_list"],
-                        db_data["fetched_at"]
-                    )
-                    return
+            is_initial = not self.area_data
+            if area_data != self.area_data:
+                self.render_sidebar(area_data)
             
-            print("気象庁APIからデータを取得しています")
-            url = f"https://www.jma.go.jp/bosai/forecast/data/forecast/{area_code}.json"
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            if self.reader_only:
+                return
             
-            data = response.json()
+            content_hash = hashlib.sha256(content).hexdigest()
+            if is_initial:
+                # 初回はサイドバー表示後に地域情報をバックグラウンドで一括保存
+                self.page.run_thread(self.save_area_rows, area_rows, content_hash)
+            else:
+                self.save_area_rows(area_rows, content_hash)
             
-            if not data or len(data) < 2:
-                self.show_error("天気予報データが見つかりませんでした")
+        except Exception as e:
+            print(f"地域データの取得に失敗しました: {e}")
+            if not self.area_data:
+                self.show_error("地域データの取得に失敗しました")
+    
+    def build_office_tile(self, office):
+        """官署 1 件の項目を作成"""
+        return ft.Container(
+            content=ft.Column(
+                controls=[
+                    ft.Text(
+                        office["name"],
+                        size=15,
+                        color=ft.Colors.WHITE,
+                        weight=ft.FontWeight.W_400,
+                    ),
+                    ft.Text(
+                        office["code"],
+                        size=12,
+                        color=ft.Colors.WHITE54,
+                    ),
+                ],
+                spacing=3,
+                horizontal_alignment=ft.CrossAxisAlignment.START,
+            ),
+            padding=ft.padding.only(left=20, top=10, bottom=10, right=20),
+            bgcolor=ft.Colors.BLUE_GREY_700,
+            alignment=ft.alignment.center_left,
+            on_click=lambda e, code=office["code"]: self.on_area_clicked(code),
+        )
+    
+    def build_sidebar_tiles(self, area_data):
+        """地方ごとの ExpansionTile を作成（官署の項目は地方を開いたときに作成する）"""
+        expansion_tiles = []
+        
+        for center_code, center in area_data.items():
+            expansion = ft.ExpansionTile(
+                title=ft.Column(
+                    controls=[
+                        ft.Text(
+                            center["name"],
+                            size=15,
+                            weight=ft.FontWeight.W_500,
+                            color=ft.Colors.WHITE,
+                        ),
+                        ft.Text(
+                            center_code,
+                            size=12,
+                            color=ft.Colors.WHITE54,
+                        ),
+                    ],
+                    spacing=3,
+                    horizontal_alignment=ft.CrossAxisAlignment.START,
+                ),
+                initially_expanded=False,
+                controls=[],
+                bgcolor=ft.Colors.BLUE_GREY_800,
+                collapsed_bgcolor=ft.Colors.BLUE_GREY_800,
+                text_color=ft.Colors.WHITE,
+                icon_color=ft.Colors.WHITE70,
+                controls_padding=ft.padding.all(0),
+            )
+            expansion.on_change = (
+                lambda e, tile=expansion, offices=center["offices"]:
+                    self.on_center_expanded(tile, offices, e.data == "true")
+            )
+            expansion_tiles.append(expansion)
+        
+        return expansion_tiles
+    
+    def on_center_expanded(self, tile, offices, expanded):
+        """地方を初めて開いたときに官署の項目を作成"""
+        if not expanded or tile.controls:
+            return
+        tile.controls = [self.build_office_tile(office) for office in offices]
+        tile.update()
+    
+    @METRICS.timed("render_seconds", view="sidebar")
+    def render_sidebar(self, area_data):
+        """サイドバーを地域データで描画"""
+        self.area_data = area_data
+        self.area_index = AreaSearchIndex(area_data)
+        self.center_tiles = self.build_sidebar_tiles(area_data)
+        with self.sidebar_lock:
+            self.show_sidebar_items(self.search_field.value)
+    
+    def show_sidebar_items(self, query):
+        """検索語が空なら地方の一覧、あれば一致した官署の先頭 1 ページを表示"""
+        query = (query or "").strip()
+        if query:
+            self.search_results = self.area_index.search(query)
+            self.area_list.controls = [
+                self.build_office_tile(office)
+                for office in self.search_results[:self.SIDEBAR_PAGE_SIZE]
+            ]
+            if not self.search_results:
+                self.area_list.controls = [
+                    ft.Container(
+                        content=ft.Text("一致する地域がありません", size=14, color=ft.Colors.WHITE54),
+                        padding=20,
+                    )
+                ]
+        else:
+            self.search_results = []
+            self.area_list.controls = self.center_tiles
+        self.update()
+    
+    def on_search_changed(self, query):
+        """検索欄の入力ごとに前方一致で絞り込む"""
+        if self.area_index is None:
+            return
+        with self.sidebar_lock:
+            self.show_sidebar_items(query)
+    
+    def on_area_list_scroll(self, e):
+        """検索結果の末尾近くまでスクロールしたら次のページを追加"""
+        if e.pixels is None or e.max_scroll_extent is None:
+            return
+        if e.max_scroll_extent - e.pixels > e.viewport_dimension:
+            return
+        with self.sidebar_lock:
+            shown = len(self.area_list.controls)
+            if not self.search_results or shown >= len(self.search_results):
                 return
+            self.area_list.controls.extend(
+                self.build_office_tile(office)
+                for office in self.search_results[shown:shown + self.SIDEBAR_PAGE_SIZE]
+            )
+            self.area_list.update()
+    
+    def save_area_rows(self, area_rows, content_hash):
+        """地域情報をデータベースに一括保存"""
+        try:
+            if self.db.save_areas(area_rows, content_hash):
+                print(f"地域情報を保存しました（{len(area_rows)}件）")
+        except Exception as e:
+            print(f"地域情報の保存に失敗しました: {e}")
+    
+    def on_area_clicked(self, area_code):
+        """地域選択時の処理（読み込み中の表示だけを行い、取得はバックグラウンドで行う）"""
+        started = time.perf_counter()
+        with self.render_lock:
+            self.request_id += 1
+            request_id = self.request_id
+            self.selected_area_code = area_code
+            self.show_loading(area_code)
+        
+        self.page.run_thread(self.show_weather_forecast, area_code, request_id, started)
+    
+    def is_current(self, request_id):
+        """要求がまだ最新か（後から別の地域が選ばれていないか）"""
+        return request_id == self.request_id
+    
+    @METRICS.timed("show_forecast_seconds")
+    def show_weather_forecast(self, area_code, request_id, started=None):
+        """選択された地域の天気予報を取得して表示（バックグラウンドスレッドで実行）
+        
+        保存済みの予報が古い場合は、それを更新確認中の印付きで先に表示してから
+        気象庁APIに問い合わせ、変わった日のカードだけを差し替える。
+        """
+        shown = False
+        try:
+            db_data = self.db.get_latest_forecast(area_code)
             
-            short_term = data[0]
-            publishing_office = short_term.get("publishingOffice", "")
-            weekly = data[1]
-            
-            weather_dict = {}
-            if short_term.get("timeSeries"):
-                series = short_term["timeSeries"][0]
-                dates = series.get("timeDefines", [])
-                if series.get("areas"):
-                    weathers = series["areas"][0].get("weathers", [])
-                    weather_codes = series["areas"][0].get("weatherCodes", [])
-                    
-                    for i, date_str in enumerate(dates[:3]):
-                        date_only = date_str[:10]
-                        weather = weathers[i] if i < len(weathers) else ""
-                        w_code = weather_codes[i] if i < len(weather_codes) else ""
-                        
-                        weather_dict[date_only] = {
-                            "weather": weather,
-                            "weather_code": w_code
-                        }
+            # 読むだけのモードでは、保存済みの予報があれば古くてもそのまま表示する
+            stale = bool(db_data) and not self.reader_only and needs_refresh(
+                db_data["report_datetime"], db_data["observed_at"]
+            )
             
-            if short_term.get("timeSeries") and len(short_term["timeSeries"]) > 2:
-                temp_series = short_term["timeSeries"][2]
-                dates = temp_series.get("timeDefines", [])
-                if temp_series.get("areas"):
-                    area = temp_series["areas"][0]
-                    temps = area.get("temps", [])
-                    
-                    for i, date_str in enumerate(dates):
-                        date_only = date_str[:10]
-                        if date_only not in weather_dict:
-                            weather_dict[date_only] = {}
-                        
-                        if i < len(temps) and temps[i] and temps[i].strip():
-                            if i % 2 == 0:
-                                weather_dict[date_only]["temp_min"] = temps[i]
-                            else:
-                                weather_dict[date_only]["temp_max"] = temps[i]
+            if db_data and (not stale or self.STALE_WHILE_REVALIDATE):
+                print(f"データベースからデータを取得しました（発表: {db_data['report_datetime']}）")
+                shown = self.apply_forecast(
+                    request_id,
+                    db_data["forecast_id"],
+                    db_data["publishing_office"],
+                    db_data["weather_list"],
+                    db_data["fetched_at"],
+                    stale=stale,
+                    started=started
+                )
+                if not stale or not shown:
+                    return
             
-            if weekly.get("timeSeries"):
-                w_series = weekly["timeSeries"][0]
-                w_dates = w_series.get("timeDefines", [])
-                if w_series.get("areas"):
-                    w_area = w_series["areas"][0]
-                    weather_codes = w_area.get("weatherCodes", [])
-                    
-                    for i, date_str in enumerate(w_dates):
-                        date_only = date_str[:10]
-                        if date_only not in weather_dict:
-                            weather_dict[date_only] = {}
-                        
-                        if i < len(weather_codes) and weather_codes[i]:
-                            weather_dict[date_only]["weather_code"] = weather_codes[i]
+            # 読むだけのモードでは取得・保存を行わず、取り込み待ちであることを表示する
+            if self.reader_only:
+                print(f"予報がまだ取り込まれていません（地域コード: {area_code}）")
+                self.apply_notice(
+                    request_id,
+                    f"この地域の予報はまだ取り込まれていません\n"
+                    f"ingest.py による取り込みをお待ちください（地域コード: {area_code}）"
+                )
+                return
             
-            if weekly.get("timeSeries") and len(weekly["timeSeries"]) > 1:
-                temp_series = weekly["timeSeries"][1]
-                dates = temp_series.get("timeDefines", [])
-                if temp_series.get("areas"):
-                    area = temp_series["areas"][0]
-                    temps_min = area.get("tempsMin", [])
-                    temps_max = area.get("tempsMax", [])
-                    
-                    for i, date_str in enumerate(dates):
-                        date_only = date_str[:10]
-                        if date_only not in weather_dict:
-                            weather_dict[date_only] = {}
-                        
-                        if i < len(temps_min) and temps_min[i] and temps_min[i].strip():
-                            if "temp_min" not in weather_dict[date_only]:
-                                weather_dict[date_only]["temp_min"] = temps_min[i]
-                        
-                        if i < len(temps_max) and temps_max[i] and temps_max[i].strip():
-                            if "temp_max" not in weather_dict[date_only]:
-                                weather_dict[date_only]["temp_max"] = temps_max[i]
+            # 取得を始める前に別の地域が選ばれていれば中止する
+            if not self.is_current(request_id):
+                print(f"別の地域が選択されたため取得を中止しました（地域コード: {area_code}）")
+                return
             
-            weather_list = []
-            for date_str in sorted(weather_dict.keys())[:7]:
-                item = weather_dict[date_str]
-                
-                weather_text = item.get("weather", "")
-                if not weather_text:
-                    w_code = item.get("weather_code", "")
-                    if w_code.startswith("1"):
-                        weather_text = "晴れ"
-                    elif w_code.startswith("2"):
-                        weather_text = "くもり"
-                    elif w_code.startswith("3") or w_code.startswith("4"):
-                        weather_text = "雨"
-                    else:
-                        weather_text = ""
-                
-                weather_list.append({
-                    "date": date_str,
-                    "weather": weather_text,
-                    "weather_code": item.get("weather_code", ""),
-                    "temp_min": item.get("temp_min", ""),
-                    "temp_max": item.get("temp_max", "")
-                })
+            print("気象庁APIからデータを取得しています")
+            stored = store_forecast(self.db, area_code, self.client.fetch_forecast_raw(area_code))
+            if stored is None:
+                if shown:
+                    self.apply_stale_notice(request_id, "更新を確認できませんでした")
+                else:
+                    self.apply_error(request_id, "天気予報データが見つかりませんでした")
+                return
             
-            forecast_id = self.db.save_forecast(area_code, publishing_office, weather_list)
-            self.current_forecast_id = forecast_id
+            forecast_id, publishing_office, weather_list = stored
             print("データをデータベースに保存しました")
             
-            self.display_weather(publishing_office, weather_list, datetime.now().isoformat())
+            fetched_at = datetime.now().isoformat()
+            if shown:
+                self.apply_patch(request_id, forecast_id, weather_list, fetched_at)
+            else:
+                self.apply_forecast(
+                    request_id, forecast_id, publishing_office, weather_list, fetched_at,
+                    started=started
+                )
             
         except Exception as e:
             print(f"天気予報の取得に失敗しました: {e}")
             import traceback
             traceback.print_exc()
-            self.show_error(f"天気予報の取得に失敗しました\n地域コード: {area_code}")
+            if shown:
+                self.apply_stale_notice(request_id, "更新に失敗しました（保存済みの予報を表示中）")
+            else:
+                self.apply_error(request_id, f"天気予報の取得に失敗しました\n地域コード: {area_code}")
     
-    def display_weather(self, publishing_office, weather_list, fetched_at):
-        """天気予報を表示"""
+    def apply_forecast(self, request_id, forecast_id, publishing_office, weather_list, fetched_at,
+                       stale=False, started=None):
+        """要求がまだ最新であれば予報を表示し、表示したかを返す"""
+        with self.render_lock:
+            if not self.is_current(request_id):
+                print(f"古い要求の結果を破棄しました（予報ID: {forecast_id}）")
+                return False
+            self.current_forecast_id = forecast_id
+            self.display_weather(publishing_office, weather_list, fetched_at, stale=stale)
         
-        history_dropdown = None
-        if self.selected_area_code:
-            history = self.db.get_forecast_history(self.selected_area_code)
-            
-            if len(history) > 1:
-                dropdown_options = []
-                for forecast_id, fetch_time, office in history:
-                    dt = datetime.fromisoformat(fetch_time)
-                    time_str = dt.strftime("%Y年%m月%d日 %H時%M分")
-                    
-                    # 現在表示中の予報に印を付ける
-                    if forecast_id == self.current_forecast_id:
-                        label = f"[現在表示] {time_str}"
-                    else:
-                        label = time_str
-                    
-                    dropdown_options.append(
-                        ft.dropdown.Option(key=str(forecast_id), text=label)
-                    )
-                
-                history_dropdown = ft.Dropdown(
-                    label="過去の予報を選択",
-                    options=dropdown_options,
-                    value=str(self.current_forecast_id),
-                    width=350,
-                    on_change=self.on_history_selected,
-                    bgcolor=ft.Colors.WHITE,
-                    border_color=ft.Colors.INDIGO_200,
-                )
+        if started is not None:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.first_paint_ms.append(elapsed)
+            METRICS.observe("first_paint_seconds", elapsed / 1000, stale=str(stale).lower())
+            print(f"初回表示まで {elapsed:.1f} ms{'（更新確認中）' if stale else ''}")
+        return True
+    
+    def apply_patch(self, request_id, forecast_id, weather_list, fetched_at):
+        """要求がまだ最新であれば、再取得した予報との差分だけを表示に反映"""
+        with self.render_lock:
+            if not self.is_current(request_id):
+                print(f"古い要求の結果を破棄しました（予報ID: {forecast_id}）")
+                return False
+            changed = self.patch_weather(forecast_id, weather_list, fetched_at)
+        print(f"更新を反映しました（変更されたカード: {changed}件）")
+        return True
+    
+    def apply_stale_notice(self, request_id, message):
+        """要求がまだ最新であれば、更新確認中の印を失敗の表示に変える"""
+        with self.render_lock:
+            if self.is_current(request_id) and self.forecast_view is not None:
+                self.stale_badge.content.value = message
+                self.stale_badge.bgcolor = ft.Colors.RED_100
+                self.main_content.update()
+    
+    def apply_error(self, request_id, message):
+        """要求がまだ最新であればエラーを表示"""
+        with self.render_lock:
+            if self.is_current(request_id):
+                self.show_error(message)
+    
+    def apply_notice(self, request_id, message):
+        """要求がまだ最新であればお知らせを表示"""
+        with self.render_lock:
+            if self.is_current(request_id):
+                self.show_notice(message)
+    
+    def show_loading(self, area_code):
+        """予報の取得中の表示
         
-        weather_cards = []
-        for item in weather_list:
-            date_str = item["date"]
-            weather = item["weather"]
-            temp_min = item["temp_min"]
-            temp_max = item["temp_max"]
-            
-            icon_stack = None
-            if "雨" in weather:
-                icon_stack = ft.Stack(
-                    controls=[
-                        ft.Icon(ft.Icons.WB_SUNNY, size=60, color=ft.Colors.ORANGE_400),
-                        ft.Container(
-                            content=ft.Icon(ft.Icons.UMBRELLA, size=40, color=ft.Colors.BLUE_400),
-                            left=25, top=20,
-                        ),
-                    ],
-                    width=70, height=70,
-                )
-            elif "雪" in weather or "ふぶく" in weather:
-                icon_stack = ft.Icon(ft.Icons.AC_UNIT, size=60, color=ft.Colors.LIGHT_BLUE_200)
-            elif "晴" in weather:
-                icon_stack = ft.Icon(ft.Icons.WB_SUNNY, size=60, color=ft.Colors.ORANGE_400)
-            elif "曇" in weather or "くもり" in weather:
-                icon_stack = ft.Icon(ft.Icons.CLOUD, size=60, color=ft.Colors.GREY_400)
-            else:
-                icon_stack = ft.Icon(ft.Icons.CLOUD, size=60, color=ft.Colors.GREY_400)
-            
-            has_min = temp_min and str(temp_min).strip()
-            has_max = temp_max and str(temp_max).strip()
-            
-            temp_display = ft.Row(
-                controls=[
-                    ft.Text(
-                        f"{temp_min}°C" if has_min else "-",
-                        size=16,
-                        color=ft.Colors.BLUE_600 if has_min else ft.Colors.GREY_400,
-                        weight=ft.FontWeight.W_500,
-                    ),
-                    ft.Text("/", size=14, color=ft.Colors.GREY_600),
-                    ft.Text(
-                        f"{temp_max}°C" if has_max else "-",
-                        size=16,
-                        color=ft.Colors.RED_400 if has_max else ft.Colors.GREY_400,
-                        weight=ft.FontWeight.W_500,
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.CENTER,
-                spacing=5,
+        予報を表示中であればカードを薄くして読み込み中の印を出し、
+        まだ何も表示していなければスケルトン（カードの枠だけ）を表示する。
+        """
+        if self.main_content.content is self.forecast_view:
+            self.loading_indicator.visible = True
+            self.cards_row.opacity = 0.4
+            # 表示中の履歴は前の地域のものなので、読み込みが終わるまで選べないようにする
+            self.history_dropdown.disabled = True
+            self.main_content.update()
+            return
+        
+        placeholder_cards = [
+            ft.Container(
+                width=180,
+                height=230,
+                bgcolor=ft.Colors.GREY_200,
+                border_radius=15,
+                border=ft.border.all(1, ft.Colors.GREY_300),
             )
-            
-            card = ft.Container(
-                content=ft.Column(
+            for _ in range(7)
+        ]
+        
+        self.main_content.content = ft.Column(
+            controls=[
+                ft.Row(
                     controls=[
+                        ft.ProgressRing(width=24, height=24, stroke_width=3),
                         ft.Text(
-                            date_str,
-                            size=16,
-                            weight=ft.FontWeight.BOLD,
-                            color=ft.Colors.GREY_800,
-                        ),
-                        ft.Container(height=10),
-                        icon_stack,
-                        ft.Container(height=5),
-                        ft.Text(
-                            weather if weather else "データなし",
-                            size=14,
-                            color=ft.Colors.GREY_700 if weather else ft.Colors.GREY_400,
-                            text_align=ft.TextAlign.CENTER,
-                            max_lines=3,
+                            f"読み込み中…（地域コード: {area_code}）",
+                            size=18,
+                            color=ft.Colors.BLUE_GREY_700,
                         ),
-                        ft.Container(height=10),
-                        temp_display,
                     ],
-                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                    spacing=0,
+                    spacing=10,
                 ),
-                padding=20,
-                bgcolor=ft.Colors.WHITE,
-                border_radius=15,
-                border=ft.border.all(1, ft.Colors.GREY_300),
-                width=180,
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=10,
-                    color=ft.Colors.BLACK12,
+                ft.Container(height=20),
+                ft.Row(
+                    controls=placeholder_cards,
+                    spacing=15,
+                    wrap=True,
                 ),
-            )
-            weather_cards.append(card)
+            ],
+            spacing=0,
+        )
+        self.update()
+    
+    def build_forecast_view(self):
+        """予報の表示部分を作成（コントロールは以降の表示で使い回す）"""
+        self.office_text = ft.Text(
+            size=28,
+            weight=ft.FontWeight.BOLD,
+            color=ft.Colors.INDIGO_900,
+        )
+        self.loading_indicator = ft.ProgressRing(
+            width=20, height=20, stroke_width=3, visible=False
+        )
+        self.fetch_time_text = ft.Text(
+            size=12,
+            color=ft.Colors.GREY_600,
+            italic=True,
+        )
+        self.stale_badge = ft.Container(
+            content=ft.Text("更新を確認中…", size=12, color=ft.Colors.BROWN_700),
+            bgcolor=ft.Colors.AMBER_100,
+            padding=ft.padding.symmetric(horizontal=8, vertical=2),
+            border_radius=10,
+            visible=False,
+        )
+        self.history_dropdown = ft.Dropdown(
+            label="過去の予報を選択",
+            width=350,
+            on_change=self.on_history_selected,
+            bgcolor=ft.Colors.WHITE,
+            border_color=ft.Colors.INDIGO_200,
+        )
+        self.history_slot = ft.Container(
+            content=self.history_dropdown,
+            padding=ft.padding.only(top=10),
+            visible=False,
+        )
+        self.cards_row = ft.Row(
+            spacing=15,
+            scroll=ft.ScrollMode.AUTO,
+            wrap=True,
+        )
         
-        fetch_dt = datetime.fromisoformat(fetched_at)
-        fetch_time_str = fetch_dt.strftime("%Y年%m月%d日 %H時%M分")
+        self.forecast_view = ft.Column(
+            controls=[
+                ft.Row(
+                    controls=[
+                        ft.Icon(ft.Icons.LOCATION_ON, size=32, color=ft.Colors.INDIGO_600),
+                        self.office_text,
+                        self.loading_indicator,
+                    ],
+                    spacing=10,
+                ),
+                ft.Row(
+                    controls=[self.fetch_time_text, self.stale_badge],
+                    spacing=10,
+                ),
+                self.history_slot,
+                ft.Container(height=20),
+                ft.Container(content=self.cards_row),
+            ],
+            spacing=0,
+        )
+    
+    @METRICS.timed("render_seconds", view="forecast")
+    def display_weather(self, publishing_office, weather_list, fetched_at, keep_history=False,
+                        stale=False):
+        """天気予報を表示し、作り直したカードの数を返す
         
-        content_controls = [
-            ft.Row(
-                controls=[
-                    ft.Icon(ft.Icons.LOCATION_ON, size=32, color=ft.Colors.INDIGO_600),
-                    ft.Text(
-                        publishing_office,
-                        size=28,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.Colors.INDIGO_900,
-                    ),
-                ],
-                spacing=10,
-            ),
-            ft.Text(
-                f"取得時刻: {fetch_time_str}",
-                size=12,
-                color=ft.Colors.GREY_600,
-                italic=True,
-            ),
-        ]
+        表示部分のコントロールは使い回し、変わった値だけを書き換える。
+        カードは日付ごとに使い回すため、別の地域や過去の予報に切り替えても
+        同じ日付のカードは値の更新だけで済む。
+        keep_history=True の場合は読み込み済みの履歴ページをそのまま使う。
+        stale=True の場合は更新確認中の印を付ける。
+        """
+        if self.forecast_view is None:
+            self.build_forecast_view()
         
-        if history_dropdown:
-            content_controls.append(ft.Container(height=10))
-            content_controls.append(history_dropdown)
+        if self.selected_area_code:
+            if not keep_history or self.history_area_code != self.selected_area_code:
+                self.history_rows, self.history_cursor = self.db.get_forecast_history_page(
+                    self.selected_area_code, limit=self.HISTORY_PAGE_SIZE
+                )
+                self.history_rows = list(self.history_rows)
+                self.history_area_code = self.selected_area_code
+            self.update_history_dropdown()
         
-        content_controls.append(ft.Container(height=20))
-        content_controls.append(
-            ft.Container(
-                content=ft.Row(
-                    controls=weather_cards,
-                    spacing=15,
-                    scroll=ft.ScrollMode.AUTO,
-                    wrap=True,
-                ),
-            )
+        changed = 0
+        cards = []
+        cards_by_date = {}
+        for item in weather_list:
+            card = self.cards_by_date.get(item["date"])
+            if card is None:
+                card = WeatherCard(item)
+                changed += 1
+            elif card.set_item(item):
+                changed += 1
+            cards_by_date[item["date"]] = card
+            cards.append(card)
+        self.cards_by_date = cards_by_date
+        self.cards_row.controls = cards
+        self.cards_row.opacity = 1.0
+        
+        self.office_text.value = publishing_office
+        self.fetch_time_text.value = self.format_fetch_time(fetched_at)
+        self.stale_badge.content.value = "更新を確認中…"
+        self.stale_badge.bgcolor = ft.Colors.AMBER_100
+        self.stale_badge.visible = stale
+        self.loading_indicator.visible = False
+        
+        if self.main_content.content is self.forecast_view:
+            self.main_content.update()
+        else:
+            self.main_content.content = self.forecast_view
+            self.update()
+        return changed
+    
+    @METRICS.timed("render_seconds", view="patch")
+    def patch_weather(self, forecast_id, weather_list, fetched_at):
+        """表示中の予報を再取得した予報に合わせて更新し、作り直したカードの数を返す"""
+        # 新しい予報が保存された場合は履歴を読み直す
+        keep_history = forecast_id == self.current_forecast_id
+        self.current_forecast_id = forecast_id
+        return self.display_weather(
+            self.office_text.value, weather_list, fetched_at, keep_history=keep_history
         )
+    
+    def format_fetch_time(self, fetched_at):
+        """取得時刻の表示文字列"""
+        fetch_dt = datetime.fromisoformat(fetched_at)
+        return f"取得時刻: {fetch_dt.strftime('%Y年%m月%d日 %H時%M分')}"
+    
+    def update_history_dropdown(self):
+        """読み込み済みの履歴をプルダウンに反映（2 件未満なら隠す）"""
+        self.history_dropdown.options = self.build_history_options()
+        self.history_dropdown.value = str(self.current_forecast_id)
+        self.history_dropdown.disabled = False
+        self.history_slot.visible = len(self.history_rows) > 1
+    
+    def build_history_options(self):
+        """読み込み済みの履歴からプルダウンの選択肢を作る
         
-        self.main_content.content = ft.Column(
-            controls=content_controls,
-            spacing=0,
+        選択肢は forecast_id ごとに使い回し、ラベルだけを書き換える。
+        """
+        options = {}
+        dropdown_options = []
+        for forecast_id, fetch_time, office in self.history_rows:
+            dt = datetime.fromisoformat(fetch_time)
+            time_str = dt.strftime("%Y年%m月%d日 %H時%M分")
+            
+            # 現在表示中の予報に印を付ける
+            if forecast_id == self.current_forecast_id:
+                label = f"[現在表示] {time_str}"
+            else:
+                label = time_str
+            
+            key = str(forecast_id)
+            option = self.history_options.get(key)
+            if option is None:
+                option = ft.dropdown.Option(key=key, text=label)
+            else:
+                option.text = label
+            options[key] = option
+            dropdown_options.append(option)
+        
+        if self.history_cursor:
+            option = self.history_options.get(self.LOAD_MORE_KEY) or ft.dropdown.Option(
+                key=self.LOAD_MORE_KEY, text="さらに古い予報を読み込む…"
+            )
+            options[self.LOAD_MORE_KEY] = option
+            dropdown_options.append(option)
+        
+        self.history_options = options
+        return dropdown_options
+    
+    def load_more_history(self):
+        """履歴の次のページを読み込んでプルダウンに追加"""
+        rows, self.history_cursor = self.db.get_forecast_history_page(
+            self.history_area_code, limit=self.HISTORY_PAGE_SIZE, before=self.history_cursor
         )
-        self.update()
+        self.history_rows.extend(rows)
+        
+        self.update_history_dropdown()
+        self.history_dropdown.update()
     
     def on_history_selected(self, e):
         """過去の予報選択時の処理"""
+        if self.history_area_code != self.selected_area_code:
+            return
+        if e.control.value == self.LOAD_MORE_KEY:
+            self.load_more_history()
+            return
+        
         selected_forecast_id = int(e.control.value)
         
         forecast_data = self.db.get_forecast_by_id(selected_forecast_id)
         
         if forecast_data:
-            self.current_forecast_id = selected_forecast_id
-            self.display_weather(
-                forecast_data["publishing_office"],
-                forecast_data["weather_list"],
-                forecast_data["fetched_at"]
-            )
+            with self.render_lock:
+                # 別の地域の読み込みが始まった後に前の地域の履歴が選ばれた場合は無視する
+                # （履歴とカードが 2 つの地域で混ざらないようにする）
+                if self.history_area_code != self.selected_area_code:
+                    print(f"地域が切り替わったため過去の予報を表示しません（予報ID: {selected_forecast_id}）")
+                    return
+                # 読み込み中の地域の結果で上書きされないように要求番号を進める
+                self.request_id += 1
+                self.current_forecast_id = selected_forecast_id
+                self.display_weather(
+                    forecast_data["publishing_office"],
+                    forecast_data["weather_list"],
+                    forecast_data["fetched_at"],
+                    keep_history=True
+                )
             print(f"過去の予報を表示しました（予報ID: {selected_forecast_id}）")
     
     def show_error(self, message):
@@ -770,6 +768,20 @@ class WeatherApp(ft.Row):
             expand=True,
         )
         self.update()
+    
+    def show_notice(self, message):
+        """エラーではないお知らせ（予報の取り込み待ちなど）を表示"""
+        self.main_content.content = ft.Column(
+            controls=[
+                ft.Icon(ft.Icons.HOURGLASS_EMPTY, size=80, color=ft.Colors.BLUE_GREY_400),
+                ft.Container(height=20),
+                ft.Text(message, size=20, color=ft.Colors.BLUE_GREY_700, text_align=ft.TextAlign.CENTER),
+            ],
+            alignment=ft.MainAxisAlignment.CENTER,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+            expand=True,
+        )
+        self.update()
 
 
 def main(page: ft.Page):
@@ -777,7 +789,13 @@ def main(page: ft.Page):
     page.theme_mode = ft.ThemeMode.LIGHT
     page.padding = 0
     
-    app = WeatherApp()
+    app = WeatherApp(reader_only=os.environ.get("WEATHER_APP_READER_ONLY") == "1")
+    
+    # WEATHER_APP_METRICS=1 の場合は計測結果を出力する
+    METRICS.add_collector("read_cache", app.db.cache.stats)
+    METRICS.add_collector("http", app.client.stats)
+    start_exporters()
+    
     page.add(app)
     app.load_area_data()
 
@@ -0,0 +1,118 @@
+import flet as ft
+
+from weather_codes import WEATHER_ICONS, classify_weather_text
+
+
+def weather_icon(item):
+    """予報 1 日分のアイコンの種類と色（天気コードの表を優先し、なければ天気文から決める）"""
+    try:
+        return WEATHER_ICONS[item["weather_code"]]
+    except KeyError:  # 天気コードがない・表にない（None を含む）
+        pass
+    icon, color, _ = classify_weather_text(item["weather"])
+    return icon, color
+
+
+def build_weather_icon(icon, color):
+    """アイコンの種類と色に対応するコントロールを作成"""
+    if icon == "rain":
+        return ft.Stack(
+            controls=[
+                ft.Icon(ft.Icons.WB_SUNNY, size=60, color=ft.Colors.ORANGE_400),
+                ft.Container(
+                    content=ft.Icon(ft.Icons.UMBRELLA, size=40, color=color),
+                    left=25, top=20,
+                ),
+            ],
+            width=70, height=70,
+        )
+    name = {
+        "thunder": ft.Icons.THUNDERSTORM,
+        "snow": ft.Icons.AC_UNIT,
+        "fog": ft.Icons.FOGGY,
+        "sunny": ft.Icons.WB_SUNNY,
+    }.get(icon, ft.Icons.CLOUD)
+    return ft.Icon(name, size=60, color=color)
+
+
+class WeatherCard(ft.Container):
+    """1 日分の予報カード
+
+    日付ごとに同じインスタンスを使い回し、set_item で値が変わった部分だけを書き換える。
+    Flet は変更された属性だけを送るため、カード全体を作り直すより送信量が少ない。
+    """
+
+    def __init__(self, item):
+        self.date_text = ft.Text(size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_800)
+        self.icon_slot = ft.Container()
+        self.weather_text = ft.Text(size=14, text_align=ft.TextAlign.CENTER, max_lines=3)
+        self.temp_min_text = ft.Text(size=16, weight=ft.FontWeight.W_500)
+        self.temp_max_text = ft.Text(size=16, weight=ft.FontWeight.W_500)
+
+        super().__init__(
+            content=ft.Column(
+                controls=[
+                    self.date_text,
+                    ft.Container(height=10),
+                    self.icon_slot,
+                    ft.Container(height=5),
+                    self.weather_text,
+                    ft.Container(height=10),
+                    ft.Row(
+                        controls=[
+                            self.temp_min_text,
+                            ft.Text("/", size=14, color=ft.Colors.GREY_600),
+                            self.temp_max_text,
+                        ],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                        spacing=5,
+                    ),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=0,
+            ),
+            padding=20,
+            bgcolor=ft.Colors.WHITE,
+            border_radius=15,
+            border=ft.border.all(1, ft.Colors.GREY_300),
+            width=180,
+            shadow=ft.BoxShadow(
+                spread_radius=1,
+                blur_radius=10,
+                color=ft.Colors.BLACK12,
+            ),
+        )
+
+        self.item = None
+        self.icon_key = None
+        self.set_item(item)
+
+    def set_item(self, item):
+        """予報の値を反映し、表示が変わったかを返す"""
+        if item == self.item:
+            return False
+
+        weather = item["weather"]
+        temp_min = item["temp_min"]
+        temp_max = item["temp_max"]
+
+        self.date_text.value = item["date"]
+
+        # アイコンは種類が変わったときだけ作り直す
+        icon_key = weather_icon(item)
+        if icon_key != self.icon_key:
+            self.icon_slot.content = build_weather_icon(*icon_key)
+            self.icon_key = icon_key
+
+        self.weather_text.value = weather if weather else "データなし"
+        self.weather_text.color = ft.Colors.GREY_700 if weather else ft.Colors.GREY_400
+
+        has_min = temp_min is not None
+        has_max = temp_max is not None
+        self.temp_min_text.value = f"{temp_min}°C" if has_min else "-"
+        self.temp_min_text.color = ft.Colors.BLUE_600 if has_min else ft.Colors.GREY_400
+        self.temp_max_text.value = f"{temp_max}°C" if has_max else "-"
+        self.temp_max_text.color = ft.Colors.RED_400 if has_max else ft.Colors.GREY_400
+
+        self.item = item
+        return True
@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+
+# 気象庁の天気コードと天気の略称（Forecast.Const.TELOPS と同じ）
+TELOPS = {
+    100: "晴", 101: "晴時々曇", 102: "晴一時雨", 103: "晴時々雨", 104: "晴一時雪",
+    105: "晴時々雪", 106: "晴一時雨か雪", 107: "晴時々雨か雪", 108: "晴一時雨か雷雨",
+    110: "晴後時々曇", 111: "晴後曇", 112: "晴後一時雨", 113: "晴後時々雨", 114: "晴後雨",
+    115: "晴後一時雪", 116: "晴後時々雪", 117: "晴後雪", 118: "晴後雨か雪",
+    119: "晴後雨か雷雨", 120: "晴朝夕一時雨", 121: "晴朝の内一時雨", 122: "晴夕方一時雨",
+    123: "晴山沿い雷雨", 124: "晴山沿い雪", 125: "晴午後は雷雨", 126: "晴昼頃から雨",
+    127: "晴夕方から雨", 128: "晴夜は雨", 130: "朝の内霧後晴", 131: "晴明け方霧",
+    132: "晴朝夕曇", 140: "晴時々雨で雷を伴う", 160: "晴一時雪か雨", 170: "晴時々雪か雨",
+    181: "晴後雪か雨",
+    200: "曇", 201: "曇時々晴", 202: "曇一時雨", 203: "曇時々雨", 204: "曇一時雪",
+    205: "曇時々雪", 206: "曇一時雨か雪", 207: "曇時々雨か雪", 208: "曇一時雨か雷雨",
+    209: "霧", 210: "曇後時々晴", 211: "曇後晴", 212: "曇後一時雨", 213: "曇後時々雨",
+    214: "曇後雨", 215: "曇後一時雪", 216: "曇後時々雪", 217: "曇後雪", 218: "曇後雨か雪",
+    219: "曇後雨か雷雨", 220: "曇朝夕一時雨", 221: "曇朝の内一時雨", 222: "曇夕方一時雨",
+    223: "曇日中時々晴", 224: "曇昼頃から雨", 225: "曇夕方から雨", 226: "曇夜は雨",
+    228: "曇昼頃から雪", 229: "曇夕方から雪", 230: "曇夜は雪", 231: "曇海上海岸は霧か霧雨",
+    240: "曇時々雨で雷を伴う", 250: "曇時々雪で雷を伴う", 260: "曇一時雪か雨",
+    270: "曇時々雪か雨", 281: "曇後雪か雨",
+    300: "雨", 301: "雨時々晴", 302: "雨時々止む", 303: "雨時々雪", 304: "雨か雪",
+    306: "大雨", 308: "雨で暴風を伴う", 309: "雨一時雪", 311: "雨後晴", 313: "雨後曇",
+    314: "雨後時々雪", 315: "雨後雪", 316: "雨か雪後晴", 317: "雨か雪後曇",
+    320: "朝の内雨後晴", 321: "朝の内雨後曇", 322: "雨朝晩一時雪", 323: "雨昼頃から晴",
+    324: "雨夕方から晴", 325: "雨夜は晴", 326: "雨夕方から雪", 327: "雨夜は雪",
+    328: "雨一時強く降る", 329: "雨一時みぞれ", 340: "雪か雨", 350: "雨で雷を伴う",
+    361: "雪か雨後晴", 371: "雪か雨後曇",
+    400: "雪", 401: "雪時々晴", 402: "雪時々止む", 403: "雪時々雨", 405: "大雪",
+    406: "風雪強い", 407: "暴風雪", 409: "雪一時雨", 411: "雪後晴", 413: "雪後曇",
+    414: "雪後雨", 420: "朝の内雪後晴", 421: "朝の内雪後曇", 422: "雪昼頃から雨",
+    423: "雪夕方から雨", 425: "雪一時強く降る", 426: "雪後みぞれ", 427: "雪一時みぞれ",
+    430: "みぞれ", 450: "雪で雷を伴う",
+}
+
+# 天気文に含まれる語とアイコン・色・優先度（優先度の高い順）
+# 雷・雨・雪を含む場合は優先度の高いものを使い（例: 「晴時々雨」は雨）、
+# 含まない場合は最初に現れる語を使う（例: 「曇時々晴」は曇、「晴時々曇」は晴）
+# 色は Flet の Colors の値（UI を持たない取り込み処理から flet を読み込まないため文字列で持つ）
+WEATHER_FEATURES = (
+    # (語, アイコン, 色, 優先度)
+    ("雷", "thunder", "amber700", 6),
+    ("雨", "rain", "blue400", 5),
+    ("みぞれ", "rain", "blue400", 5),
+    ("雪", "snow", "lightblue200", 4),
+    ("ふぶく", "snow", "lightblue200", 4),
+    ("霧", "fog", "bluegrey300", 3),
+    ("晴", "sunny", "orange400", 2),
+    ("曇", "cloudy", "grey400", 1),
+    ("くもり", "cloudy", "grey400", 1),
+)
+
+# この優先度以上の語（降水・雷）は現れる位置にかかわらず優先する
+PRECIPITATION_PRIORITY = 4
+
+# どの語も含まない場合の (アイコン, 色, 優先度)
+DEFAULT_FEATURE = ("cloudy", "grey400", 0)
+
+WeatherCodeInfo = namedtuple("WeatherCodeInfo", ["code", "label", "icon", "color", "priority"])
+
+
+def classify_weather_text(text):
+    """天気文から (アイコン, 色, 優先度) を決める（天気コードがない場合にも使う）"""
+    first = None
+    for word, icon, color, priority in WEATHER_FEATURES:
+        position = text.find(word)
+        if position < 0:
+            continue
+        if priority >= PRECIPITATION_PRIORITY:
+            return icon, color, priority
+        if first is None or position < first[0]:
+            first = (position, icon, color, priority)
+    return first[1:] if first else DEFAULT_FEATURE
+
+
+def _build_table():
+    table = {}
+    for code, label in TELOPS.items():
+        icon, color, priority = classify_weather_text(label)
+        table[code] = WeatherCodeInfo(code, label, icon, color, priority)
+    return table
+
+
+# 天気コード -> WeatherCodeInfo（インポート時に 1 回だけ作成）
+WEATHER_CODES = _build_table()
+
+# 予報 JSON の天気コードは文字列のため、int と文字列の両方で引けるようにする
+_LOOKUP = {**WEATHER_CODES, **{str(code): info for code, info in WEATHER_CODES.items()}}
+
+
+# 天気コード（int / 文字列）-> (アイコン, 色)、略称
+# カードの描画と予報 JSON の解析で 1 回の辞書参照で済むよう、最終的な値を持っておく
+WEATHER_ICONS = {code: (info.icon, info.color) for code, info in _LOOKUP.items()}
+WEATHER_LABELS = {code: info.label for code, info in _LOOKUP.items()}
+
+
+def lookup_weather_code(code):
+    """天気コード（int / 文字列 / None）に対応する WeatherCodeInfo。不明なら None"""
+    return _LOOKUP.get(code)
+
+
+def weather_label(code):
+    """天気コードの略称（不明なら空文字）"""
+    return WEATHER_LABELS.get(code, "")